@@ -6,65 +6,101 @@ from calculator.probabilistic_calculator import (
 from calculator.do_probabilistic_lca_calculator import DesignOptionProbabilisticLCACalculator
 from general.generate_designs import create_layers, create_design_options, create_emission_factors
 from general.load_input import load_data
-from general.statistical_results import calculate_statistical_parameters_life_cycle_stages
+from general.statistical_results import calculate_statistical_table_life_cycle_stages
 from visualizations.old_visualizations import plot_overall_lca_distributions
 from visualizations.do_visualizations import plot_lca_distributions_by_design_option
-from general.save_json import convert_statistical_data_to_json
+from general.save_json import save_statistical_table_to_json
+from general.metrics import RunMetrics
+from general.profiling import PhaseProfiler
+from visualizations.export import export_figures, build_run_figure_jobs
+import os
+
+## set UQLCA_CHECKPOINT_DIR to checkpoint the probabilistic runs (one subdirectory per database);
+## a restarted run then resumes from the last checkpoint
+checkpoint_dir = os.environ.get("UQLCA_CHECKPOINT_DIR")
+def checkpoint_options(db_name):
+    return {'checkpoint_dir': os.path.join(checkpoint_dir, db_name), 'resume': True} if checkpoint_dir else {}
+
+
+## the probabilistic engines and the figure export start worker processes; with the spawn start method (the default on
+## macOS and Windows) the workers import this script again, so the run must only start under the __main__ guard
+def main():
+    ## phase timers and throughput for the whole run, exported to results/run_metrics.json at the end
+    ## set UQLCA_PROFILE_DIR to additionally capture a cProfile profile per phase
+    profile_dir = os.environ.get("UQLCA_PROFILE_DIR")
+    run_metrics = RunMetrics(profiler=PhaseProfiler(profile_dir) if profile_dir else None)
+
+    layers_data, emission_factors_data, design_options_data = load_data(
+        "/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/layers.json",
+        ["/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/ecoinvent_background_data.json", "/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/national_background_data.json", "/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/epd_background_data.json"],
+        "/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/design_options.json",
+        metrics=run_metrics
+    )
+
+    ## Create the instances of layers, design options and emission factors
+    layers = create_layers(layers_data)
+    emission_factors_ecoinvent = create_emission_factors(emission_factors_data[0])
+    emission_factors_national = create_emission_factors(emission_factors_data[1])
+    emission_factors_epd = create_emission_factors(emission_factors_data[2])
+    design_options = create_design_options(layers, design_options_data)
+
+    ## Deterministic LCA on layer level and design option level
+    deterministic_lca_calculator = LCACalculator(layers, emission_factors_national, metrics=run_metrics)
+    deterministic_lca_calculator.calculate_stage_impacts()
+    deterministic_layer_results = deterministic_lca_calculator.get_results()
+    deterministic_design_option_results = deterministic_lca_calculator.calculate_deterministic_lca_design_option(deterministic_layer_results, design_options, length_road=3.39)
+    # print(deterministic_design_option_results)
+
+    ## Probabilistic LCA on layer level
+    probabilistic_lca_calculator = ProbabilisticLCACalculator(layers, emission_factors_ecoinvent, metrics=run_metrics)
+    probabilistic_results = probabilistic_lca_calculator.calculate_probabilistic_impact(n_samples=1000)
+
+    ## Probabilistic LCA on design option level - ECOINVENT
+    do_probabilistic_lca_calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=emission_factors_ecoinvent, design_options=design_options, length_road=3.390, metrics=run_metrics)
+    db1_probabilistic_results = do_probabilistic_lca_calculator.calculate_do_probabilistic_impact(n_samples=1000, **checkpoint_options('ecoinvent'))
+    db1_result_tensor = do_probabilistic_lca_calculator.collect_result_tensor(db1_probabilistic_results)
+    aggregated_db1_results, full_db1_results = db1_result_tensor.aggregate()
+
+    ## Probabilistic LCA on design option level - NATIONAL
+    do_probabilistic_lca_calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=emission_factors_national, design_options=design_options, length_road=3.390, metrics=run_metrics)
+    db2_probabilistic_results = do_probabilistic_lca_calculator.calculate_do_probabilistic_impact(n_samples=1000, **checkpoint_options('national'))
+    db2_result_tensor = do_probabilistic_lca_calculator.collect_result_tensor(db2_probabilistic_results)
+    aggregated_db2_results, full_db2_results = db2_result_tensor.aggregate()
+
+    ## Probabilistic LCA on design option level - EPD
+    do_probabilistic_lca_calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=emission_factors_epd, design_options=design_options, length_road=3.390, metrics=run_metrics)
+    db3_probabilistic_results = do_probabilistic_lca_calculator.calculate_do_probabilistic_impact(n_samples=1000, **checkpoint_options('epd'))
+    db3_result_tensor = do_probabilistic_lca_calculator.collect_result_tensor(db3_probabilistic_results)
+    aggregated_db3_results, full_db3_results = db3_result_tensor.aggregate()
+    full_results = [full_db1_results, full_db2_results, full_db3_results]
+    aggregated_results = [aggregated_db1_results, aggregated_db2_results, aggregated_db3_results]
+
+    ## Statistical parameters for life cycle stages in json format
+    ## This will create a json file with the statistical parameters for each life cycle stage
+    ## and save it in the results folder. The json file will contain the mean, std, cov, ... 
+    stat_results_ecoinvent = calculate_statistical_table_life_cycle_stages(db1_result_tensor, metrics=run_metrics)
+    save_statistical_table_to_json(stat_results_ecoinvent, "results/ecoinvent_results.json", metrics=run_metrics)
+    stat_results_national = calculate_statistical_table_life_cycle_stages(db2_result_tensor, metrics=run_metrics)
+    save_statistical_table_to_json(stat_results_national, "results/national_results.json", metrics=run_metrics)
+    stat_results_epd = calculate_statistical_table_life_cycle_stages(db3_result_tensor, metrics=run_metrics)
+    save_statistical_table_to_json(stat_results_epd, "results/epd_results.json", metrics=run_metrics)
+
+    ## Visualizations
+    # plot_lca_distributions_by_design_option(full_results)
+    # plot_overall_lca_distributions(full_results)
+
+    ## set UQLCA_FIGURE_DIR to render the figure set headless into that directory (in parallel, unchanged figures are skipped)
+    figure_dir = os.environ.get("UQLCA_FIGURE_DIR")
+    if figure_dir:
+        with run_metrics.phase("figure_export"):
+            export_figures(build_run_figure_jobs({'ecoinvent': db1_result_tensor, 'ökobaudat': db2_result_tensor, 'EPD': db3_result_tensor}), figure_dir)
+
+    ## Run metrics (wall time, samples/second and item counts per phase)
+    print(run_metrics)
+    run_metrics.to_json("results/run_metrics.json")
+    if run_metrics.profiler is not None:
+        run_metrics.profiler.write()
 
-layers_data, emission_factors_data, design_options_data = load_data(
-    "/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/layers.json",
-    ["/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/ecoinvent_background_data.json", "/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/national_background_data.json", "/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/epd_background_data.json"],
-    "/Users/marlontheis/Desktop/UNIVERSITY/TU_BERLIN/Master_Thesis/master-thesis-project/uncertainty-project/uncertainty-quantification-lca/uqlca/data/design_options.json"
-)
 
-## Create the instances of layers, design options and emission factors
-layers = create_layers(layers_data)
-emission_factors_ecoinvent = create_emission_factors(emission_factors_data[0])
-emission_factors_national = create_emission_factors(emission_factors_data[1])
-emission_factors_epd = create_emission_factors(emission_factors_data[2])
-design_options = create_design_options(layers, design_options_data)
-
-## Deterministic LCA on layer level and design option level
-deterministic_lca_calculator = LCACalculator(layers, emission_factors_national)
-deterministic_lca_calculator.calculate_stage_impacts()
-deterministic_layer_results = deterministic_lca_calculator.get_results()
-deterministic_design_option_results = deterministic_lca_calculator.calculate_deterministic_lca_design_option(deterministic_layer_results, design_options, length_road=3.39)
-# print(deterministic_design_option_results)
-
-## Probabilistic LCA on layer level
-probabilistic_lca_calculator = ProbabilisticLCACalculator(layers, emission_factors_ecoinvent)
-probabilistic_results = probabilistic_lca_calculator.calculate_probabilistic_impact(n_samples=1000)
-
-## Probabilistic LCA on design option level - ECOINVENT
-do_probabilistic_lca_calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=emission_factors_ecoinvent, design_options=design_options, length_road=3.390)
-db1_probabilistic_results = do_probabilistic_lca_calculator.calculate_do_probabilistic_impact(n_samples=1000)
-aggregated_db1_results = do_probabilistic_lca_calculator.collect_aggregated_data(db1_probabilistic_results)
-full_db1_results = do_probabilistic_lca_calculator.collect_overall_aggregated_data(db1_probabilistic_results)
-
-## Probabilistic LCA on design option level - NATIONAL
-do_probabilistic_lca_calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=emission_factors_national, design_options=design_options, length_road=3.390)
-db2_probabilistic_results = do_probabilistic_lca_calculator.calculate_do_probabilistic_impact(n_samples=1000)
-aggregated_db2_results = do_probabilistic_lca_calculator.collect_aggregated_data(db2_probabilistic_results)
-full_db2_results = do_probabilistic_lca_calculator.collect_overall_aggregated_data(db2_probabilistic_results)
-
-## Probabilistic LCA on design option level - EPD
-do_probabilistic_lca_calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=emission_factors_epd, design_options=design_options, length_road=3.390)
-db3_probabilistic_results = do_probabilistic_lca_calculator.calculate_do_probabilistic_impact(n_samples=1000)
-aggregated_db3_results = do_probabilistic_lca_calculator.collect_aggregated_data(db3_probabilistic_results)
-full_db3_results = do_probabilistic_lca_calculator.collect_overall_aggregated_data(db3_probabilistic_results)
-full_results = [full_db1_results, full_db2_results, full_db3_results]
-aggregated_results = [aggregated_db1_results, aggregated_db2_results, aggregated_db3_results]
-
-## Statistical parameters for life cycle stages in json format
-## This will create a json file with the statistical parameters for each life cycle stage
-## and save it in the results folder. The json file will contain the mean, std, cov, ... 
-stat_results_ecoinvent = calculate_statistical_parameters_life_cycle_stages(aggregated_db1_results)
-stat_results_ecoinvent_json = convert_statistical_data_to_json(stat_results_ecoinvent, "results/ecoinvent_results.json")
-stat_results_national = calculate_statistical_parameters_life_cycle_stages(aggregated_db2_results)
-stat_results_national_json = convert_statistical_data_to_json(stat_results_national, "results/national_results.json")
-stat_results_epd = calculate_statistical_parameters_life_cycle_stages(aggregated_db3_results)
-stat_results_epd_json = convert_statistical_data_to_json(stat_results_epd, "results/epd_results.json")
-
-## Visualizations
-# plot_lca_distributions_by_design_option(full_results)
-# plot_overall_lca_distributions(full_results)
+if __name__ == "__main__":
+    main()
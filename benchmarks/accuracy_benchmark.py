@@ -0,0 +1,163 @@
+""" accuracy-versus-cost benchmark for the sampling methods and sample sizes on the bundled data/ inputs
+
+Run from the repository root, e.g.:
+    python -m benchmarks.accuracy_benchmark --output bench_output.csv --target 0.01
+"""
+import argparse
+import contextlib
+import io
+import time
+import numpy as np
+import openturns as ot
+import pandas as pd
+
+from benchmarks.scaling_benchmark import ENGINES, LENGTH_ROAD
+from calculator.do_probabilistic_lca_calculator import DesignOptionProbabilisticLCACalculator
+from calculator.sampling import SAMPLING_METHODS
+from general.generate_designs import create_layers, create_design_options, create_emission_factors
+from general.load_input import load_data
+from general.statistical_results import calculate_statistical_parameters_life_cycle_stages, convert_statistical_data_to_table_life_cycle_stages
+
+LAYERS_PATH = "data/layers.json"
+DESIGN_OPTIONS_PATH = "data/design_options.json"
+DATABASES = {
+    'ecoinvent': "data/ecoinvent_background_data.json",
+    'ökobaudat': "data/national_background_data.json",
+    'EPD': "data/epd_background_data.json",
+}
+
+## statistics of results/stat_results_*.csv whose convergence is measured
+STATISTICS = ['Mean', 'COV', '95th Percentile']
+SERIES_KEYS = ['Design Option', 'Life Cycle Stage', 'Impact Category']
+
+
+def _run(calculator, engine, n_samples, sampling_method, seed):
+    """Run one engine and return the statistical table and the wall time."""
+    ot.RandomGenerator.SetSeed(seed)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        aggregated_data = engine(calculator, n_samples, sampling_method)
+    wall_time = time.perf_counter() - start
+    table = convert_statistical_data_to_table_life_cycle_stages(calculate_statistical_parameters_life_cycle_stages(aggregated_data))
+    return table[SERIES_KEYS + STATISTICS], wall_time
+
+
+def run_accuracy_benchmark(databases=None, sampling_methods=None, sample_sizes=(100, 250, 500, 1000), n_reference=10000, n_replicates=3, engine="reference", seed=0):
+    """
+    Run each sampling method over increasing sample counts and compare the statistics with a high-sample reference.
+
+    The reference is a plain Monte Carlo run with n_reference samples, so its own sampling error
+    (roughly 1/sqrt(n_reference) relative for the mean) is a floor for the reported errors.
+
+    Parameters:
+    - databases: Dictionary mapping database name to background data path (default: DATABASES).
+    - sampling_methods: Sampling methods to compare (default: SAMPLING_METHODS).
+    - sample_sizes: Sample counts to run for every method.
+    - n_reference: Number of samples of the reference run.
+    - n_replicates: Number of independent replicates per method and sample count.
+    - engine: Name of the engine in benchmarks.scaling_benchmark.ENGINES.
+    - seed: Base seed; replicate r of every setting uses seed + 1 + r.
+
+    Returns:
+    - df: Pandas DataFrame with one row per database, method, sample count, series and statistic,
+      containing the reference value, the RMSE, the relative RMSE and the mean wall time of the run.
+    """
+    databases = databases or DATABASES
+    sampling_methods = sampling_methods or SAMPLING_METHODS
+    run_engine = ENGINES[engine]
+    layers_data, emission_factors_data, design_options_data = load_data(LAYERS_PATH, list(databases.values()), DESIGN_OPTIONS_PATH)
+    layers = create_layers(layers_data)
+    design_options = create_design_options(layers, design_options_data)
+
+    frames = []
+    for db_name, db_data in zip(databases, emission_factors_data):
+        calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=create_emission_factors(db_data), design_options=design_options, length_road=LENGTH_ROAD)
+        print(f"Reference run for {db_name} with {n_reference} samples")
+        reference, _ = _run(calculator, run_engine, n_reference, "monte_carlo", seed)
+        reference = reference.melt(id_vars=SERIES_KEYS, var_name='Statistic', value_name='Reference')
+
+        for sampling_method in sampling_methods:
+            for n_samples in sample_sizes:
+                print(f"{db_name}: {sampling_method} with {n_samples} samples")
+                replicate_tables = []
+                wall_times = []
+                for replicate in range(n_replicates):
+                    table, wall_time = _run(calculator, run_engine, n_samples, sampling_method, seed + 1 + replicate)
+                    replicate_tables.append(table.melt(id_vars=SERIES_KEYS, var_name='Statistic', value_name='Estimate'))
+                    wall_times.append(wall_time)
+
+                estimates = pd.concat(replicate_tables).merge(reference, on=SERIES_KEYS + ['Statistic'])
+                estimates['Squared Error'] = (estimates['Estimate'] - estimates['Reference']) ** 2
+                errors = estimates.groupby(SERIES_KEYS + ['Statistic'], sort=False).agg(
+                    Reference=('Reference', 'first'),
+                    MSE=('Squared Error', 'mean')
+                ).reset_index()
+                errors['RMSE'] = np.sqrt(errors.pop('MSE'))
+                errors['Relative RMSE'] = errors['RMSE'] / errors['Reference'].abs().replace(0, np.nan)
+                errors.insert(0, 'Database', db_name)
+                errors.insert(1, 'Sampling Method', sampling_method)
+                errors.insert(2, 'Samples', n_samples)
+                errors['Wall Time (s)'] = np.mean(wall_times)
+                frames.append(errors)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def recommend_settings(df, target_relative_error, statistics=None, impact_categories=None):
+    """
+    Find, per database and sampling method, the cheapest sample count whose worst relative RMSE meets the target.
+
+    Parameters:
+    - df: DataFrame returned by run_accuracy_benchmark.
+    - target_relative_error: Target relative RMSE (e.g. 0.01 for 1 %).
+    - statistics: Statistics that have to meet the target (default: all).
+    - impact_categories: Impact categories that have to meet the target (default: all). Categories with
+      means close to zero (e.g. gwp_biogenic) have large relative errors and can be excluded here.
+
+    Returns:
+    - summary: Pandas DataFrame with the worst relative RMSE and wall time per setting, and whether it meets the target.
+      The recommended setting is the first row per database with 'Meets Target' set.
+    """
+    selection = df
+    if statistics:
+        selection = selection[selection['Statistic'].isin(statistics)]
+    if impact_categories:
+        selection = selection[selection['Impact Category'].isin(impact_categories)]
+
+    summary = selection.groupby(['Database', 'Sampling Method', 'Samples']).agg(
+        **{
+            'Worst Relative RMSE': ('Relative RMSE', 'max'),
+            'Wall Time (s)': ('Wall Time (s)', 'first'),
+        }
+    ).reset_index()
+    summary['Meets Target'] = summary['Worst Relative RMSE'] <= target_relative_error
+    return summary.sort_values(['Database', 'Meets Target', 'Wall Time (s)'], ascending=[True, False, True]).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy-versus-cost benchmark for the sampling methods.")
+    parser.add_argument('--methods', nargs='+', choices=SAMPLING_METHODS, default=SAMPLING_METHODS)
+    parser.add_argument('--sample-sizes', nargs='+', type=int, default=[100, 250, 500, 1000])
+    parser.add_argument('--n-reference', type=int, default=10000)
+    parser.add_argument('--replicates', type=int, default=3)
+    parser.add_argument('--engine', choices=list(ENGINES), default='reference')
+    parser.add_argument('--target', type=float, help="Target relative RMSE for the recommendation, e.g. 0.01.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the error table to this CSV file.")
+    args = parser.parse_args()
+
+    df = run_accuracy_benchmark(
+        sampling_methods=args.methods, sample_sizes=args.sample_sizes, n_reference=args.n_reference,
+        n_replicates=args.replicates, engine=args.engine, seed=args.seed
+    )
+    overview = df.groupby(['Database', 'Sampling Method', 'Samples', 'Statistic'])[['Relative RMSE', 'Wall Time (s)']].median()
+    print(overview.to_string())
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"CSV saved to {args.output}")
+    if args.target:
+        print(recommend_settings(df, args.target, impact_categories=['gwp_total', 'gwp_fossil']).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
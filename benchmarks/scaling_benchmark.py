@@ -0,0 +1,269 @@
+""" scaling benchmark for the calculators, aggregation and statistics on synthetic workloads
+
+Run from the repository root, e.g.:
+    python -m benchmarks.scaling_benchmark --output bench_output.csv
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import openturns as ot
+import pandas as pd
+
+from benchmarks.synthetic_workload import generate_synthetic_inputs, write_synthetic_inputs
+from calculator.deterministic_calculator import LCACalculator
+from calculator.probabilistic_calculator import ProbabilisticLCACalculator
+from calculator.do_probabilistic_lca_calculator import DesignOptionProbabilisticLCACalculator
+from calculator.parallel import calculate_parallel_impact
+from general.generate_designs import create_layers, create_design_options, create_emission_factors
+from general.load_input import load_data
+from general.statistical_results import calculate_statistical_parameters_life_cycle_stages, calculate_statistical_table_life_cycle_stages
+
+LENGTH_ROAD = 3.39
+
+## workload of the bundled data/ inputs; every sweep varies one dimension around it
+BASE_CONFIG = {
+    'n_samples': 200,
+    'n_layers': 11,
+    'materials_per_layer': 4,
+    'catalog_size': 14,
+    'n_design_options': 3,
+}
+
+SWEEPS = {
+    'n_samples': [100, 200, 400, 800, 1600],
+    'n_layers': [5, 11, 25, 50],
+    'materials_per_layer': [2, 4, 8, 16],
+    'catalog_size': [14, 50, 200, 500],
+    'n_design_options': [1, 3, 10, 30],
+}
+
+
+def reference_engine(calculator, n_samples, sampling_method="monte_carlo"):
+    """Reference implementation: object-based sampling loop followed by `collect_aggregated_data`."""
+    results = calculator.calculate_do_probabilistic_impact(n_samples=n_samples, sampling_method=sampling_method)
+    return calculator.collect_aggregated_data(results)
+
+
+def result_tensor_engine(calculator, n_samples, sampling_method="monte_carlo"):
+    """Object-based sampling loop followed by the single-pass `collect_result_tensor` aggregation."""
+    results = calculator.calculate_do_probabilistic_impact(n_samples=n_samples, sampling_method=sampling_method)
+    return calculator.collect_result_tensor(results).to_aggregated_data()
+
+
+def vectorized_engine(calculator, n_samples, sampling_method="monte_carlo"):
+    """Linear model evaluated as one array operation per design option (calculator.linear_model)."""
+    return calculator.calculate_vectorized_impact(n_samples=n_samples, sampling_method=sampling_method).to_aggregated_data()
+
+
+def parallel_engine(calculator, n_samples, sampling_method="monte_carlo"):
+    """Linear model evaluated over sample slices in worker processes with shared memory (calculator.parallel)."""
+    return calculate_parallel_impact(calculator, n_samples, sampling_method).to_aggregated_data()
+
+
+## engines that produce the aggregated data of `collect_aggregated_data` for a calculator, sample count and sampling method
+ENGINES = {
+    'reference': reference_engine,
+    'result_tensor': result_tensor_engine,
+    'vectorized': vectorized_engine,
+    'parallel': parallel_engine,
+}
+
+
+def _measure(records, phase, func, n_samples, trace_memory):
+    """Run `func` as a named phase and append wall time, throughput and peak memory to `records`."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    wall_time = time.perf_counter() - start
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    records.append({
+        'phase': phase,
+        'wall_time_s': wall_time,
+        'samples_per_s': n_samples / wall_time if n_samples and wall_time > 0 else None,
+        'peak_memory_mb': peak_memory / 1024**2 if peak_memory is not None else None,
+    })
+    return result
+
+
+def run_workload(config, trace_memory=False, seed=0):
+    """
+    Generate a synthetic workload and run all phases on it once.
+
+    Parameters:
+    - config: Dictionary with the keys of BASE_CONFIG.
+    - trace_memory: Trace peak memory per phase with tracemalloc (this slows the phases down).
+    - seed: Seed for the workload generator and the OpenTURNS random generator.
+
+    Returns:
+    - records: List of dictionaries with phase, wall time, samples/second and peak memory.
+    """
+    n_samples = config['n_samples']
+    records = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        layers_path, emission_factors_path, design_options_path = write_synthetic_inputs(
+            tmp_dir,
+            n_layers=config['n_layers'],
+            materials_per_layer=config['materials_per_layer'],
+            catalog_size=config['catalog_size'],
+            n_design_options=config['n_design_options'],
+            seed=seed
+        )
+        layers_data, emission_factors_data, design_options_data = _measure(
+            records, 'load', lambda: load_data(layers_path, [emission_factors_path], design_options_path), None, trace_memory
+        )
+
+    def create_instances():
+        layers = create_layers(layers_data)
+        return layers, create_emission_factors(emission_factors_data[0]), create_design_options(layers, design_options_data)
+    layers, emission_factors, design_options = _measure(records, 'create_instances', create_instances, None, trace_memory)
+
+    def deterministic():
+        calculator = LCACalculator(layers, emission_factors)
+        calculator.calculate_stage_impacts()
+        return calculator.calculate_deterministic_lca_design_option(calculator.get_results(), design_options, length_road=LENGTH_ROAD)
+    _measure(records, 'deterministic', deterministic, None, trace_memory)
+
+    ot.RandomGenerator.SetSeed(seed)
+    layer_calculator = ProbabilisticLCACalculator(layers, emission_factors)
+    _measure(records, 'layer_probabilistic', lambda: layer_calculator.calculate_probabilistic_impact(n_samples=n_samples), n_samples, trace_memory)
+
+    calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=emission_factors, design_options=design_options, length_road=LENGTH_ROAD)
+    do_results = _measure(records, 'do_probabilistic', lambda: calculator.calculate_do_probabilistic_impact(n_samples=n_samples), n_samples, trace_memory)
+    aggregated_data = _measure(records, 'collect_aggregated_data', lambda: calculator.collect_aggregated_data(do_results), n_samples, trace_memory)
+    _measure(records, 'collect_overall_aggregated_data', lambda: calculator.collect_overall_aggregated_data(do_results), n_samples, trace_memory)
+    result_tensor = _measure(records, 'collect_result_tensor', lambda: calculator.collect_result_tensor(do_results), n_samples, trace_memory)
+    _measure(records, 'vectorized_probabilistic', lambda: calculator.calculate_vectorized_impact(n_samples=n_samples), n_samples, trace_memory)
+    _measure(records, 'parallel_probabilistic', lambda: calculate_parallel_impact(calculator, n_samples), n_samples, trace_memory)
+    _measure(records, 'statistics', lambda: calculate_statistical_parameters_life_cycle_stages(aggregated_data), n_samples, trace_memory)
+    _measure(records, 'batched_statistics', lambda: calculate_statistical_table_life_cycle_stages(result_tensor), n_samples, trace_memory)
+
+    return records
+
+
+def run_sweep(sweeps=None, base_config=None, trace_memory=True, seed=0):
+    """
+    Sweep each workload dimension separately around the base configuration.
+
+    Wall times are measured in a run without memory tracing; peak memory (if requested) comes from a second, traced run.
+
+    Parameters:
+    - sweeps: Dictionary mapping a dimension to the list of values to run (default: SWEEPS).
+    - base_config: Configuration for the dimensions that are not swept (default: BASE_CONFIG).
+    - trace_memory: Also measure peak memory per phase.
+    - seed: Seed for the workloads and the sampling.
+
+    Returns:
+    - df: Pandas DataFrame with one row per dimension, value and phase.
+    """
+    sweeps = sweeps or SWEEPS
+    base_config = base_config or BASE_CONFIG
+    rows = []
+
+    for dimension, values in sweeps.items():
+        for value in values:
+            config = dict(base_config, **{dimension: value})
+            print(f"Benchmark: {dimension}={value}")
+            records = run_workload(config, trace_memory=False, seed=seed)
+            if trace_memory:
+                traced_records = run_workload(config, trace_memory=True, seed=seed)
+                for record, traced_record in zip(records, traced_records):
+                    record['peak_memory_mb'] = traced_record['peak_memory_mb']
+            for record in records:
+                rows.append(dict(config, dimension=dimension, value=value, **record))
+
+    return pd.DataFrame(rows)
+
+
+def check_engine_equivalence(engine, layers, emission_factors, design_options, n_samples=100, seed=0, rtol=1e-9, atol=1e-9):
+    """
+    Check that an engine reproduces the aggregated results of the reference implementation for the same seed.
+
+    Parameters:
+    - engine: Callable (calculator, n_samples, sampling_method) -> aggregated data as returned by `collect_aggregated_data`.
+    - layers, emission_factors, design_options: Inputs of the calculator.
+    - n_samples: Number of samples.
+    - seed: Seed of the OpenTURNS random generator used for both runs.
+    - rtol, atol: Tolerances passed to numpy.allclose.
+
+    Returns:
+    - df: Pandas DataFrame with the maximum absolute difference and the verdict per design option, stage and category.
+    """
+    outputs = []
+    for candidate in (reference_engine, engine):
+        calculator = DesignOptionProbabilisticLCACalculator(layers=layers, emission_factors=emission_factors, design_options=design_options, length_road=LENGTH_ROAD)
+        ot.RandomGenerator.SetSeed(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs.append(candidate(calculator, n_samples))
+    reference, candidate = outputs
+
+    records = []
+    for design_option, stages in reference.items():
+        for stage, categories in stages.items():
+            for category, values in categories.items():
+                expected = np.asarray(values)
+                actual = np.asarray(candidate[design_option][stage][category])
+                same_shape = expected.shape == actual.shape
+                records.append({
+                    'Design Option': design_option,
+                    'Life Cycle Stage': stage,
+                    'Impact Category': category,
+                    'Max Abs Difference': float(np.max(np.abs(expected - actual))) if same_shape else np.inf,
+                    'Equivalent': bool(same_shape and np.allclose(actual, expected, rtol=rtol, atol=atol))
+                })
+
+    return pd.DataFrame(records)
+
+
+def check_all_engines(n_samples=100, seed=0, **workload):
+    """
+    Run `check_engine_equivalence` for every registered engine on a synthetic workload.
+
+    Returns:
+    - summary: Dictionary mapping engine name to True if all series match the reference.
+    """
+    layers_data, emission_factors_data, design_options_data = generate_synthetic_inputs(seed=seed, **workload)
+    layers = create_layers(layers_data)
+    emission_factors = create_emission_factors(emission_factors_data)
+    design_options = create_design_options(layers, design_options_data)
+
+    summary = {}
+    for name, engine in ENGINES.items():
+        df = check_engine_equivalence(engine, layers, emission_factors, design_options, n_samples=n_samples, seed=seed)
+        summary[name] = bool(df['Equivalent'].all())
+        print(f"Engine '{name}': {'equivalent' if summary[name] else 'NOT equivalent'} (max abs difference {df['Max Abs Difference'].max():.3e})")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the uqlca calculators.")
+    parser.add_argument('--dimensions', nargs='+', choices=list(SWEEPS), default=list(SWEEPS), help="Workload dimensions to sweep.")
+    parser.add_argument('--n-samples', type=int, default=BASE_CONFIG['n_samples'], help="Number of samples for the sweeps over the other dimensions.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run for peak memory.")
+    parser.add_argument('--check-equivalence', action='store_true', help="Verify all registered engines against the reference implementation.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the results to this CSV file.")
+    args = parser.parse_args()
+
+    if args.check_equivalence:
+        check_all_engines(seed=args.seed)
+
+    base_config = dict(BASE_CONFIG, n_samples=args.n_samples)
+    df = run_sweep({dimension: SWEEPS[dimension] for dimension in args.dimensions}, base_config, trace_memory=not args.no_memory, seed=args.seed)
+    print(df[['dimension', 'value', 'phase', 'wall_time_s', 'samples_per_s', 'peak_memory_mb']].to_string(index=False))
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"CSV saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+""" generator for synthetic layers / background / design option inputs used by the benchmarks """
+import json
+import os
+import numpy as np
+
+## energy carriers that the stage models look up by name (A2, A4, A5 use diesel; A3 uses the layer energy type)
+ENERGY_CARRIERS = ['diesel', 'electricity', 'thermal_energy']
+PRODUCTIVITY_UNITS = ['t/h', 'm2/h', 'm3/h']
+COV_CHOICES = [0.05, 0.08, 0.1, 0.12, 0.15, 0.3]
+
+
+def generate_emission_factors_data(catalog_size: int, rng: np.random.Generator):
+    """
+    Generate a background database in the format of the `*_background_data.json` files.
+
+    Parameters:
+    - catalog_size: Total number of emission factors (including the energy carriers).
+    - rng: NumPy random generator.
+
+    Returns:
+    - emission_factors_data: Dictionary with the key 'emission_factors'.
+    """
+    if catalog_size < len(ENERGY_CARRIERS) + 1:
+        raise ValueError(f"catalog_size must be at least {len(ENERGY_CARRIERS) + 1}")
+
+    emission_factors = []
+    names = ENERGY_CARRIERS + [f"material_{i:03d}" for i in range(catalog_size - len(ENERGY_CARRIERS))]
+    for name in names:
+        mean_total = float(rng.lognormal(mean=3.0, sigma=1.5))
+        mean_biogenic = float(rng.normal(0, 0.02 * mean_total))  # negative values exercise the normal branch
+        mean_luluc = float(rng.uniform(0, 0.005 * mean_total))
+        emission_factors.append({
+            "material": name,
+            "mean_total": mean_total,
+            "mean_fossil": mean_total - mean_biogenic - mean_luluc,
+            "mean_biogenic": mean_biogenic,
+            "mean_luluc": mean_luluc,
+            "cov": float(rng.choice(COV_CHOICES)),
+            "unit": "kgCO2e/kWh" if name in ENERGY_CARRIERS else "kgCO2e/t"
+        })
+
+    return {"emission_factors": emission_factors}
+
+
+def generate_layers_data(n_layers: int, materials_per_layer: int, material_names: list, rng: np.random.Generator):
+    """
+    Generate layers in the format of `layers.json`.
+
+    Parameters:
+    - n_layers: Number of layers.
+    - materials_per_layer: Number of materials in each layer.
+    - material_names: Names of the non-energy materials of the catalog.
+    - rng: NumPy random generator.
+
+    Returns:
+    - layers_data: Dictionary with the key 'layers'.
+    """
+    layers = []
+    for i in range(n_layers):
+        compositions = rng.dirichlet(np.ones(materials_per_layer))
+        materials = [
+            {
+                "name": str(rng.choice(material_names)),
+                "composition": float(composition),
+                "transport_distance_a2": float(rng.uniform(10, 300)),
+                "mass_a2": float(composition * 1000)
+            } for composition in compositions
+        ]
+        construction_a5 = [
+            {
+                "name": f"equipment_{j}",
+                "number": int(rng.integers(1, 4)),
+                "productivity": float(rng.uniform(100, 2000)),
+                "productivity_unit": str(rng.choice(PRODUCTIVITY_UNITS)),
+                "energy_type": str(rng.choice(['diesel', 'electricity'])),
+                "energy": float(rng.uniform(5, 40)),
+                "energy_unit": "L/h"
+            } for j in range(int(rng.integers(1, 4)))
+        ]
+        layers.append({
+            "name": f"layer_{i:03d}",
+            "abbreviation": f"l{i:03d}",
+            "materials": materials,
+            "energy_used_a3": str(rng.choice(['thermal_energy', 'electricity'])),
+            "energy_consumption_a3": float(rng.uniform(0, 100)),
+            "transport_distance_a4": float(rng.uniform(10, 500)),
+            "mass_a4": 1,
+            "construction_a5": construction_a5,
+            "quantity_a5_ton": 1,
+            "quantity_a5_m2": 1,
+            "density": None,
+            "thickness": None
+        })
+
+    return {"layers": layers}
+
+
+def generate_design_options_data(n_design_options: int, layers_per_design: int, layer_names: list, rng: np.random.Generator):
+    """
+    Generate design options in the format of `design_options.json`.
+
+    Parameters:
+    - n_design_options: Number of design options.
+    - layers_per_design: Number of layers in each design option.
+    - layer_names: Names of the available layers.
+    - rng: NumPy random generator.
+
+    Returns:
+    - design_options_data: Dictionary with the key 'design_options'.
+    """
+    design_options = []
+    for i in range(n_design_options):
+        selected = rng.choice(layer_names, size=min(layers_per_design, len(layer_names)), replace=False)
+        design_options.append({
+            "name": f"design_{i:03d}",
+            "layer_type": [
+                {
+                    "name": str(name),
+                    "thickness": float(rng.uniform(0.01, 0.4)),
+                    "quantity": 1,
+                    "density": float(rng.uniform(1.4, 2.6))
+                } for name in selected
+            ]
+        })
+
+    return {"design_options": design_options}
+
+
+def generate_synthetic_inputs(n_layers=11, materials_per_layer=4, catalog_size=14, n_design_options=3, layers_per_design=5, seed=0):
+    """
+    Generate a complete synthetic workload. The default sizes mirror the bundled `data/` inputs.
+
+    Parameters:
+    - n_layers: Number of layers in `layers.json`.
+    - materials_per_layer: Number of materials in each layer.
+    - catalog_size: Number of emission factors in the background database.
+    - n_design_options: Number of design options.
+    - layers_per_design: Number of layers in each design option.
+    - seed: Seed for the generator.
+
+    Returns:
+    - layers_data, emission_factors_data, design_options_data: Dictionaries as returned by `load_data`
+      (with a single background database).
+    """
+    rng = np.random.default_rng(seed)
+    emission_factors_data = generate_emission_factors_data(catalog_size, rng)
+    material_names = [ef["material"] for ef in emission_factors_data["emission_factors"] if ef["material"] not in ENERGY_CARRIERS]
+    layers_data = generate_layers_data(n_layers, materials_per_layer, material_names, rng)
+    layer_names = [layer["name"] for layer in layers_data["layers"]]
+    design_options_data = generate_design_options_data(n_design_options, layers_per_design, layer_names, rng)
+    return layers_data, emission_factors_data, design_options_data
+
+
+def write_synthetic_inputs(output_dir, **kwargs):
+    """
+    Write a synthetic workload to JSON files so that it can be read with `load_data`.
+
+    Parameters:
+    - output_dir: Directory the files are written to.
+    - kwargs: Passed to `generate_synthetic_inputs`.
+
+    Returns:
+    - layers_path, emission_factors_path, design_options_path: Paths of the written files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    layers_data, emission_factors_data, design_options_data = generate_synthetic_inputs(**kwargs)
+    paths = (
+        os.path.join(output_dir, "layers.json"),
+        os.path.join(output_dir, "synthetic_background_data.json"),
+        os.path.join(output_dir, "design_options.json"),
+    )
+    for path, data in zip(paths, (layers_data, emission_factors_data, design_options_data)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+    return paths
@@ -0,0 +1,299 @@
+import numpy as np
+import openturns as ot
+import pandas as pd
+from typing import List, Optional
+from models.models import Layer, EmissionFactor, DesignOption
+from models.results import IMPACT_CATEGORIES, STAGES
+from calculator.do_probabilistic_lca_calculator import DesignOptionProbabilisticLCACalculator
+from general.statistical_results import calculate_batched_statistics, PERCENTILES
+from calculator.reweighting import weighted_quantiles
+from general.metrics import RunMetrics
+
+class AnalyticalLCACalculator(DesignOptionProbabilisticLCACalculator):
+    """
+    Closed-form moments of the design option results, without sampling.
+
+    Every stage total is a weighted sum of independently sampled emission factors (see calculator.linear_model),
+    and `get_lognormal_distribution` matches the mean and the COV of every emission factor exactly, so
+        mean = sum_k a_k * mean_k        variance = sum_k a_k^2 * (cov_k * mean_k)^2
+    The sampling methods of the parent class remain available, e.g. for `compare_with_samples`.
+    """
+
+    def __init__(self, layers: List[Layer], emission_factors: List[EmissionFactor], design_options: List[DesignOption], length_road: float, metrics: Optional[RunMetrics] = None):
+        super().__init__(layers, emission_factors, design_options, length_road, metrics)
+        self._model = None
+
+    @property
+    def model(self):
+        """Linear model of the design options, built once per calculator."""
+        if self._model is None:
+            self._model = self.get_linear_model()
+        return self._model
+
+    def _output_moments(self):
+        """Labels, means and variances (output, impact category) of the outputs of LinearLCAModel.output_coefficients."""
+        coefficients, labels = self.model.output_coefficients()
+        means, variances = self.get_emission_factor_moments()
+        return labels, coefficients @ means, coefficients ** 2 @ variances
+
+    def calculate_moments(self) -> pd.DataFrame:
+        """
+        Exact mean, variance, standard deviation and COV for each design option, life cycle stage
+        (and the total over all stages) and impact category.
+
+        Returns:
+        - df: Pandas DataFrame with the columns 'Design Option', 'Life Cycle Stage', 'Impact Category',
+          'Mean', 'Variance', 'STD' and 'COV'.
+        """
+        with self._phase("analytical_moments", items=len(self.model.design_options) * (len(STAGES) + 1) * len(IMPACT_CATEGORIES)):
+            labels, output_means, output_variances = self._output_moments()
+            output_std = np.sqrt(output_variances)
+            output_cov = np.divide(output_std, np.abs(output_means), out=np.zeros_like(output_std), where=output_means != 0)
+
+            records = []
+            for j, (design_option, stage) in enumerate(labels):
+                for c, category in enumerate(IMPACT_CATEGORIES):
+                    records.append({
+                        'Design Option': design_option,
+                        'Life Cycle Stage': stage,
+                        'Impact Category': category,
+                        'Mean': output_means[j, c],
+                        'Variance': output_variances[j, c],
+                        'STD': output_std[j, c],
+                        'COV': output_cov[j, c],
+                    })
+        return pd.DataFrame(records)
+
+    def calculate_variance_contributions(self) -> pd.DataFrame:
+        """
+        Contribution of every emission factor to the variance of each design option, stage and impact category.
+        For the linear model with independent inputs the 'Variance Share' equals the first-order Sobol index.
+
+        Returns:
+        - df: Pandas DataFrame with one row per design option, life cycle stage, impact category and emission factor,
+          with the 'Variance Contribution' and the 'Variance Share' of the output variance.
+        """
+        coefficients, labels = self.model.output_coefficients()
+        with self._phase("analytical_variance_contributions", items=len(labels) * len(IMPACT_CATEGORIES)):
+            _, variances = self.get_emission_factor_moments()
+            ## contributions[j, k, c] = a_jk^2 * var_kc
+            contributions = coefficients[:, :, np.newaxis] ** 2 * variances[np.newaxis, :, :]
+            totals = contributions.sum(axis=1, keepdims=True)
+            shares = np.divide(contributions, totals, out=np.zeros_like(contributions), where=totals > 0)
+
+            records = []
+            for j, (design_option, stage) in enumerate(labels):
+                for c, category in enumerate(IMPACT_CATEGORIES):
+                    for k, emission_factor in enumerate(self.model.emission_factors):
+                        records.append({
+                            'Design Option': design_option,
+                            'Life Cycle Stage': stage,
+                            'Impact Category': category,
+                            'Emission Factor': emission_factor,
+                            'Variance Contribution': contributions[j, k, c],
+                            'Variance Share': shares[j, k, c],
+                        })
+        return pd.DataFrame(records)
+
+    def compare_with_samples(self, result_tensor) -> pd.DataFrame:
+        """
+        Check a sampled run against the exact moments.
+
+        Parameters:
+        - result_tensor: ResultTensor of a probabilistic run with the same inputs (e.g. `calculate_vectorized_impact`).
+
+        Returns:
+        - df: The table of `calculate_moments` with the 'Sampled Mean' and 'Sampled STD', their relative errors and
+          the 'Mean Z-Score' (error of the sampled mean in standard errors, |z| > 3 points to a defect in the engine).
+        """
+        df = self.calculate_moments()
+        sampled = self._sampled_outputs(result_tensor)
+        sampled_mean = sampled.mean(axis=-1).ravel()
+        sampled_std = sampled.std(axis=-1, ddof=1).ravel()
+
+        df['Sampled Mean'] = sampled_mean
+        df['Sampled STD'] = sampled_std
+        df['Mean Relative Error'] = (sampled_mean - df['Mean']) / df['Mean'].abs().replace(0, np.nan)
+        df['STD Relative Error'] = (sampled_std - df['STD']) / df['STD'].replace(0, np.nan)
+        df['Mean Z-Score'] = (sampled_mean - df['Mean']) / (df['STD'] / np.sqrt(result_tensor.n_samples)).replace(0, np.nan)
+        return df
+
+    def _output_third_cumulants(self) -> np.ndarray:
+        """
+        Third cumulant (output, impact category) of the outputs of LinearLCAModel.output_coefficients: cumulants of
+        independent terms add, kappa3 = sum_k a_k^3 * kappa3_k, with kappa3 = (3 + cov^2) * cov * std^3 for a
+        lognormal and 0 for a normal emission factor.
+        """
+        coefficients, _ = self.model.output_coefficients()
+        means, variances = self.get_emission_factor_moments()
+        covs = np.array([ef.cov for ef in self.emission_factors], dtype=float)[:, np.newaxis]
+        kappa3 = np.where(means > 0, (3 + covs ** 2) * covs * variances ** 1.5, 0.0)
+        return coefficients ** 3 @ kappa3
+
+    def calculate_control_variate_statistics(self, result_tensor) -> pd.DataFrame:
+        """
+        Control-variate estimates of the statistics of a sampled run.
+
+        The controls of every output Y are the standardized powers u, u^2 - 1 and u^3 - skewness of u = (Y - mean) / std,
+        whose expectations (0) follow from the exact mean, variance and third cumulant of the linear model. The
+        samples get the regression weights of these controls (sum 1, weighted control means exactly 0), so the mean and
+        STD reproduce the exact moments and the percentiles are weighted quantiles with a lower variance.
+
+        Parameters:
+        - result_tensor: ResultTensor of a probabilistic run with the same inputs.
+
+        Returns:
+        - df: Pandas DataFrame with one row per design option, life cycle stage (and total) and impact category,
+          the control-variate 'Mean', 'STD', 'COV' and percentiles, the plain 'Sampled <percentile>' and the
+          variance-reduction factor '<percentile> VRF' = 1 / (1 - R^2) of the regression of the percentile indicator
+          on the controls (the number of plain samples one controlled sample is worth).
+        """
+        df = self.calculate_moments()[['Design Option', 'Life Cycle Stage', 'Impact Category']]
+        _, output_means, output_variances = self._output_moments()
+        sampled = self._sampled_outputs(result_tensor)          # (output, sample) in the row order of calculate_moments
+        n_samples = sampled.shape[-1]
+        with self._phase("control_variate_statistics", n_samples=n_samples * len(sampled), items=len(sampled)):
+            mean, std = output_means.ravel(), np.sqrt(output_variances).ravel()
+            skewness = np.divide(self._output_third_cumulants().ravel(), std ** 3, out=np.zeros_like(std), where=std > 0)
+            u = np.divide(sampled - mean[:, np.newaxis], std[:, np.newaxis], out=np.zeros_like(sampled), where=std[:, np.newaxis] > 0)
+            controls = np.stack([u, u ** 2 - 1, u ** 3 - skewness[:, np.newaxis]], axis=-1)      # (output, sample, control), expectation 0
+            control_means = controls.mean(axis=1)
+            centered = controls - control_means[:, np.newaxis, :]
+            ## outputs without variance have constant controls, pinv then gives uniform weights
+            precision = np.linalg.pinv(np.einsum('jni,jnk->jik', centered, centered) / n_samples)
+            weights = (1 - np.einsum('jni,ji->jn', centered, np.einsum('jik,jk->ji', precision, control_means))) / n_samples
+
+            cv_mean = (weights * sampled).sum(axis=-1)
+            cv_std = np.sqrt(np.maximum((weights * (sampled - cv_mean[:, np.newaxis]) ** 2).sum(axis=-1), 0.0))
+            order = np.argsort(sampled, axis=-1)
+            quantiles = weighted_quantiles(np.take_along_axis(sampled, order, -1), np.take_along_axis(weights, order, -1), [q / 100 for q in PERCENTILES.values()])
+            sampled_statistics = calculate_batched_statistics(sampled)
+
+            df = df.assign(Mean=cv_mean, STD=cv_std, COV=np.divide(cv_std, np.abs(cv_mean), out=np.zeros_like(cv_std), where=cv_mean != 0))
+            for name, quantile in zip(PERCENTILES, quantiles):
+                df[name] = quantile
+            for name, quantile in zip(PERCENTILES, quantiles):
+                indicator = (sampled <= quantile[:, np.newaxis]).astype(float)
+                indicator_variance = indicator.var(axis=-1)
+                covariance = np.einsum('jni,jn->ji', centered, indicator - indicator.mean(axis=-1, keepdims=True)) / n_samples
+                r_squared = np.divide(np.einsum('ji,jik,jk->j', covariance, precision, covariance), indicator_variance, out=np.zeros_like(indicator_variance), where=indicator_variance > 0)
+                df[f'Sampled {name}'] = sampled_statistics[name]
+                df[f'{name} VRF'] = 1 / (1 - np.clip(r_squared, 0.0, 1 - 1e-12))
+        return df
+
+    @staticmethod
+    def _sampled_outputs(result_tensor) -> np.ndarray:
+        """Stage totals and totals over all stages of a ResultTensor, (design option, stage + total, category, sample),
+        flattened in the row order of `calculate_moments`."""
+        sampled = result_tensor.stage_and_overall_totals()
+        return sampled.reshape(-1, sampled.shape[-1])
+
+    ## approximate output distributions (sum of lognormals)
+
+    def _approximation_types(self, output_means, output_variances) -> np.ndarray:
+        """
+        Approximation per output and impact category: 'lognormal' if all uncertain terms are lognormal emission factors
+        with positive weights (Fenton-Wilkinson), 'normal' for sums with normal (negative mean) emission factors or
+        negative weights, and 'constant' for outputs without variance.
+        """
+        coefficients, _ = self.model.output_coefficients()
+        means, variances = self.get_emission_factor_moments()
+        ## term (output, emission factor, category) that is not a positively weighted lognormal
+        uncertain = (coefficients[:, :, np.newaxis] != 0) & (variances[np.newaxis, :, :] > 0)
+        non_lognormal = uncertain & ((coefficients[:, :, np.newaxis] < 0) | (means[np.newaxis, :, :] <= 0))
+        types = np.where(non_lognormal.any(axis=1) | (output_means <= 0), 'normal', 'lognormal')
+        return np.where(output_variances > 0, types, 'constant')
+
+    def get_approximate_distributions(self) -> dict:
+        """
+        Approximate distribution of every design option, life cycle stage (and total) and impact category.
+
+        Sums of lognormal emission factors are approximated by the lognormal with the exact mean and variance of the sum
+        (Fenton-Wilkinson moment matching, with `get_lognormal_distribution`), other sums by a normal distribution.
+
+        Returns:
+        - distributions: Dictionary mapping (design option, life cycle stage, impact category) to an OpenTURNS distribution.
+        """
+        labels, output_means, output_variances = self._output_moments()
+        types = self._approximation_types(output_means, output_variances)
+        distributions = {}
+        for j, (design_option, stage) in enumerate(labels):
+            for c, category in enumerate(IMPACT_CATEGORIES):
+                mean, std = output_means[j, c], np.sqrt(output_variances[j, c])
+                if types[j, c] == 'lognormal':
+                    distribution = self.get_lognormal_distribution(mean, std / mean)
+                elif types[j, c] == 'normal':
+                    distribution = ot.Normal(mean, std)
+                else:
+                    distribution = ot.Dirac(mean)
+                distributions[(design_option, stage, category)] = distribution
+        return distributions
+
+    def approximate_quantile(self, probabilities, design_option: Optional[str] = None, stage: Optional[str] = None, category: Optional[str] = None) -> pd.DataFrame:
+        """
+        Quantile function of the approximate distributions.
+
+        Parameters:
+        - probabilities: Probability or list of probabilities, e.g. [0.5, 0.95].
+        - design_option, stage, category: Optional filters (default: all).
+
+        Returns:
+        - df: Pandas DataFrame with one row per design option, life cycle stage and impact category and
+          one column per probability.
+        """
+        probabilities = np.atleast_1d(probabilities).astype(float)
+        labels, output_means, output_variances = self._output_moments()
+        types = self._approximation_types(output_means, output_variances)
+        output_std = np.sqrt(output_variances)
+
+        ## vectorized quantiles: lognormal exp(mu + sigma * z), normal mean + std * z
+        z = np.array([ot.Normal().computeQuantile(p)[0] for p in probabilities])
+        positive_means = np.where(output_means > 0, output_means, 1.0)
+        sigma = np.sqrt(np.log1p(output_variances / positive_means**2))
+        mu = np.log(positive_means) - 0.5 * sigma**2
+        lognormal_quantiles = np.exp(mu[..., np.newaxis] + sigma[..., np.newaxis] * z)
+        normal_quantiles = output_means[..., np.newaxis] + output_std[..., np.newaxis] * z
+        quantiles = np.where((types == 'lognormal')[..., np.newaxis], lognormal_quantiles, normal_quantiles)
+
+        records = []
+        for j, (label_design_option, label_stage) in enumerate(labels):
+            for c, label_category in enumerate(IMPACT_CATEGORIES):
+                if (design_option and label_design_option != design_option) or (stage and label_stage != stage) or (category and label_category != category):
+                    continue
+                record = {'Design Option': label_design_option, 'Life Cycle Stage': label_stage, 'Impact Category': label_category, 'Approximation': str(types[j, c])}
+                record.update({float(p): quantiles[j, c, i] for i, p in enumerate(probabilities)})
+                records.append(record)
+        return pd.DataFrame(records)
+
+    def calculate_approximate_statistics(self) -> pd.DataFrame:
+        """
+        Mean, STD, COV, median, quartiles and 95th percentile of the approximate distributions, without sampling.
+
+        Returns:
+        - df: Pandas DataFrame with one row per design option, life cycle stage (and total) and impact category.
+        """
+        with self._phase("approximate_statistics", items=len(self.model.design_options) * (len(STAGES) + 1) * len(IMPACT_CATEGORIES)):
+            df = self.calculate_moments().drop(columns='Variance')
+            quantiles = self.approximate_quantile([q / 100 for q in PERCENTILES.values()])
+            df['Approximation'] = quantiles['Approximation']
+            for i, name in enumerate(PERCENTILES):
+                df[name] = quantiles.iloc[:, 4 + i]
+        return df
+
+    def compare_approximation_with_samples(self, result_tensor) -> pd.DataFrame:
+        """
+        Approximation error of the percentiles against a sampled run.
+
+        Parameters:
+        - result_tensor: ResultTensor of a probabilistic run with the same inputs.
+
+        Returns:
+        - df: The table of `calculate_approximate_statistics` with the 'Sampled <percentile>' and the relative error
+          '<percentile> Relative Error' of each percentile (Q1, Median, Q3, 95th Percentile).
+        """
+        df = self.calculate_approximate_statistics()
+        sampled_statistics = calculate_batched_statistics(self._sampled_outputs(result_tensor))
+        for name in PERCENTILES:
+            df[f'Sampled {name}'] = sampled_statistics[name]
+            df[f'{name} Relative Error'] = (df[name] - df[f'Sampled {name}']) / df[f'Sampled {name}'].abs().replace(0, np.nan)
+        return df
@@ -0,0 +1,241 @@
+""" per-material database selection: score every mix of background databases (e.g. bitumen from EPD, cement from the
+national database, diesel from ecoinvent) without a probabilistic run per mix
+
+All stage models are linear in the emission factors (calculator.linear_model), and the coefficient of a material does
+not depend on the database it is taken from. The selected output of a mix is therefore
+    Y[d, n] = sum_k coefficients[d, k] * samples_{database(k)}[n, k]
+Every (material, database) option is sampled once, its contributions coefficients[d, k] * samples[n, k] are stored
+as one row of an (option, design option * sample) matrix, and a batch of mixes becomes one matrix product of their
+one-hot option selection with this matrix. All mixes and design options share the same samples per option, so the
+differences between mixes only come from the swapped materials and the design option ranking is paired.
+
+Options of a material with identical distributions in several databases (e.g. diesel) are merged into one option
+labelled with all their database names, so they do not multiply the number of mixes.
+
+Run from the repository root, e.g.
+    python -m calculator.database_mix --samples 2000 --csv results/database_mix.csv
+"""
+import argparse
+import contextlib
+import io
+import itertools
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from calculator.do_probabilistic_lca_calculator import DesignOptionProbabilisticLCACalculator
+from calculator.linear_model import build_linear_model
+from calculator.sampling import SAMPLING_METHODS
+from calculator.shards import LAYERS_PATH, DESIGN_OPTIONS_PATH, DATABASES, LENGTH_ROAD
+from general.generate_designs import create_layers, create_design_options, create_emission_factors
+from general.load_input import load_data
+from general.metrics import RunMetrics
+from models.models import Layer, EmissionFactor, DesignOption
+from models.results import STAGES, IMPACT_CATEGORIES, TOTAL_STAGE
+
+
+def _distribution_key(ef: EmissionFactor):
+    return (ef.mean_total, ef.mean_fossil, ef.mean_biogenic, ef.mean_luluc, ef.cov)
+
+
+class DatabaseMixExplorer:
+    """
+    Scores mixes of background databases per material for one life cycle stage (or the total) and impact category.
+
+    Parameters:
+    - layers: List of Layer instances.
+    - design_options: List of DesignOption instances.
+    - emission_factor_sets: Dictionary mapping a database name to its list of EmissionFactor instances.
+    - length_road: Length of the road the results are normalized to.
+    - n_samples: Number of samples per (material, database) option.
+    - sampling_method: One of calculator.sampling.SAMPLING_METHODS.
+    - stage: Life cycle stage of the scores, or TOTAL_STAGE for the totals over all stages.
+    - category: Impact category of the scores.
+    - metrics: Optional general.metrics.RunMetrics for the phase timers.
+    """
+
+    def __init__(self, layers: List[Layer], design_options: List[DesignOption], emission_factor_sets: Dict[str, List[EmissionFactor]], length_road: float, n_samples: int = 2000, sampling_method: str = "monte_carlo", stage: str = TOTAL_STAGE, category: str = "gwp_total", metrics: Optional[RunMetrics] = None):
+        if stage != TOTAL_STAGE and stage not in STAGES:
+            raise ValueError(f"Unknown life cycle stage: {stage}")
+        if category not in IMPACT_CATEGORIES:
+            raise ValueError(f"Unknown impact category: {category}")
+        self.databases = list(emission_factor_sets)
+        self.stage = stage
+        self.category = category
+        self.n_samples = n_samples
+        self.metrics = metrics if metrics is not None else RunMetrics()
+
+        ## one emission factor column per material (first occurrence over the databases) for the coefficients
+        catalog = {}
+        for emission_factors in emission_factor_sets.values():
+            for ef in emission_factors:
+                catalog.setdefault(ef.material, ef)
+        self.materials = list(catalog)
+        model = build_linear_model(layers, list(catalog.values()), design_options, length_road)
+        self.design_options = model.design_options
+        if stage == TOTAL_STAGE:
+            coefficients = model.overall_coefficients()                        # (design option, material)
+        else:
+            coefficients = model.stage_coefficients()[:, STAGES.index(stage)]
+        ## materials that do not enter the selected output (coefficient 0 in every design option)
+        self.unused = [material for k, material in enumerate(self.materials) if not np.any(coefficients[:, k])]
+
+        ## options per material: the databases that contain it, merged where the distributions are identical
+        self.options = {material: [] for material in self.materials}           # material -> [(label, option index)]
+        contributions, means, keys = [], [], []
+        c = IMPACT_CATEGORIES.index(category)
+        for db_name, emission_factors in emission_factor_sets.items():
+            calculator = DesignOptionProbabilisticLCACalculator(layers, emission_factors, design_options, length_road, self.metrics)
+            samples = calculator.sample_emission_factors(n_samples, sampling_method)[:, :, c]
+            ef_means, _ = calculator.get_emission_factor_moments()
+            for column, ef in enumerate(emission_factors):
+                if any(ef.material == other.material for other in emission_factors[:column]):
+                    continue        # the stage models use the first emission factor of a material
+                options = self.options[ef.material]
+                duplicate = next((i for i, (_, option) in enumerate(options) if keys[option] == _distribution_key(ef)), None)
+                if duplicate is not None:
+                    label, option = options[duplicate]
+                    options[duplicate] = (f"{label}/{db_name}", option)
+                    continue
+                k = self.materials.index(ef.material)
+                options.append((db_name, len(contributions)))
+                keys.append(_distribution_key(ef))
+                contributions.append(coefficients[:, k, np.newaxis] * samples[np.newaxis, :, column])
+                means.append(coefficients[:, k] * ef_means[column, c])
+        self._contributions = np.stack(contributions).reshape(len(contributions), -1)   # (option, design option * sample)
+        self._means = np.array(means)                                                   # (option, design option), exact
+
+    @classmethod
+    def from_files(cls, databases: Dict[str, str] = DATABASES, layers_path: str = LAYERS_PATH, design_options_path: str = DESIGN_OPTIONS_PATH, length_road: float = LENGTH_ROAD, **kwargs) -> "DatabaseMixExplorer":
+        """Create the explorer from the input files of app.py (database name -> background data file)."""
+        layers_data, emission_factors_data, design_options_data = load_data(layers_path, list(databases.values()), design_options_path)
+        layers = create_layers(layers_data)
+        emission_factor_sets = {db_name: create_emission_factors(data) for db_name, data in zip(databases, emission_factors_data)}
+        return cls(layers, create_design_options(layers, design_options_data), emission_factor_sets, length_road, **kwargs)
+
+    def option_labels(self, material: str) -> List[str]:
+        """Database labels of the options of a material."""
+        return [label for label, _ in self.options[material]]
+
+    def combinations(self, vary: Optional[List[str]] = None, fixed: Optional[Dict[str, str]] = None, base_database: Optional[str] = None, max_combinations: int = 100000) -> np.ndarray:
+        """
+        Enumerate database mixes.
+
+        Parameters:
+        - vary: Materials whose database is varied (default: all materials with more than one option that enter the
+          selected output).
+        - fixed: Dictionary mapping materials to a fixed database.
+        - base_database: Database of all other materials (default: the first database; materials it does not
+          contain take their first option).
+        - max_combinations: Raise a ValueError instead of enumerating more mixes than this.
+
+        Returns:
+        - combinations: Array (mix, material) of option indices.
+        """
+        fixed = fixed or {}
+        base_database = base_database or self.databases[0]
+        if vary is None:
+            vary = [material for material in self.materials if len(self.options[material]) > 1 and material not in fixed and material not in self.unused]
+        for material in list(vary) + list(fixed):
+            if material not in self.options:
+                raise ValueError(f"Unknown material: {material}")
+
+        choices = []
+        for material in self.materials:
+            options = [option for _, option in self.options[material]]
+            if material in vary:
+                choices.append(options)
+            else:
+                database = fixed.get(material, base_database)
+                matches = [option for label, option in self.options[material] if database in label.split("/")]
+                if material in fixed and not matches:
+                    raise ValueError(f"Material '{material}' is not in the database '{database}'.")
+                choices.append(matches[:1] or options[:1])
+        n_combinations = int(np.prod([len(options) for options in choices]))
+        if n_combinations > max_combinations:
+            raise ValueError(f"{n_combinations} database mixes exceed max_combinations ({max_combinations}); vary fewer materials.")
+        return np.array(list(itertools.product(*choices)), dtype=int).reshape(n_combinations, len(self.materials))
+
+    def evaluate(self, combinations: np.ndarray, chunk_size: int = 1000) -> pd.DataFrame:
+        """
+        Score database mixes.
+
+        Parameters:
+        - combinations: Array (mix, material) of option indices (see `combinations`).
+        - chunk_size: Number of mixes evaluated at a time.
+
+        Returns:
+        - df: Pandas DataFrame with one row per mix and design option: 'Mix', the database of every material,
+          'Design Option', the exact 'Mean', the sampled '95th Percentile', the 'Rank' of the design option by mean
+          within the mix (1 = lowest impact) and 'P(Best)', the share of samples in which it has the lowest impact.
+        """
+        n_combinations = len(combinations)
+        n_design_options = len(self.design_options)
+        means = np.zeros((n_combinations, n_design_options))
+        p95 = np.zeros((n_combinations, n_design_options))
+        p_best = np.zeros((n_combinations, n_design_options))
+        with self.metrics.phase("database_mix_evaluation", n_samples=n_combinations * self.n_samples, items=n_combinations):
+            for start in range(0, n_combinations, chunk_size):
+                chunk = combinations[start:start + chunk_size]
+                selection = np.zeros((len(chunk), len(self._contributions)))
+                np.put_along_axis(selection, chunk, 1.0, axis=1)
+                values = (selection @ self._contributions).reshape(len(chunk), n_design_options, self.n_samples)
+                means[start:start + len(chunk)] = selection @ self._means
+                p95[start:start + len(chunk)] = np.percentile(values, 95, axis=-1)
+                best = values.argmin(axis=1)
+                p_best[start:start + len(chunk)] = (best[:, np.newaxis, :] == np.arange(n_design_options)[:, np.newaxis]).mean(axis=-1)
+        ranks = means.argsort(axis=1).argsort(axis=1) + 1
+
+        labels = {option: label for options in self.options.values() for label, option in options}
+        df = pd.DataFrame({'Mix': np.repeat(np.arange(n_combinations), n_design_options)})
+        for k, material in enumerate(self.materials):
+            df[material] = np.repeat([labels[option] for option in combinations[:, k]], n_design_options)
+        df['Design Option'] = np.tile(self.design_options, n_combinations)
+        df['Mean'] = means.ravel()
+        df['95th Percentile'] = p95.ravel()
+        df['Rank'] = ranks.ravel()
+        df['P(Best)'] = p_best.ravel()
+        return df
+
+    def explore(self, vary: Optional[List[str]] = None, fixed: Optional[Dict[str, str]] = None, base_database: Optional[str] = None, max_combinations: int = 100000) -> pd.DataFrame:
+        """Enumerate (see `combinations`) and score (see `evaluate`) database mixes."""
+        return self.evaluate(self.combinations(vary, fixed, base_database, max_combinations))
+
+
+def ranking_frequencies(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    How often every ranking of the design options occurs among the mixes of `DatabaseMixExplorer.evaluate`.
+
+    Returns:
+    - df: Pandas DataFrame with 'Ranking' (design options from lowest to highest mean impact), 'Mixes' and 'Share'.
+    """
+    rankings = df.sort_values(['Mix', 'Rank']).groupby('Mix')['Design Option'].agg(' < '.join)
+    counts = rankings.value_counts()
+    return pd.DataFrame({'Ranking': counts.index, 'Mixes': counts.values, 'Share': counts.values / len(rankings)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score mixes of background databases per material.")
+    parser.add_argument('--samples', type=int, default=2000, help="Number of samples per material and database.")
+    parser.add_argument('--sampling-method', choices=SAMPLING_METHODS, default='monte_carlo')
+    parser.add_argument('--stage', choices=STAGES + [TOTAL_STAGE], default=TOTAL_STAGE)
+    parser.add_argument('--category', choices=IMPACT_CATEGORIES, default='gwp_total')
+    parser.add_argument('--vary', nargs='+', help="Materials whose database is varied (default: all with more than one option).")
+    parser.add_argument('--base-database', choices=list(DATABASES), help="Database of the materials that are not varied.")
+    parser.add_argument('--max-combinations', type=int, default=100000)
+    parser.add_argument('--csv', help="Write the scores of all mixes to this CSV file.")
+    args = parser.parse_args()
+
+    metrics = RunMetrics()
+    with contextlib.redirect_stdout(io.StringIO()):
+        explorer = DatabaseMixExplorer.from_files(n_samples=args.samples, sampling_method=args.sampling_method, stage=args.stage, category=args.category, metrics=metrics)
+    df = explorer.explore(args.vary, base_database=args.base_database, max_combinations=args.max_combinations)
+    evaluation = metrics.phases["database_mix_evaluation"]
+    print(f"Scored {df['Mix'].nunique()} database mixes in {evaluation.wall_time_s:.2f} s")
+    print(ranking_frequencies(df).to_string(index=False))
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
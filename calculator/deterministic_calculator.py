@@ -1,14 +1,41 @@
 from models.models import StageA1, StageA2, StageA3, StageA4, StageA5, Layer, EmissionFactor, DesignOption
 from models.results import A1Result, A2Result, A3Result, A4Result, A5Result, LayerResult, DesignOptionResult
-from typing import List
+from general.metrics import RunMetrics
+from general.profiling import PhaseProfiler
+import threading
+from typing import List, Optional
 
 class LCACalculator:
-    def __init__(self, layers: List[Layer], emission_factors: List[EmissionFactor]):
+    def __init__(self, layers: List[Layer], emission_factors: List[EmissionFactor], metrics: Optional[RunMetrics] = None):
         self.layers = layers
         self.emission_factors = emission_factors
         self.results = []  # Change to a list for storing results
+        self.metrics = metrics if metrics is not None else RunMetrics()  # phase timers, see general.metrics
+        self.memory_limit_bytes: Optional[int] = None  # pre-flight memory warning for probabilistic runs, see general.memory
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Request cancellation of a running probabilistic calculation (e.g. from another thread); it raises RunCancelled."""
+        self._cancel_event.set()
+
+    def _phase(self, name: str, n_samples: Optional[int] = None, items: Optional[int] = None):
+        """Context manager for instrumenting a named phase of a calculation."""
+        return self.metrics.phase(name, n_samples=n_samples, items=items)
+
+    def enable_profiling(self, output_dir: str, phases: Optional[List[str]] = None, top_n: int = 25) -> PhaseProfiler:
+        """
+        Profile the calculator phases with cProfile. Call `write()` on the returned profiler (or on
+        `self.metrics.profiler`) after the run to store the per-phase profiles and the hot function summary.
+        The 'stage_evaluation' profile breaks the time down into StageA1-StageA5 and get_emission_factor.
+        """
+        self.metrics.profiler = PhaseProfiler(output_dir, phases=phases, top_n=top_n)
+        return self.metrics.profiler
 
     def calculate_stage_impacts(self):
+        with self._phase("deterministic_stage_evaluation", items=len(self.layers)):
+            self._calculate_stage_impacts()
+
+    def _calculate_stage_impacts(self):
         for layer in self.layers:
             # Create A1 Stage
             stage_a1 = StageA1(
@@ -102,6 +129,10 @@ class LCACalculator:
                 setattr(obj, attr, value / divisor)
 
     def calculate_deterministic_lca_design_option(self, deterministic_result: List[LayerResult], design_options: List[DesignOption], length_road: float) -> List[DesignOptionResult]:
+        with self._phase("deterministic_design_option", items=len(design_options)):
+            return self._calculate_deterministic_lca_design_option(deterministic_result, design_options, length_road)
+
+    def _calculate_deterministic_lca_design_option(self, deterministic_result: List[LayerResult], design_options: List[DesignOption], length_road: float) -> List[DesignOptionResult]:
         results = []
 
         for design_option in design_options:
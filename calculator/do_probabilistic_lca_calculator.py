@@ -1,14 +1,23 @@
 import openturns as ot
 import math
-from typing import List
+import numpy as np
+from itertools import chain
+from operator import attrgetter
+from typing import Dict, List, Optional
 from models.models import Layer, EmissionFactor, DesignOption, SampledEmissionFactor, StageA1, StageA2, StageA3, StageA4, StageA5
-from models.results import A1Result, A2Result, A3Result, A4Result, A5Result
+from models.results import A1Result, A2Result, A3Result, A4Result, A5Result, ResultTensor, STAGES, IMPACT_CATEGORIES
 from calculator.deterministic_calculator import LCACalculator
+from calculator.sampling import sample_distributions, distribution_parameters, draw_mixture_components
+from calculator.linear_model import LinearLCAModel, build_linear_model
+from general.metrics import RunMetrics
+from general.memory import estimate_run_memory, check_memory_limit
+from general.progress import ProgressReporter
+from general.checkpoint import RunCheckpoint
 
 class DesignOptionProbabilisticLCACalculator(LCACalculator):
-    def __init__(self, layers: List[Layer], emission_factors: List[EmissionFactor], design_options: List[DesignOption], length_road: float):
+    def __init__(self, layers: List[Layer], emission_factors: List[EmissionFactor], design_options: List[DesignOption], length_road: float, metrics: Optional[RunMetrics] = None):
         # Call the parent constructor
-        super().__init__(layers, emission_factors)
+        super().__init__(layers, emission_factors, metrics)
         self.design_options = design_options  # New attribute for design options
         self.length_road = length_road
 
@@ -25,33 +34,278 @@ class DesignOptionProbabilisticLCACalculator(LCACalculator):
             return ot.Normal(mean, variance**0.5)
 
 
-    def calculate_do_probabilistic_impact(self, n_samples: int):
-        """Calculate the LCA with probabilistic sampling using OpenTURNS for multiple design options."""
+    def calculate_do_probabilistic_impact(self, n_samples: int, sampling_method: str = "monte_carlo", progress_callback=None, progress_every=None, checkpoint_dir: Optional[str] = None, checkpoint_every: Optional[int] = None, resume: bool = False):
+        """
+        Calculate the LCA with probabilistic sampling using OpenTURNS for multiple design options (see calculator.sampling for the sampling methods).
+        progress_callback receives general.progress.ProgressEvent instances (one task per design option) every
+        progress_every samples (default: 1 %). `cancel()` stops the run at the next report with RunCancelled.
+        With checkpoint_dir the completed samples are written to disk every checkpoint_every samples (default: 10 %),
+        and resume=True continues an interrupted run from there with bit-identical results (see general.checkpoint).
+        """
+        if self.memory_limit_bytes:
+            check_memory_limit(self.estimate_memory(n_samples), self.memory_limit_bytes)
+
+        self._cancel_event.clear()
+        progress = ProgressReporter(progress_callback, n_samples * len(self.design_options), self._cancel_event)
+        progress_every = ProgressReporter.batch_size(n_samples, progress_every)
+        checkpoint = None
+        if checkpoint_dir:
+            checkpoint = RunCheckpoint(checkpoint_dir, self._run_settings(n_samples, sampling_method), resume, every=checkpoint_every or max(1, n_samples // 10))
         probabilistic_results_for_design_options = []
         
         # Loop over each design option
-        for design_option in self.design_options:
+        for design_option_idx, design_option in enumerate(self.design_options):
             print(f"Calculating probabilistic LCA for Design Option: {design_option.name}")
-            probabilistic_results_for_design_option = self._calculate_probabilistic_impact_for_design_option(design_option, n_samples)
+            progress.start_task(design_option.name, n_samples, units=n_samples * len(design_option.layer))
+            probabilistic_results_for_design_option = self._calculate_probabilistic_impact_for_design_option(design_option, n_samples, sampling_method, progress, progress_every, checkpoint, design_option_idx)
             probabilistic_results_for_design_options.append(probabilistic_results_for_design_option)
+            progress.complete_task()
         
+        progress.complete_run(probabilistic_results_for_design_options)
         return probabilistic_results_for_design_options
 
-    def _calculate_probabilistic_impact_for_design_option(self, design_option, n_samples):
+    def _run_settings(self, n_samples: int, sampling_method: str) -> dict:
+        """Inputs that determine the results of a probabilistic run (fingerprint of checkpoints)."""
+        return {
+            'n_samples': n_samples,
+            'sampling_method': sampling_method,
+            'length_road': self.length_road,
+            'design_options': [[design_option.name] + [vars(layer) for layer in design_option.layer] for design_option in self.design_options],
+            'emission_factors': [vars(ef) for ef in self.emission_factors],
+        }
+
+    def estimate_memory(self, n_samples: int, include_plot_frames: bool = True):
+        """Pre-flight estimate of the bytes per result container for a run with n_samples (see general.memory)."""
+        return estimate_run_memory(
+            n_samples,
+            n_layer_results=sum(len(design_option.layer) for design_option in self.design_options),
+            n_design_options=len(self.design_options),
+            include_plot_frames=include_plot_frames
+        )
+
+    def get_linear_model(self) -> LinearLCAModel:
+        """Return the coefficients of the stage models of all design options (see calculator.linear_model)."""
+        return build_linear_model(self.layers, self.emission_factors, self.design_options, self.length_road)
+
+    def sample_emission_factors(self, n_samples: int, sampling_method: str = "monte_carlo") -> np.ndarray:
+        """Sample the emission factor distributions: array (sample, emission factor, impact category)."""
+        with self._phase("distribution_construction", items=4 * len(self.emission_factors)):
+            distributions = self._get_emission_factor_distributions()
+        with self._phase("sampling", n_samples=n_samples, items=n_samples * len(distributions)):
+            ot_samples = sample_distributions(distributions, n_samples, sampling_method)
+        return np.asarray(ot_samples).reshape(n_samples, len(self.emission_factors), len(IMPACT_CATEGORIES))
+
+    def calculate_vectorized_impact(self, n_samples: int, sampling_method: str = "monte_carlo", return_samples: bool = False, common_random_numbers: bool = False):
+        """
+        Vectorized counterpart of `calculate_do_probabilistic_impact` followed by `collect_result_tensor`.
+
+        The stage models are evaluated as one array operation per design option on the linear model. Every design
+        option draws its own samples in the same order as the object loop, so a fixed seed gives the same results.
+        With common_random_numbers all design options are evaluated on one shared sample (paired results for
+        comparing design options, see general.decision_metrics).
+
+        Returns:
+        - result_tensor: ResultTensor with the axes (design option, layer, stage, impact category, sample).
+        - samples: Only with return_samples, the emission factor samples (design option, sample, emission factor, impact category).
+        """
+        model = self.get_linear_model()
+        if common_random_numbers:
+            samples = self.sample_emission_factors(n_samples, sampling_method)
+            with self._phase("vectorized_evaluation", n_samples=n_samples * len(self.design_options), items=5 * n_samples * model.coefficients.shape[1] * len(self.design_options)):
+                result_tensor = model.to_result_tensor(model.evaluate(samples), paired=True)
+            if return_samples:
+                return result_tensor, np.broadcast_to(samples, (len(self.design_options),) + samples.shape)
+            return result_tensor
+
+        values = np.zeros(model.coefficients.shape[:3] + (len(IMPACT_CATEGORIES), n_samples))
+        design_option_samples = []
+        for d, design_option in enumerate(self.design_options):
+            samples = self.sample_emission_factors(n_samples, sampling_method)
+            with self._phase("vectorized_evaluation", n_samples=n_samples, items=5 * n_samples * len(design_option.layer)):
+                values[d] = model.evaluate_design_option(d, samples)
+            if return_samples:
+                design_option_samples.append(samples)
+        if return_samples:
+            return model.to_result_tensor(values), np.stack(design_option_samples)
+        return model.to_result_tensor(values)
+
+    def calculate_bank_impact(self, bank, n_samples: Optional[int] = None, start: int = 0, chunk_size: int = 100000) -> ResultTensor:
+        """
+        Evaluate all design options against a slice of a persistent sample bank (see calculator.sample_bank), without
+        building distributions or sampling. All design options use the same bank samples (paired results).
+
+        Parameters:
+        - bank: calculator.sample_bank.SampleBank of the database catalog.
+        - n_samples: Number of samples (default: the rest of the bank after start).
+        - start: First bank sample.
+        - chunk_size: Number of samples read from the memory map at a time.
+
+        Returns:
+        - result_tensor: ResultTensor with the axes (design option, layer, stage, impact category, sample).
+        """
+        n_samples = bank.n_samples - start if n_samples is None else n_samples
+        bank.columns(self.emission_factors)     # fail before the evaluation if the bank does not match
+        model = self.get_linear_model()
+        values = np.zeros(model.coefficients.shape[:3] + (len(IMPACT_CATEGORIES), n_samples))
+        with self._phase("bank_evaluation", n_samples=n_samples * len(self.design_options), items=5 * n_samples * model.coefficients.shape[1] * len(self.design_options)):
+            for chunk_start in range(0, n_samples, chunk_size):
+                chunk_stop = min(chunk_start + chunk_size, n_samples)
+                values[..., chunk_start:chunk_stop] = model.evaluate(bank.get_samples(self.emission_factors, start + chunk_start, start + chunk_stop))
+        return model.to_result_tensor(values, paired=True)
+
+    def _mixture_weights(self, emission_factor_sets: Dict[str, List[EmissionFactor]], weights: Dict[str, float], material_weights: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Catalog of the mixture mode and the component weights of every material.
+        Materials that the stage models do not use and no weighted database contains fall back to the first database
+        that contains them; for used materials this raises a ValueError.
+
+        Returns:
+        - catalog: List of EmissionFactor instances, one per material (first occurrence over the databases).
+        - components: Array (database, material, impact category) of the component emission factor means, and their COVs
+          as an array (database, material, 1); materials missing in a database have weight 0 there.
+        - mixture_weights: Array (material, database), rows sum to 1.
+        """
+        databases = list(emission_factor_sets)
+        unknown = set(weights) - set(databases)
+        for material_weight in (material_weights or {}).values():
+            unknown |= set(material_weight) - set(databases)
+        if unknown:
+            raise ValueError(f"Weights for unknown databases: {', '.join(sorted(unknown))}")
+
+        catalog = {}
+        for emission_factors in emission_factor_sets.values():
+            for ef in emission_factors:
+                catalog.setdefault(ef.material, ef)
+        materials = list(catalog)
+        means = np.zeros((len(databases), len(materials), len(IMPACT_CATEGORIES)))
+        covs = np.zeros((len(databases), len(materials), 1))
+        mixture_weights = np.zeros((len(materials), len(databases)))
+        for j, db_name in enumerate(databases):
+            for ef in reversed(emission_factor_sets[db_name]):     # the first emission factor of a material wins
+                k = materials.index(ef.material)
+                means[j, k] = [ef.mean_total, ef.mean_fossil, ef.mean_biogenic, ef.mean_luluc]
+                covs[j, k] = ef.cov
+                mixture_weights[k, j] = (material_weights or {}).get(ef.material, weights).get(db_name, 0.0)
+        if np.any(mixture_weights < 0):
+            raise ValueError("Mixture weights must not be negative.")
+        unweighted = mixture_weights.sum(axis=1) == 0
+        if np.any(unweighted):
+            ## only materials that enter the stage models need a weighted database; the others are sampled from the
+            ## first database that contains them (their samples have coefficient 0)
+            used = build_linear_model(self.layers, list(catalog.values()), self.design_options, self.length_road).coefficients.any(axis=(0, 1, 2))
+            if np.any(unweighted & used):
+                raise ValueError(f"No database with a positive weight for: {', '.join(m for m, missing in zip(materials, unweighted & used) if missing)}")
+            for k in np.flatnonzero(unweighted):
+                mixture_weights[k, next(j for j, db_name in enumerate(databases) if any(ef.material == materials[k] for ef in emission_factor_sets[db_name]))] = 1.0
+        return list(catalog.values()), (means, covs), mixture_weights / mixture_weights.sum(axis=1, keepdims=True)
+
+    def get_mixture_moments(self, emission_factor_sets: Dict[str, List[EmissionFactor]], weights: Dict[str, float], material_weights: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Exact mean and variance of the mixture distribution of every emission factor (see `sample_mixture_emission_factors`).
+
+        Returns:
+        - means, variances: Arrays (material, impact category) in the order of the mixture catalog.
+        """
+        _, (means, covs), mixture_weights = self._mixture_weights(emission_factor_sets, weights, material_weights)
+        w = mixture_weights.T[..., np.newaxis]                                 # (database, material, 1)
+        mixture_means = (w * means).sum(axis=0)
+        second_moments = (w * ((covs * means) ** 2 + means ** 2)).sum(axis=0)
+        return mixture_means, np.maximum(second_moments - mixture_means ** 2, 0.0)
+
+    def sample_mixture_emission_factors(self, emission_factor_sets: Dict[str, List[EmissionFactor]], weights: Dict[str, float], n_samples: int, sampling_method: str = "monte_carlo", material_weights: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Sample every emission factor from the weighted mixture of its distributions in several databases.
+
+        The source database is drawn per sample and material (shared by the four impact categories of the material).
+        The standard normal variates of all columns are drawn once with the sampling method and transformed with the
+        lognormal (or normal) parameters of the drawn component, so the cost does not grow with the number of databases.
+
+        Parameters:
+        - emission_factor_sets: Dictionary mapping a database name to its list of EmissionFactor instances.
+        - weights: Dictionary mapping a database name to its weight (confidence in the source); the weights of the
+          databases that contain a material are normalized per material.
+        - n_samples: Number of samples.
+        - sampling_method: One of calculator.sampling.SAMPLING_METHODS (applied to the normal variates).
+        - material_weights: Optional per-material weights that replace `weights`, e.g. {'bitumen': {'epd': 0.8, 'national': 0.2}}.
+
+        Returns:
+        - catalog: List of EmissionFactor instances defining the emission factor axis (one per material).
+        - samples: Array (sample, material, impact category).
+        - components: Integer array (sample, material) with the index of the drawn database.
+        """
+        catalog, (means, covs), mixture_weights = self._mixture_weights(emission_factor_sets, weights, material_weights)
+        lognormal, loc, scale = distribution_parameters(means, np.broadcast_to(covs, means.shape))
+        n_columns = len(catalog) * len(IMPACT_CATEGORIES)
+        with self._phase("sampling", n_samples=n_samples, items=n_samples * n_columns):
+            normals = np.asarray(sample_distributions([ot.Normal()] * n_columns, n_samples, sampling_method)).reshape(n_samples, len(catalog), len(IMPACT_CATEGORIES))
+            components = draw_mixture_components(mixture_weights, n_samples)
+        with self._phase("mixture_transform", n_samples=n_samples, items=n_samples * n_columns):
+            material_idx = np.arange(len(catalog))
+            values = loc[components, material_idx] + scale[components, material_idx] * normals
+            samples = np.where(lognormal[components, material_idx], np.exp(values), values)
+        return catalog, samples, components
+
+    def calculate_mixture_impact(self, emission_factor_sets: Dict[str, List[EmissionFactor]], weights: Dict[str, float], n_samples: int, sampling_method: str = "monte_carlo", common_random_numbers: bool = False, material_weights: Optional[Dict[str, Dict[str, float]]] = None) -> ResultTensor:
+        """
+        One probabilistic run over a weighted mixture of background databases instead of one run per database
+        (see `sample_mixture_emission_factors`). The emission factors of the calculator are not used.
+
+        Parameters:
+        - emission_factor_sets, weights, material_weights: Databases and their weights.
+        - n_samples: Number of samples per design option.
+        - sampling_method: One of calculator.sampling.SAMPLING_METHODS.
+        - common_random_numbers: Evaluate all design options on one shared sample (paired results for
+          general.decision_metrics).
+
+        Returns:
+        - result_tensor: ResultTensor with the axes (design option, layer, stage, impact category, sample).
+        """
+        catalog, _, _ = self._mixture_weights(emission_factor_sets, weights, material_weights)
+        model = build_linear_model(self.layers, catalog, self.design_options, self.length_road)
+        if common_random_numbers:
+            _, samples, _ = self.sample_mixture_emission_factors(emission_factor_sets, weights, n_samples, sampling_method, material_weights)
+            with self._phase("vectorized_evaluation", n_samples=n_samples * len(self.design_options), items=5 * n_samples * model.coefficients.shape[1] * len(self.design_options)):
+                return model.to_result_tensor(model.evaluate(samples), paired=True)
+
+        values = np.zeros(model.coefficients.shape[:3] + (len(IMPACT_CATEGORIES), n_samples))
+        for d, design_option in enumerate(self.design_options):
+            _, samples, _ = self.sample_mixture_emission_factors(emission_factor_sets, weights, n_samples, sampling_method, material_weights)
+            with self._phase("vectorized_evaluation", n_samples=n_samples, items=5 * n_samples * len(design_option.layer)):
+                values[d] = model.evaluate_design_option(d, samples)
+        return model.to_result_tensor(values)
+
+    def _calculate_probabilistic_impact_for_design_option(self, design_option, n_samples, sampling_method="monte_carlo", progress=None, progress_every=1, checkpoint=None, design_option_idx=0):
         """Calculate probabilistic impact for each design option."""
+        if checkpoint is not None and checkpoint.is_complete(design_option_idx, len(design_option.layer), n_samples):
+            ## all samples are in the checkpoint: nothing to draw, but leave the RNG where the sampling would have left it
+            checkpoint.sync_rng_state(design_option_idx + 1)
+            return self._evaluate_design_option(design_option, None, n_samples, progress, progress_every, checkpoint, design_option_idx)
+
         # Sample emission factors and calculate impacts for each layer in the design option
-        distributions = self._get_emission_factor_distributions()  # Get distribution for each emission factor
+        with self._phase("distribution_construction", items=4 * len(self.emission_factors)):
+            distributions = self._get_emission_factor_distributions()  # Get distribution for each emission factor
         
         # Sample from the distributions
-        ot_samples = ot.Sample(n_samples, len(distributions))
-        for i in range(len(distributions)):
-            ot_samples[:, i] = distributions[i].getSample(n_samples)
+        if checkpoint is not None:
+            checkpoint.sync_rng_state(design_option_idx)
+        with self._phase("sampling", n_samples=n_samples, items=n_samples * len(distributions)):
+            ot_samples = sample_distributions(distributions, n_samples, sampling_method)
+        if checkpoint is not None:
+            checkpoint.sync_rng_state(design_option_idx + 1)
         
+        with self._phase("stage_evaluation", n_samples=n_samples, items=5 * n_samples * len(design_option.layer)):
+            return self._evaluate_design_option(design_option, ot_samples, n_samples, progress, progress_every, checkpoint, design_option_idx)
+
+    def _evaluate_design_option(self, design_option, ot_samples, n_samples, progress=None, progress_every=1, checkpoint=None, design_option_idx=0):
+        """
+        Calculate the stage impacts of every layer of a design option for every sample.
+        With a checkpoint, the samples on disk are loaded instead of evaluated and new samples are saved in chunks.
+        """
         # Results to store for this design option
         layer_results = []
 
         # Loop through layers in the design option
-        for layer_type in design_option.layer:
+        for layer_idx, layer_type in enumerate(design_option.layer):
             # Find the corresponding layer in the layers list
             layer = next(l for l in self.layers if l.name == layer_type.name)
             
@@ -59,9 +313,12 @@ class DesignOptionProbabilisticLCACalculator(LCACalculator):
             layer_type = layer_type
 
             layer_results_for_current_layer = []
+            if checkpoint is not None:
+                layer_results_for_current_layer = checkpoint.load_results(design_option_idx, layer_idx)
+            chunk_start = len(layer_results_for_current_layer)
 
-            # Loop through each sample iteration
-            for i in range(n_samples):
+            # Loop through each sample iteration (after the samples restored from the checkpoint)
+            for i in range(chunk_start, n_samples):
                 # Sampled emission factors for the current iteration
                 sampled_factors = ot_samples[i, :]
                 
@@ -84,6 +341,15 @@ class DesignOptionProbabilisticLCACalculator(LCACalculator):
                     'A4_result': a4_impact,
                     'A5_result': a5_impact
                 })
+
+                # Batched progress report (and cancellation check)
+                if progress is not None and (i + 1) % progress_every == 0:
+                    progress.update(layer_idx * n_samples + i + 1)
+
+                # Periodic checkpoint of the samples completed since the last one
+                if checkpoint is not None and (i + 1 - chunk_start == checkpoint.every or i + 1 == n_samples):
+                    checkpoint.save_chunk(design_option_idx, layer_idx, layer_results_for_current_layer[chunk_start:], chunk_start)
+                    chunk_start = i + 1
             
             # Store the results of all iterations for this layer
             # including thickness, density and quantity for final calculation per design option 
@@ -119,6 +385,17 @@ class DesignOptionProbabilisticLCACalculator(LCACalculator):
         
         return distributions
 
+    def get_emission_factor_moments(self):
+        """
+        Mean and variance of every emission factor distribution (`get_lognormal_distribution` matches both exactly).
+
+        Returns:
+        - means, variances: Arrays (emission factor, impact category).
+        """
+        means = np.array([[ef.mean_total, ef.mean_fossil, ef.mean_biogenic, ef.mean_luluc] for ef in self.emission_factors], dtype=float)
+        covs = np.array([ef.cov for ef in self.emission_factors], dtype=float)[:, np.newaxis]
+        return means, (covs * means) ** 2
+
     def _create_sampled_emission_factor_instances(self, sampled_factors, layer):
         """Create SampledEmissionFactor instances for each material using the sampled values."""
         sampled_emission_factors = []
@@ -211,6 +488,42 @@ class DesignOptionProbabilisticLCACalculator(LCACalculator):
             raise ValueError(f"Unknown stage: {stage_name}")
         
 
+    def collect_result_tensor(self, do_probabilistic_results) -> ResultTensor:
+        """
+        Collect the probabilistic results of all design options into one ResultTensor in a single pass.
+
+        Stage-level and overall totals (the outputs of `collect_aggregated_data` and `collect_overall_aggregated_data`)
+        are then reductions over the layer axis, e.g. `self.collect_result_tensor(results).aggregate()`.
+
+        Parameters:
+        - do_probabilistic_results: List of probabilistic LCA results for different design options and layers.
+
+        Returns:
+        - result_tensor: ResultTensor with the axes (design option, layer, stage, impact category, sample).
+        """
+        n_samples = len(do_probabilistic_results[0]['layer_results'][0]['results'])
+        n_layers = max(len(option['layer_results']) for option in do_probabilistic_results)
+        with self._phase("collect_result_tensor", n_samples=n_samples * len(do_probabilistic_results), items=len(do_probabilistic_results)):
+            values = np.zeros((len(do_probabilistic_results), n_layers, len(STAGES), len(IMPACT_CATEGORIES), n_samples))
+            category_getter = attrgetter(*IMPACT_CATEGORIES)
+            stage_keys = [f'{stage}_result' for stage in STAGES]
+            n_values = n_samples * len(STAGES) * len(IMPACT_CATEGORIES)
+
+            for d, option in enumerate(do_probabilistic_results):
+                for l, layer in enumerate(option['layer_results']):
+                    ## one flat traversal of the result objects in (sample, stage, category) order, then samples to the last axis
+                    flat_values = np.fromiter(
+                        chain.from_iterable(category_getter(iteration[key]) for iteration in layer['results'] for key in stage_keys),
+                        dtype=float, count=n_values
+                    )
+                    values[d, l] = flat_values.reshape(n_samples, len(STAGES), len(IMPACT_CATEGORIES)).transpose(1, 2, 0)
+
+            return ResultTensor(
+                design_options=[option['design_option'] for option in do_probabilistic_results],
+                layers=[[layer['layer'] for layer in option['layer_results']] for option in do_probabilistic_results],
+                values=values
+            )
+
     def collect_aggregated_data(self, do_probabilistic_results):
         """
         Collect and aggregate GWP data for each design option, stage, and impact category.
@@ -221,6 +534,11 @@ class DesignOptionProbabilisticLCACalculator(LCACalculator):
         Returns:
         - aggregated_data: Dictionary structured by design option, then by stage and category, containing lists of summed iteration results.
         """
+        n_samples = sum(len(option['layer_results'][0]['results']) for option in do_probabilistic_results)
+        with self._phase("collect_aggregated_data", n_samples=n_samples, items=len(do_probabilistic_results)):
+            return self._collect_aggregated_data(do_probabilistic_results)
+
+    def _collect_aggregated_data(self, do_probabilistic_results):
         # Define the stages and GWP impact categories
         stages = ['A1', 'A2', 'A3', 'A4', 'A5']
         impact_categories = ['gwp_total', 'gwp_fossil', 'gwp_biogenic', 'gwp_luluc']
@@ -267,6 +585,11 @@ class DesignOptionProbabilisticLCACalculator(LCACalculator):
         Returns:
         - overall_aggregated_data: Dictionary structured by design option, containing lists of summed iteration results across all stages for each impact category.
         """
+        n_samples = sum(len(option['layer_results'][0]['results']) for option in do_probabilistic_results)
+        with self._phase("collect_overall_aggregated_data", n_samples=n_samples, items=len(do_probabilistic_results)):
+            return self._collect_overall_aggregated_data(do_probabilistic_results)
+
+    def _collect_overall_aggregated_data(self, do_probabilistic_results):
         # Define the GWP impact categories
         impact_categories = ['gwp_total', 'gwp_fossil', 'gwp_biogenic', 'gwp_luluc']
 
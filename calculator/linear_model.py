@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
+from models.models import Layer, EmissionFactor, DesignOption
+from models.results import ResultTensor, STAGES, IMPACT_CATEGORIES, TOTAL_STAGE
+
+## Every stage model of the design option calculator is linear in the sampled emission factors, and the
+## four impact categories use the same stage equations. One design option, layer and stage is therefore a
+## coefficient vector over the emission factors, and a whole run is one tensor contraction:
+##     values[d, l, s, c, n] = sum_k coefficients[d, l, s, k] * samples[n, k, c]
+
+## constants of DesignOptionProbabilisticLCACalculator._calculate_stage_impact
+SURFACE_AREA = 113970
+FUEL_CONSUMPTION_RATE = 0.359
+ACTUAL_LOAD = 22000.0
+LOAD_CAPACITY = 22000.0
+EMPTY_RETURN_RATE = 1
+
+
+@dataclass
+class LinearLCAModel:
+    """
+    Coefficients of the stage models with the axes (design option, layer, stage, emission factor).
+    Design options with fewer layers are padded with zeros.
+    """
+    design_options: List[str]
+    layers: List[List[str]]         # layer names per design option
+    emission_factors: List[str]     # material of every emission factor (column order of the samples)
+    coefficients: np.ndarray
+
+    @property
+    def n_emission_factors(self) -> int:
+        return self.coefficients.shape[-1]
+
+    def stage_coefficients(self) -> np.ndarray:
+        """Coefficients of the stage totals: (design option, stage, emission factor)."""
+        return self.coefficients.sum(axis=1)
+
+    def overall_coefficients(self) -> np.ndarray:
+        """Coefficients of the totals over all stages: (design option, emission factor)."""
+        return self.coefficients.sum(axis=(1, 2))
+
+    def output_coefficients(self):
+        """
+        Coefficients of the stage totals and the total over all stages of every design option, one row per output.
+
+        Returns:
+        - coefficients: Array (output, emission factor).
+        - labels: List of (design option, life cycle stage) per output, the total is labelled TOTAL_STAGE.
+        """
+        stage_coefficients = self.stage_coefficients()
+        overall_coefficients = self.overall_coefficients()
+        coefficients = []
+        labels = []
+        for d, design_option in enumerate(self.design_options):
+            for s, stage in enumerate(STAGES):
+                coefficients.append(stage_coefficients[d, s])
+                labels.append((design_option, stage))
+            coefficients.append(overall_coefficients[d])
+            labels.append((design_option, TOTAL_STAGE))
+        return np.array(coefficients), labels
+
+    def evaluate(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Evaluate all design options, layers and stages for a batch of emission factor samples.
+
+        Parameters:
+        - samples: Array (sample, emission factor, impact category), or the flat (sample, 4 * emission factor)
+          layout of the sampled distributions.
+
+        Returns:
+        - values: Array (design option, layer, stage, impact category, sample).
+        """
+        return np.einsum('dlsk,nkc->dlscn', self.coefficients, self._as_3d(samples), optimize=True)
+
+    def evaluate_design_option(self, d: int, samples: np.ndarray) -> np.ndarray:
+        """Evaluate one design option for its own samples: (layer, stage, impact category, sample)."""
+        return np.einsum('lsk,nkc->lscn', self.coefficients[d], self._as_3d(samples), optimize=True)
+
+    def to_result_tensor(self, values: np.ndarray, paired: bool = False) -> ResultTensor:
+        return ResultTensor(design_options=list(self.design_options), layers=[list(names) for names in self.layers], values=values, paired=paired)
+
+    def _as_3d(self, samples: np.ndarray) -> np.ndarray:
+        samples = np.asarray(samples, dtype=float)
+        if samples.ndim == 2:
+            samples = samples.reshape(len(samples), self.n_emission_factors, len(IMPACT_CATEGORIES))
+        return samples
+
+
+def _find_emission_factor(emission_factors: List[EmissionFactor], name: str, case_sensitive: bool = False) -> Optional[int]:
+    """Index of the first emission factor for `name`, with the lookup rules of LifeCycleStage.get_emission_factor
+    (case-insensitive) and StageA5.get_emission_factor_for_equipment (case-sensitive)."""
+    for k, ef in enumerate(emission_factors):
+        if (ef.material == name) if case_sensitive else (ef.material.lower() == name.lower()):
+            return k
+    return None
+
+
+def _layer_coefficients(layer: Layer, density: float, thickness: float, emission_factors: List[EmissionFactor], length_road: float) -> np.ndarray:
+    """Coefficients (stage, emission factor) of one layer of a design option."""
+    coefficients = np.zeros((len(STAGES), len(emission_factors)))
+    layer_mass = SURFACE_AREA * density * thickness
+    load_factor = 1/3 * (ACTUAL_LOAD / LOAD_CAPACITY) + 2/3 + 2/3 * EMPTY_RETURN_RATE
+
+    # A1: materials, weighted by their composition (materials without emission factor are skipped)
+    for material in layer.materials:
+        k = _find_emission_factor(emission_factors, material.name)
+        if k is not None:
+            coefficients[0, k] += material.composition * layer_mass
+
+    # A2: transport of the materials, always with diesel
+    k = _find_emission_factor(emission_factors, "diesel")
+    if k is not None:
+        for material in layer.materials:
+            mass_diesel = FUEL_CONSUMPTION_RATE * material.transport_distance_a2 * load_factor * (material.mass_a2 / LOAD_CAPACITY)
+            coefficients[1, k] += mass_diesel * layer_mass
+
+    # A3: manufacturing energy
+    k = _find_emission_factor(emission_factors, layer.energy_used_a3)
+    if k is None:
+        raise ValueError(f"No emission factor for the A3 energy type '{layer.energy_used_a3}' of layer '{layer.name}'.")
+    coefficients[2, k] += layer.energy_consumption_a3 * layer_mass
+
+    # A4: transport to site with diesel
+    k = _find_emission_factor(emission_factors, "diesel")
+    if k is None:
+        raise ValueError(f"No emission factor for diesel (A4 transport of layer '{layer.name}').")
+    coefficients[3, k] += FUEL_CONSUMPTION_RATE * layer.transport_distance_a4 * load_factor * (layer_mass * 1000 / LOAD_CAPACITY)
+
+    # A5: construction, only the first equipment of the layer is accounted for (as in StageA5)
+    if layer.construction_a5:
+        equipment = layer.construction_a5[0]
+        k = _find_emission_factor(emission_factors, equipment.energy_type, case_sensitive=True)
+        if k is None:
+            raise ValueError(f"No emission factor for the A5 energy type '{equipment.energy_type}' of layer '{layer.name}'.")
+        if equipment.productivity_unit == "t/h":
+            quantity = layer_mass
+        elif equipment.productivity_unit == "m2/h":
+            quantity = SURFACE_AREA
+        elif equipment.productivity_unit == "m3/h":
+            quantity = SURFACE_AREA * thickness
+        else:
+            raise ValueError(f"Unsupported productivity unit: {equipment.productivity_unit}")
+        coefficients[4, k] += equipment.energy / (equipment.productivity * equipment.number) * quantity
+
+    return coefficients / length_road
+
+
+def build_linear_model(layers: List[Layer], emission_factors: List[EmissionFactor], design_options: List[DesignOption], length_road: float) -> LinearLCAModel:
+    """
+    Build the coefficients of the design option stage models.
+
+    Evaluating the model on the samples of `DesignOptionProbabilisticLCACalculator` reproduces its per-sample
+    results (up to floating point rounding), so the model can replace the per-sample object loop.
+
+    Parameters:
+    - layers: List of Layer instances.
+    - emission_factors: List of EmissionFactor instances (defines the emission factor axis).
+    - design_options: List of DesignOption instances.
+    - length_road: Length of the road the results are normalized to.
+
+    Returns:
+    - model: LinearLCAModel.
+    """
+    n_layers = max(len(design_option.layer) for design_option in design_options)
+    coefficients = np.zeros((len(design_options), n_layers, len(STAGES), len(emission_factors)))
+    for d, design_option in enumerate(design_options):
+        for l, layer_type in enumerate(design_option.layer):
+            layer = next(layer for layer in layers if layer.name == layer_type.name)
+            coefficients[d, l] = _layer_coefficients(layer, layer_type.density, layer_type.thickness, emission_factors, length_road)
+
+    return LinearLCAModel(
+        design_options=[design_option.name for design_option in design_options],
+        layers=[[layer_type.name for layer_type in design_option.layer] for design_option in design_options],
+        emission_factors=[ef.material for ef in emission_factors],
+        coefficients=coefficients
+    )
@@ -0,0 +1,67 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import numpy as np
+from models.results import ResultTensor, IMPACT_CATEGORIES
+from general.shared_memory import SharedArray
+
+## Parallel evaluation of the linear model (calculator.linear_model) over sample slices in worker processes.
+## The parent draws the emission factor samples into a shared memory block and allocates the result tensor in
+## another one. Workers attach to both once (pool initializer) and evaluate their slices in place, so neither the
+## samples nor the results are pickled; the tasks only carry (design option, first sample, last sample).
+
+_worker = {}
+
+
+def _init_worker(model, samples_spec, values_spec):
+    _worker['model'] = model
+    _worker['samples'] = SharedArray.attach(samples_spec)
+    _worker['values'] = SharedArray.attach(values_spec)
+
+
+def _evaluate_slice(d: int, sample_set: int, start: int, stop: int):
+    """Evaluate design option d on the samples start..stop-1 of sample set `sample_set` and write the result slice."""
+    samples = _worker['samples'].array[sample_set, start:stop]
+    _worker['values'].array[d, ..., start:stop] = _worker['model'].evaluate_design_option(d, samples)
+
+
+def calculate_parallel_impact(calculator, n_samples: int, sampling_method: str = "monte_carlo", n_workers: Optional[int] = None, chunk_size: int = 10000, common_random_numbers: bool = False) -> ResultTensor:
+    """
+    Parallel counterpart of `DesignOptionProbabilisticLCACalculator.calculate_vectorized_impact` with the same results
+    for the same seed (the samples are drawn in the parent in the same order).
+
+    Parameters:
+    - calculator: DesignOptionProbabilisticLCACalculator.
+    - n_samples: Number of samples per design option.
+    - sampling_method: One of calculator.sampling.SAMPLING_METHODS.
+    - n_workers: Number of worker processes (default: number of CPUs).
+    - chunk_size: Number of samples per task.
+    - common_random_numbers: Evaluate all design options on one shared sample (paired results).
+
+    The workers use the platform's default start method. With spawn (macOS, Windows) they import the calling script
+    again, so scripts must start the run under `if __name__ == "__main__":`.
+
+    Returns:
+    - result_tensor: ResultTensor with the axes (design option, layer, stage, impact category, sample).
+    """
+    model = calculator.get_linear_model()
+    n_design_options = len(calculator.design_options)
+    n_sample_sets = 1 if common_random_numbers else n_design_options
+    samples = SharedArray.create((n_sample_sets, n_samples, model.n_emission_factors, len(IMPACT_CATEGORIES)))
+    values = SharedArray.create(model.coefficients.shape[:3] + (len(IMPACT_CATEGORIES), n_samples))
+    try:
+        for sample_set in range(n_sample_sets):
+            samples.array[sample_set] = calculator.sample_emission_factors(n_samples, sampling_method)
+
+        tasks = [(d, 0 if common_random_numbers else d, start, min(start + chunk_size, n_samples)) for d in range(n_design_options) for start in range(0, n_samples, chunk_size)]
+        n_workers = min(n_workers or os.cpu_count() or 1, len(tasks))
+        with calculator._phase("parallel_evaluation", n_samples=n_samples * n_design_options, items=len(tasks)):
+            with ProcessPoolExecutor(n_workers, mp_context=multiprocessing.get_context(), initializer=_init_worker, initargs=(model, samples.spec, values.spec)) as executor:
+                for future in [executor.submit(_evaluate_slice, *task) for task in tasks]:
+                    future.result()
+        ## the shared block is freed below, so the parent keeps a private copy of the results
+        return model.to_result_tensor(np.array(values.array), paired=common_random_numbers)
+    finally:
+        samples.close()
+        values.close()
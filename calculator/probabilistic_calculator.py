@@ -1,14 +1,18 @@
 import openturns as ot
 import math
-from typing import List
+from typing import List, Optional
 from models.models import Layer, EmissionFactor, StageA1, StageA2, StageA3, StageA4, StageA5, SampledEmissionFactor, Equipment
 from models.results import A1Result, A2Result, A3Result, A4Result, A5Result
 from calculator.deterministic_calculator import LCACalculator  # Assuming LCACalculator is imported from another file
+from calculator.sampling import sample_distributions
+from general.metrics import RunMetrics
+from general.memory import estimate_run_memory, check_memory_limit
+from general.progress import ProgressReporter
 
 class ProbabilisticLCACalculator(LCACalculator):
-    def __init__(self, layers: List[Layer], emission_factors: List[EmissionFactor]):
+    def __init__(self, layers: List[Layer], emission_factors: List[EmissionFactor], metrics: Optional[RunMetrics] = None):
         # Call the parent constructor
-        super().__init__(layers, emission_factors)
+        super().__init__(layers, emission_factors, metrics)
 
     def get_lognormal_distribution(self, mean, cov):
         """Return a lognormal distribution for a given mean and variance."""
@@ -23,19 +27,37 @@ class ProbabilisticLCACalculator(LCACalculator):
             variance = (cov * abs(mean)) ** 2
             return ot.Normal(mean, variance**0.5)
 
-    def calculate_probabilistic_impact(self, n_samples: int):
-        """Calculate the LCA with probabilistic sampling using OpenTURNS."""
+    def calculate_probabilistic_impact(self, n_samples: int, sampling_method: str = "monte_carlo", progress_callback=None, progress_every=None):
+        """
+        Calculate the LCA with probabilistic sampling using OpenTURNS (see calculator.sampling for the sampling methods).
+        progress_callback receives general.progress.ProgressEvent instances every progress_every samples (default: 1 %).
+        """
+        if self.memory_limit_bytes:
+            check_memory_limit(estimate_run_memory(n_samples, n_layer_results=len(self.layers), include_plot_frames=False), self.memory_limit_bytes)
+
+        self._cancel_event.clear()
+
         # Define the probabilistic distributions for each emission factor
-        distributions = self._get_emission_factor_distributions()
+        with self._phase("distribution_construction", items=4 * len(self.emission_factors)):
+            distributions = self._get_emission_factor_distributions()
         
         # Sample from the distributions
-        ot_samples = ot.Sample(n_samples, len(distributions))
-        for i in range(len(distributions)):
-            ot_samples[:, i] = distributions[i].getSample(n_samples)
+        with self._phase("sampling", n_samples=n_samples, items=n_samples * len(distributions)):
+            ot_samples = sample_distributions(distributions, n_samples, sampling_method)
         
+        progress = ProgressReporter(progress_callback, n_samples, self._cancel_event)
+        progress.start_task("layers", n_samples, units=n_samples * len(self.layers))
+        with self._phase("stage_evaluation", n_samples=n_samples, items=5 * n_samples * len(self.layers)):
+            probabilistic_results = self._evaluate_layers(ot_samples, n_samples, progress, ProgressReporter.batch_size(n_samples, progress_every))
+        progress.complete_task()
+        progress.complete_run(probabilistic_results)
+        return probabilistic_results
+
+    def _evaluate_layers(self, ot_samples, n_samples, progress=None, progress_every=1):
+        """Calculate the stage impacts of every layer for every sample."""
         probabilistic_results = []
         
-        for layer in self.layers:
+        for layer_idx, layer in enumerate(self.layers):
             layer_results = []
             
             # Loop over each sample iteration
@@ -62,6 +84,10 @@ class ProbabilisticLCACalculator(LCACalculator):
                     'A4_result': a4_impact,
                     'A5_result': a5_impact
                 })
+
+                # Batched progress report (and cancellation check)
+                if progress is not None and (i + 1) % progress_every == 0:
+                    progress.update(layer_idx * n_samples + i + 1)
             
             # Store the results of all iterations for this design option
             probabilistic_results.append({
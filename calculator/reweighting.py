@@ -0,0 +1,204 @@
+import dataclasses
+from typing import Dict, Optional, Union
+import numpy as np
+import pandas as pd
+from models.models import EmissionFactor
+from models.results import ResultTensor, TOTAL_STAGE
+from general.statistical_results import PERCENTILES
+from calculator.sampling import distribution_parameters
+
+## What-if analysis without resampling: statistics under modified emission factor distributions are estimated from a
+## stored run by importance reweighting. Every sample n gets the likelihood ratio
+##     w_n = prod_k p_new(x_nk) / p_old(x_nk)
+## over the changed emission factor columns. The impact categories are sampled independently and every output only
+## depends on its own category, so the weights are computed per category. The effective sample size
+## ESS = (sum w)^2 / sum w^2 tells how many of the stored samples still carry information; a small ESS share means the
+## scenario is too far from the stored run and needs a fresh run.
+
+MEAN_FIELDS = ['mean_total', 'mean_fossil', 'mean_biogenic', 'mean_luluc']
+
+
+def log_density(x: np.ndarray, lognormal: np.ndarray, loc: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Log density of the distributions of `distribution_parameters` at x (broadcast over the leading sample axes)."""
+    positive = x > 0
+    log_x = np.log(np.where(positive, x, 1.0))
+    z = np.where(lognormal, log_x, x) - loc
+    density = -0.5 * (z / scale) ** 2 - np.log(scale) - 0.5 * np.log(2 * np.pi) - np.where(lognormal, log_x, 0.0)
+    return np.where(lognormal & ~positive, -np.inf, density)
+
+
+def weighted_quantiles(sorted_values: np.ndarray, sorted_weights: np.ndarray, probabilities) -> np.ndarray:
+    """
+    Quantiles of weighted samples (sorted along the last axis), by linear interpolation between the midpoints of the
+    cumulative weights. Returns an array (probability, ...).
+    """
+    cumulative = np.cumsum(sorted_weights, axis=-1)
+    total = cumulative[..., -1:]
+    positions = (cumulative - 0.5 * sorted_weights) / np.where(total > 0, total, 1.0)
+    quantiles = []
+    for p in probabilities:
+        upper = np.clip(np.sum(positions < p, axis=-1, keepdims=True), 1, sorted_values.shape[-1] - 1)
+        lower = upper - 1
+        p_lower, p_upper = np.take_along_axis(positions, lower, -1), np.take_along_axis(positions, upper, -1)
+        v_lower, v_upper = np.take_along_axis(sorted_values, lower, -1), np.take_along_axis(sorted_values, upper, -1)
+        fraction = np.clip(np.divide(p - p_lower, p_upper - p_lower, out=np.zeros_like(p_lower), where=p_upper > p_lower), 0.0, 1.0)
+        quantiles.append((v_lower + fraction * (v_upper - v_lower))[..., 0])
+    return np.array(quantiles)
+
+
+class ReweightingEngine:
+    """
+    What-if statistics for modified emission factor distributions from one stored run.
+
+    Parameters:
+    - calculator: DesignOptionProbabilisticLCACalculator of the stored run (its emission factors are the baseline).
+    - result_tensor: ResultTensor of the run.
+    - samples: Emission factor samples of the run, (design option, sample, emission factor, impact category) as returned
+      by `calculate_vectorized_impact(..., return_samples=True)`, or (sample, emission factor, impact category) for paired runs.
+    - min_ess_share: ESS share below which the estimate is flagged as unreliable.
+    """
+
+    def __init__(self, calculator, result_tensor: ResultTensor, samples: np.ndarray, min_ess_share: float = 0.1):
+        self.calculator = calculator
+        self.result_tensor = result_tensor
+        self.min_ess_share = min_ess_share
+        n_design_options = len(result_tensor.design_options)
+        self.samples = samples if samples.ndim == 4 else samples[np.newaxis]      # (sample set, sample, emission factor, category)
+        self._sample_set = np.arange(n_design_options) if self.samples.shape[0] == n_design_options else np.zeros(n_design_options, dtype=int)
+
+        means, _ = calculator.get_emission_factor_moments()
+        covs = np.array([ef.cov for ef in calculator.emission_factors], dtype=float)[:, np.newaxis]
+        self._baseline = distribution_parameters(means, np.broadcast_to(covs, means.shape))
+
+        ## outputs sorted once per series, so a scenario only costs the weights and one gather
+        outputs = result_tensor.stage_and_overall_totals()      # (design option, stage + total, category, sample)
+        order = np.argsort(outputs, axis=-1)
+        self._sorted_outputs = np.take_along_axis(outputs, order, axis=-1)
+        ## flat index of the weight (design option, category, sample) of every sorted output
+        _, _, n_categories, n_samples = outputs.shape
+        design_option_idx, _, category_idx = np.indices(outputs.shape[:3], sparse=True)
+        self._weight_index = ((design_option_idx * n_categories + category_idx) * n_samples)[..., np.newaxis] + order
+        self._selections = {}
+
+    @classmethod
+    def from_run(cls, calculator, n_samples: int, sampling_method: str = "monte_carlo", common_random_numbers: bool = False, min_ess_share: float = 0.1) -> "ReweightingEngine":
+        """Run `calculate_vectorized_impact` and keep its samples for reweighting."""
+        result_tensor, samples = calculator.calculate_vectorized_impact(n_samples, sampling_method, return_samples=True, common_random_numbers=common_random_numbers)
+        return cls(calculator, result_tensor, samples[0] if common_random_numbers else samples, min_ess_share)
+
+    def _changed_columns(self, changes: Dict[str, Union[EmissionFactor, Dict]]):
+        """Emission factor indices and their modified means and COVs."""
+        columns, means, covs = [], [], []
+        for material, change in changes.items():
+            indices = [k for k, ef in enumerate(self.calculator.emission_factors) if ef.material == material]
+            if not indices:
+                raise ValueError(f"Unknown emission factor: {material}")
+            for k in indices:
+                ef = self.calculator.emission_factors[k]
+                modified = change if isinstance(change, EmissionFactor) else dataclasses.replace(ef, **change)
+                columns.append(k)
+                means.append([getattr(modified, field) for field in MEAN_FIELDS])
+                covs.append(modified.cov)
+        return np.array(columns, dtype=int), np.array(means, dtype=float), np.array(covs, dtype=float)[:, np.newaxis]
+
+    def weights(self, changes: Dict[str, Union[EmissionFactor, Dict]]) -> np.ndarray:
+        """
+        Likelihood ratios of the stored samples under the modified distributions.
+
+        Parameters:
+        - changes: Dictionary mapping a material to a modified EmissionFactor or to the changed fields,
+          e.g. {'cemI': {'cov': 0.3}, 'bitumen': {'mean_total': 0.9 * bitumen.mean_total}}.
+
+        Returns:
+        - weights: Array (design option, impact category, sample), normalized to a mean of 1.
+        """
+        n_sample_sets, n_samples, _, n_categories = self.samples.shape
+        if not changes:
+            return np.ones((len(self._sample_set), n_categories, n_samples))
+        columns, means, covs = self._changed_columns(changes)
+        new = distribution_parameters(means, np.broadcast_to(covs, means.shape))
+        old = tuple(parameter[columns] for parameter in self._baseline)
+        old_degenerate, new_degenerate = old[2] == 0, new[2] == 0
+        unchanged = (old[0] == new[0]) & (old[1] == new[1]) & (old[2] == new[2])
+        if np.any((old_degenerate | new_degenerate) & ~unchanged):
+            materials = sorted({self.calculator.emission_factors[k].material for k in columns[np.any((old_degenerate | new_degenerate) & ~unchanged, axis=1)]})
+            raise ValueError(f"Distributions without variance cannot be reweighted: {', '.join(materials)}")
+
+        ## only the columns that change contribute to the log likelihood ratio
+        active = ~unchanged                                     # (changed emission factor, category)
+        x = self.samples[:, :, columns, :]                      # (sample set, sample, changed emission factor, category)
+        safe = [np.where(active, parameter, fallback) for parameter, fallback in zip(new, (False, 0.0, 1.0))]
+        safe_old = [np.where(active, parameter, fallback) for parameter, fallback in zip(old, (False, 0.0, 1.0))]
+        log_ratio = np.where(active, log_density(x, *safe) - log_density(x, *safe_old), 0.0).sum(axis=2)   # (sample set, sample, category)
+        log_ratio -= log_ratio.max(axis=1, keepdims=True)
+        weights = np.exp(log_ratio)
+        weights /= weights.mean(axis=1, keepdims=True)
+        return weights[self._sample_set].transpose(0, 2, 1)
+
+    def _selection(self, design_option, stage, category):
+        """Indices, sorted outputs and weight indices of the selected series (cached per selection)."""
+        key = (design_option, stage, category)
+        if key not in self._selections:
+            labels = [self.result_tensor.design_options, self.result_tensor.stages + [TOTAL_STAGE], self.result_tensor.categories]
+            idx = [np.arange(len(names)) if value is None else np.array([list(names).index(value)]) for names, value in zip(labels, key)]
+            grid = np.ix_(*idx)
+            self._selections[key] = (idx, self._sorted_outputs[grid], self._weight_index[grid])
+        return self._selections[key]
+
+    def evaluate(self, changes: Dict[str, Union[EmissionFactor, Dict]], design_option: Optional[str] = None, stage: Optional[str] = None, category: Optional[str] = None) -> pd.DataFrame:
+        """
+        Reweighted statistics of every design option, life cycle stage (and total) and impact category.
+
+        Parameters:
+        - changes: Modified emission factors (see `weights`).
+        - design_option, stage, category: Optional filters; only the selected series are evaluated.
+
+        Returns:
+        - df: Pandas DataFrame with 'Mean', 'STD', 'COV', the percentiles of general.statistical_results.PERCENTILES,
+          the effective sample size 'ESS', the 'ESS Share' of the stored samples and 'Reliable' (ESS share >= min_ess_share).
+        """
+        (design_option_idx, stage_idx, category_idx), sorted_outputs, weight_index = self._selection(design_option, stage, category)
+        weights = self.weights(changes)                          # (design option, category, sample)
+        ess = weights.sum(axis=-1) ** 2 / (weights ** 2).sum(axis=-1)
+        sorted_weights = np.take(weights.ravel(), weight_index)
+
+        total = sorted_weights.sum(axis=-1)
+        mean = (sorted_weights * sorted_outputs).sum(axis=-1) / total
+        std = np.sqrt(np.maximum((sorted_weights * (sorted_outputs - mean[..., np.newaxis]) ** 2).sum(axis=-1) / total, 0.0))
+        quantiles = weighted_quantiles(sorted_outputs, sorted_weights, [q / 100 for q in PERCENTILES.values()])
+        ess = np.broadcast_to(ess[np.ix_(design_option_idx, category_idx)][:, np.newaxis], mean.shape)
+
+        stages = np.asarray(self.result_tensor.stages + [TOTAL_STAGE], dtype=object)
+        d, s, c = np.indices(mean.shape).reshape(3, -1)
+        df = pd.DataFrame({
+            'Design Option': np.asarray(self.result_tensor.design_options, dtype=object)[design_option_idx[d]],
+            'Life Cycle Stage': stages[stage_idx[s]],
+            'Impact Category': np.asarray(self.result_tensor.categories, dtype=object)[category_idx[c]],
+            'Mean': mean.ravel(),
+            'STD': std.ravel(),
+            'COV': np.divide(std, np.abs(mean), out=np.zeros_like(std), where=mean != 0).ravel(),
+        })
+        for name, quantile in zip(PERCENTILES, quantiles):
+            df[name] = quantile.ravel()
+        df['ESS'] = ess.ravel()
+        df['ESS Share'] = ess.ravel() / self.result_tensor.n_samples
+        df['Reliable'] = df['ESS Share'] >= self.min_ess_share
+        return df
+
+    def evaluate_scenarios(self, scenarios: Dict[str, Dict], design_option: Optional[str] = None, stage: Optional[str] = TOTAL_STAGE, category: Optional[str] = None) -> pd.DataFrame:
+        """
+        Evaluate many what-if scenarios.
+
+        Parameters:
+        - scenarios: Dictionary mapping a scenario name to its changes (see `weights`); {} is the stored run itself.
+        - design_option, stage, category: Optional filters (default: the totals over all stages).
+
+        Returns:
+        - df: The tables of `evaluate` with a leading 'Scenario' column.
+        """
+        frames = []
+        for name, changes in scenarios.items():
+            df = self.evaluate(changes, design_option, stage, category)
+            df.insert(0, 'Scenario', name)
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,127 @@
+import json
+import os
+from dataclasses import asdict
+from typing import List, Optional
+import numpy as np
+import openturns as ot
+from models.models import EmissionFactor
+from models.results import IMPACT_CATEGORIES
+from calculator.sampling import SAMPLING_METHODS, block_seed
+from general.checkpoint import settings_fingerprint
+
+## Persistent sample banks: the emission factor samples of a background database catalog, drawn once for a seed and a
+## sampling method and stored as a memory-mapped .npy file (sample, emission factor, impact category) next to
+## bank.json. Runs of any project evaluate against slices of the bank
+## (DesignOptionProbabilisticLCACalculator.calculate_bank_impact) instead of building distributions and sampling, so
+## projects that use the same catalog see the same emission factor samples.
+##
+## The bank is drawn in blocks like calculator.shards.run_blocks with common random numbers, so its first
+## B * block_size samples are the emission factor samples of that sharded run.
+
+BANK_NAME = "bank.json"
+SAMPLES_NAME = "samples.npy"
+
+
+class SampleBank:
+    """
+    A sample bank directory opened for reading. `samples` is a read-only memory map, slices are only loaded when used.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        path = os.path.join(directory, BANK_NAME)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No sample bank in {directory} (missing {BANK_NAME}).")
+        with open(path, encoding="utf-8") as f:
+            self.metadata = json.load(f)
+        self.samples = np.load(os.path.join(directory, SAMPLES_NAME), mmap_mode='r')
+        self.emission_factors = [EmissionFactor(**ef) for ef in self.metadata['emission_factors']]
+
+    @property
+    def n_samples(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def catalog_version(self) -> str:
+        return self.metadata['catalog_version']
+
+    def columns(self, emission_factors: List[EmissionFactor]) -> np.ndarray:
+        """
+        Bank column of every emission factor of a project (matched by material, first match as in the stage models).
+        Raises a ValueError if a material is missing in the bank or its distribution differs from the bank's catalog.
+        """
+        index = {}
+        for k, ef in enumerate(self.emission_factors):
+            index.setdefault(ef.material, k)
+        columns = []
+        for ef in emission_factors:
+            if ef.material not in index:
+                raise ValueError(f"Material '{ef.material}' is not in the sample bank {self.directory} (catalog {self.catalog_version}).")
+            bank_ef = self.emission_factors[index[ef.material]]
+            if asdict(bank_ef) != asdict(ef):
+                raise ValueError(f"The distribution of '{ef.material}' differs from the sample bank {self.directory} (catalog {self.catalog_version}).")
+            columns.append(index[ef.material])
+        return np.array(columns, dtype=int)
+
+    def get_samples(self, emission_factors: List[EmissionFactor], start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Samples start..stop-1 of the given emission factors: array (sample, emission factor, impact category)."""
+        stop = self.n_samples if stop is None else stop
+        if not 0 <= start < stop <= self.n_samples:
+            raise ValueError(f"Samples {start} to {stop - 1} are outside the sample bank ({self.n_samples} samples).")
+        columns = self.columns(emission_factors)
+        if np.array_equal(columns, np.arange(self.samples.shape[1])):
+            return np.asarray(self.samples[start:stop])
+        return self.samples[start:stop][:, columns]
+
+
+def create_sample_bank(directory: str, calculator, n_samples: int, seed: int = 0, sampling_method: str = "monte_carlo", block_size: int = 10000, catalog_version: Optional[str] = None) -> SampleBank:
+    """
+    Draw a sample bank for the emission factor catalog of a calculator and write it to directory.
+
+    Parameters:
+    - directory: Output directory (bank.json and samples.npy).
+    - calculator: DesignOptionProbabilisticLCACalculator with the complete emission factor catalog of a database.
+    - n_samples: Number of samples (a multiple of block_size).
+    - seed: Base seed; block b is drawn with calculator.sampling.block_seed(seed, b).
+    - sampling_method: One of calculator.sampling.SAMPLING_METHODS (LHS and QMC designs are randomized per block).
+    - block_size: Number of samples drawn at a time.
+    - catalog_version: Label of the catalog (default: hash of the emission factor distributions).
+
+    Returns:
+    - bank: The SampleBank opened for reading.
+    """
+    if sampling_method not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown sampling method: {sampling_method}")
+    if n_samples % block_size:
+        raise ValueError(f"n_samples ({n_samples}) must be a multiple of block_size ({block_size}).")
+    emission_factors = [asdict(ef) for ef in calculator.emission_factors]
+    os.makedirs(directory, exist_ok=True)
+    ## bank.json is written last, so an interrupted generation never looks like a complete bank
+    bank_path = os.path.join(directory, BANK_NAME)
+    if os.path.exists(bank_path):
+        os.remove(bank_path)
+
+    samples = np.lib.format.open_memmap(os.path.join(directory, SAMPLES_NAME), mode='w+', dtype=float, shape=(n_samples, len(emission_factors), len(IMPACT_CATEGORIES)))
+    rng_state = ot.RandomGenerator.GetState()
+    try:
+        with calculator._phase("sample_bank_generation", n_samples=n_samples, items=n_samples // block_size):
+            for block in range(n_samples // block_size):
+                ot.RandomGenerator.SetSeed(block_seed(seed, block))
+                samples[block * block_size:(block + 1) * block_size] = calculator.sample_emission_factors(block_size, sampling_method)
+        samples.flush()
+    finally:
+        ot.RandomGenerator.SetState(rng_state)
+    del samples
+
+    metadata = {
+        'catalog_version': catalog_version or settings_fingerprint({'emission_factors': emission_factors})[:16],
+        'seed': seed,
+        'sampling_method': sampling_method,
+        'block_size': block_size,
+        'n_samples': n_samples,
+        'emission_factors': emission_factors,
+    }
+    with open(bank_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=4)
+    print(f"Sample bank with {n_samples} samples saved to {directory}")
+    return SampleBank(directory)
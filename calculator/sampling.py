@@ -0,0 +1,86 @@
+import numpy as np
+import openturns as ot
+
+## Sampling strategies for the emission factor distributions
+## - monte_carlo: independent random draws (the original behaviour of the calculators)
+## - latin_hypercube: randomized Latin hypercube design
+## - sobol / halton: randomly shifted low-discrepancy sequences (randomized quasi-Monte Carlo)
+SAMPLING_METHODS = ['monte_carlo', 'latin_hypercube', 'sobol', 'halton']
+
+
+def block_seed(seed: int, block: int) -> int:
+    """Seed of the random substream of sample block `block` of a run with the base seed `seed` (see calculator.shards)."""
+    return int(np.random.SeedSequence([seed, block]).generate_state(1)[0])
+
+
+def distribution_parameters(means: np.ndarray, covs: np.ndarray):
+    """
+    Parameters of `get_lognormal_distribution` for arrays of means and COVs: lognormal (mu, sigma) for positive means,
+    normal (mean, std) otherwise.
+
+    Returns:
+    - lognormal: Boolean array, True for lognormal columns.
+    - loc, scale: mu and sigma of the lognormal or mean and std of the normal distributions.
+    """
+    lognormal = means > 0
+    sigma = np.sqrt(np.log1p(covs ** 2))
+    mu = np.log(np.where(lognormal, means, 1.0)) - 0.5 * sigma ** 2
+    return lognormal, np.where(lognormal, mu, means), np.where(lognormal, sigma, covs * np.abs(means))
+
+
+def draw_mixture_components(weights: np.ndarray, n_samples: int) -> np.ndarray:
+    """
+    Draw the mixture component of every sample and column with the OpenTURNS random generator.
+
+    Parameters:
+    - weights: Array (column, component) of non-negative weights, every row sums to 1.
+    - n_samples: Number of samples.
+
+    Returns:
+    - components: Integer array (sample, column); components with weight 0 are never drawn.
+    """
+    n_columns = len(weights)
+    uniforms = np.asarray(ot.RandomGenerator.Generate(n_samples * n_columns)).reshape(n_samples, n_columns)
+    cumulative = np.cumsum(weights, axis=1)
+    ## a threshold is only passed if some weight is left after it (rounding must not reach trailing empty components)
+    remaining = np.cumsum(weights[:, ::-1], axis=1)[:, ::-1]
+    thresholds = np.where(remaining[:, 1:] > 0, cumulative[:, :-1], np.inf)
+    return (uniforms[..., np.newaxis] >= thresholds).sum(axis=-1)
+
+
+def get_joint_distribution(distributions):
+    """Return the joint distribution of independent marginals."""
+    if hasattr(ot, 'JointDistribution'):
+        return ot.JointDistribution(distributions)
+    return ot.ComposedDistribution(distributions)  # OpenTURNS < 1.24
+
+
+def sample_distributions(distributions, n_samples: int, sampling_method: str = "monte_carlo"):
+    """
+    Draw a sample from independent marginal distributions.
+
+    Parameters:
+    - distributions: List of OpenTURNS distributions (one per column).
+    - n_samples: Number of samples.
+    - sampling_method: One of SAMPLING_METHODS.
+
+    Returns:
+    - ot_samples: OpenTURNS Sample of size n_samples x len(distributions).
+    """
+    if sampling_method == "monte_carlo":
+        ## column by column, so that a fixed seed reproduces the results of earlier versions
+        ot_samples = ot.Sample(n_samples, len(distributions))
+        for i in range(len(distributions)):
+            ot_samples[:, i] = distributions[i].getSample(n_samples)
+        return ot_samples
+
+    joint_distribution = get_joint_distribution(distributions)
+    if sampling_method == "latin_hypercube":
+        experiment = ot.LHSExperiment(joint_distribution, n_samples, False, True)
+    elif sampling_method in ("sobol", "halton"):
+        sequence = ot.SobolSequence(len(distributions)) if sampling_method == "sobol" else ot.HaltonSequence(len(distributions))
+        experiment = ot.LowDiscrepancyExperiment(sequence, joint_distribution, n_samples, True)
+        experiment.setRandomize(True)
+    else:
+        raise ValueError(f"Unknown sampling method: {sampling_method}")
+    return experiment.generate()
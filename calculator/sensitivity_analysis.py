@@ -0,0 +1,82 @@
+import numpy as np
+import openturns as ot
+import pandas as pd
+from models.results import IMPACT_CATEGORIES
+from calculator.sampling import get_joint_distribution
+
+## Variance-based global sensitivity analysis (Sobol indices) of the design option results with respect to the
+## emission factors. The Saltelli-type estimators need (d + 2) x N model evaluations for d emission factors, so the
+## model is the linear model of calculator.linear_model evaluated on the whole input design in one matrix product.
+
+SENSITIVITY_ALGORITHMS = {
+    'saltelli': ot.SaltelliSensitivityAlgorithm,
+    'martinez': ot.MartinezSensitivityAlgorithm,
+    'jansen': ot.JansenSensitivityAlgorithm,
+    'mauntz_kucherenko': ot.MauntzKucherenkoSensitivityAlgorithm,
+}
+
+def get_batch_model(coefficients) -> ot.Function:
+    """OpenTURNS function evaluating all outputs for a whole sample of emission factors in one matrix product."""
+    n_outputs, n_inputs = coefficients.shape
+    return ot.PythonFunction(n_inputs, n_outputs, func_sample=lambda X: np.asarray(X) @ coefficients.T)
+
+
+def calculate_sobol_indices(calculator, n_samples: int = 1000, algorithm: str = "saltelli", impact_categories=None) -> pd.DataFrame:
+    """
+    Estimate the first-order and total Sobol indices of every emission factor for each design option,
+    life cycle stage (and the total over all stages) and impact category.
+
+    The impact categories are sampled from independent distributions and every category only depends on its
+    own emission factor column, so each category is one analysis with one input per emission factor.
+    Emission factors that do not enter an output get indices close to zero (up to the estimator noise).
+
+    Parameters:
+    - calculator: DesignOptionProbabilisticLCACalculator defining the design options and emission factor distributions.
+    - n_samples: Base size N of the Sobol experiment; the model is evaluated (number of emission factors + 2) x N times.
+    - algorithm: Estimator, one of SENSITIVITY_ALGORITHMS.
+    - impact_categories: Impact categories to analyse (default: all).
+
+    Returns:
+    - df: Pandas DataFrame with one row per design option, life cycle stage, impact category and emission factor,
+      with the 'First Order' and 'Total Order' indices and the 'Variance' of the output.
+    """
+    if algorithm not in SENSITIVITY_ALGORITHMS:
+        raise ValueError(f"Unknown sensitivity algorithm: {algorithm}")
+    impact_categories = impact_categories or IMPACT_CATEGORIES
+    model = calculator.get_linear_model()
+    coefficients, labels = model.output_coefficients()
+    batch_model = get_batch_model(coefficients)
+    n_emission_factors = model.n_emission_factors
+
+    with calculator.metrics.phase("distribution_construction", items=4 * n_emission_factors):
+        distributions = calculator._get_emission_factor_distributions()
+
+    records = []
+    for category in impact_categories:
+        c = IMPACT_CATEGORIES.index(category)
+        category_distributions = distributions[c::len(IMPACT_CATEGORIES)]
+        with calculator.metrics.phase("sobol_indices", n_samples=n_samples * (n_emission_factors + 2), items=len(labels)):
+            input_design = ot.SobolIndicesExperiment(get_joint_distribution(category_distributions), n_samples, False).generate()
+            output_design = batch_model(input_design)
+            estimator = SENSITIVITY_ALGORITHMS[algorithm](input_design, output_design, n_samples)
+            variances = np.asarray(output_design).var(axis=0)
+
+            for j, (design_option, stage) in enumerate(labels):
+                if variances[j] > 0:
+                    first_order = np.asarray(estimator.getFirstOrderIndices(j))
+                    total_order = np.asarray(estimator.getTotalOrderIndices(j))
+                else:
+                    ## constant output (e.g. a stage without uncertain inputs), the indices are undefined
+                    first_order = total_order = np.full(n_emission_factors, np.nan)
+                for k, emission_factor in enumerate(model.emission_factors):
+                    records.append({
+                        'Design Option': design_option,
+                        'Life Cycle Stage': stage,
+                        'Impact Category': category,
+                        'Emission Factor': emission_factor,
+                        'First Order': first_order[k],
+                        'Total Order': total_order[k],
+                        'Variance': variances[j],
+                    })
+
+    return pd.DataFrame(records)
@@ -0,0 +1,282 @@
+""" sharded probabilistic runs: independent processes on any number of machines, merged through a shared directory
+
+Every run is a sequence of blocks of `block_size` samples, and block b always draws from the substream seeded with
+block_seed(seed, b). Shard i evaluates the blocks of the samples [i * samples_per_shard, (i + 1) * samples_per_shard)
+and writes them to <output_dir>/<database>_shard_<i>.npz, so adding a node only means starting one more shard index.
+Merging the shards 0..k-1 gives exactly the result tensor (and statistics) of `run_blocks` over all blocks in one process.
+
+Run from the repository root, e.g. on every node (with its own --shard):
+    python -m calculator.shards run --database ecoinvent --shard 0 --samples-per-shard 100000 --output-dir /shared/run
+and once all shards are written:
+    python -m calculator.shards merge --database ecoinvent --input-dir /shared/run --json results/ecoinvent_results.json --csv results/stat_results_ecoinvent.csv
+A complete run in one file (shard 0, or `merge --run-file`) can later be extended with more samples:
+    python -m calculator.shards extend --database ecoinvent --run-file /shared/run/ecoinvent_run.npz --samples 200000 --json results/ecoinvent_results.json
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+from typing import List, Optional
+import numpy as np
+import openturns as ot
+
+from calculator.do_probabilistic_lca_calculator import DesignOptionProbabilisticLCACalculator
+from calculator.sampling import SAMPLING_METHODS, block_seed
+from general.checkpoint import settings_fingerprint
+from general.generate_designs import create_layers, create_design_options, create_emission_factors
+from general.load_input import load_data
+from general.save_json import save_statistical_table_to_json
+from general.statistical_results import calculate_statistical_table_life_cycle_stages
+from models.results import ResultTensor
+
+LAYERS_PATH = "data/layers.json"
+DESIGN_OPTIONS_PATH = "data/design_options.json"
+DATABASES = {
+    'ecoinvent': "data/ecoinvent_background_data.json",
+    'national': "data/national_background_data.json",
+    'epd': "data/epd_background_data.json",
+}
+LENGTH_ROAD = 3.39
+
+
+def run_blocks(calculator: DesignOptionProbabilisticLCACalculator, blocks, block_size: int = 1000, seed: int = 0, sampling_method: str = "monte_carlo", common_random_numbers: bool = False) -> ResultTensor:
+    """
+    Evaluate the given blocks with the vectorized engine and concatenate them along the sample axis.
+
+    Parameters:
+    - calculator: DesignOptionProbabilisticLCACalculator of one database.
+    - blocks: Block indices, e.g. range(n_samples // block_size) for a complete single-node run.
+    - block_size: Number of samples per block.
+    - seed: Base seed of the run.
+    - sampling_method: One of calculator.sampling.SAMPLING_METHODS (randomized designs are drawn per block).
+    - common_random_numbers: Evaluate all design options on the same samples (see calculate_vectorized_impact).
+
+    Returns:
+    - result_tensor: ResultTensor with len(blocks) * block_size samples.
+    """
+    block_tensors = []
+    for block in blocks:
+        ot.RandomGenerator.SetSeed(block_seed(seed, block))
+        with contextlib.redirect_stdout(io.StringIO()):
+            block_tensors.append(calculator.calculate_vectorized_impact(block_size, sampling_method, common_random_numbers=common_random_numbers))
+    return ResultTensor(
+        design_options=block_tensors[0].design_options,
+        layers=block_tensors[0].layers,
+        values=np.concatenate([result_tensor.values for result_tensor in block_tensors], axis=-1),
+        paired=common_random_numbers
+    )
+
+
+def shard_blocks(shard_index: int, samples_per_shard: int, block_size: int = 1000) -> range:
+    """Blocks of shard `shard_index`."""
+    if samples_per_shard % block_size:
+        raise ValueError(f"The number of samples ({samples_per_shard}) must be a multiple of the block size ({block_size}).")
+    blocks_per_shard = samples_per_shard // block_size
+    return range(shard_index * blocks_per_shard, (shard_index + 1) * blocks_per_shard)
+
+
+def _shard_metadata(calculator, blocks, block_size, seed, sampling_method, common_random_numbers):
+    settings = calculator._run_settings(block_size, sampling_method)
+    settings.update(seed=seed, common_random_numbers=common_random_numbers)
+    return {
+        'fingerprint': settings_fingerprint(settings),
+        'blocks': [blocks.start, blocks.stop],
+        'block_size': block_size,
+        'seed': seed,
+        'sampling_method': sampling_method,
+        'paired': common_random_numbers,
+    }
+
+
+def _write_shard(path: str, result_tensor: ResultTensor, metadata: dict):
+    metadata = dict(metadata, design_options=result_tensor.design_options, layers=result_tensor.layers)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    ## write to a temporary file first, so that a merge never reads a half-written shard
+    temporary_path = path + ".tmp.npz"
+    np.savez_compressed(temporary_path, values=result_tensor.values, metadata=json.dumps(metadata))
+    os.replace(temporary_path, path)
+
+
+def run_shard(calculator: DesignOptionProbabilisticLCACalculator, output_path: str, shard_index: int, samples_per_shard: int, block_size: int = 1000, seed: int = 0, sampling_method: str = "monte_carlo", common_random_numbers: bool = False) -> ResultTensor:
+    """
+    Run one shard and write its raw samples and metadata to output_path (.npz, compressed).
+    Shard 0 with samples_per_shard = n_samples is a complete run in one file, which `extend_run` can extend.
+
+    Returns:
+    - result_tensor: ResultTensor of the shard.
+    """
+    blocks = shard_blocks(shard_index, samples_per_shard, block_size)
+    with calculator._phase("shard_run", n_samples=samples_per_shard * len(calculator.design_options), items=len(blocks)):
+        result_tensor = run_blocks(calculator, blocks, block_size, seed, sampling_method, common_random_numbers)
+    _write_shard(output_path, result_tensor, _shard_metadata(calculator, blocks, block_size, seed, sampling_method, common_random_numbers))
+    print(f"Shard {shard_index} (samples {blocks.start * block_size} to {blocks.stop * block_size - 1}) saved to {output_path}")
+    return result_tensor
+
+
+def extend_run(calculator: DesignOptionProbabilisticLCACalculator, path: str, n_samples: int) -> ResultTensor:
+    """
+    Extend a stored run (a file of `run_shard` starting at sample 0, or of `merge_shards` with run_path) to n_samples.
+
+    Only the new blocks are evaluated, with their own substreams, and appended to the file, so the extended run is
+    identical to a run that requested n_samples in the first place.
+
+    Parameters:
+    - calculator: DesignOptionProbabilisticLCACalculator with the inputs of the stored run.
+    - path: Run file; it is replaced by the extended run.
+    - n_samples: Total number of samples after the extension (a multiple of the block size of the run).
+
+    Returns:
+    - result_tensor: ResultTensor of the extended run.
+    """
+    metadata, result_tensor = load_shard(path)
+    start, stop = metadata['blocks']
+    block_size = metadata['block_size']
+    if start != 0:
+        raise ValueError(f"{path} is a shard starting at block {start}; only complete runs can be extended.")
+    expected = _shard_metadata(calculator, range(start, stop), block_size, metadata['seed'], metadata['sampling_method'], metadata['paired'])
+    if expected['fingerprint'] != metadata['fingerprint']:
+        raise ValueError(f"{path} belongs to a run with different inputs or settings.")
+    blocks = shard_blocks(0, n_samples, block_size)
+    if blocks.stop <= stop:
+        print(f"{path} already has {result_tensor.n_samples} samples")
+        return result_tensor
+
+    with calculator._phase("extend_run", n_samples=(blocks.stop - stop) * block_size * len(calculator.design_options), items=blocks.stop - stop):
+        extension = run_blocks(calculator, range(stop, blocks.stop), block_size, metadata['seed'], metadata['sampling_method'], metadata['paired'])
+    result_tensor = ResultTensor(
+        design_options=result_tensor.design_options,
+        layers=result_tensor.layers,
+        values=np.concatenate([result_tensor.values, extension.values], axis=-1),
+        paired=result_tensor.paired
+    )
+    _write_shard(path, result_tensor, dict(metadata, blocks=[0, blocks.stop]))
+    print(f"Run extended from {stop * block_size} to {blocks.stop * block_size} samples in {path}")
+    return result_tensor
+
+
+def load_shard(path: str):
+    """Metadata and ResultTensor of a shard file."""
+    with np.load(path) as shard:
+        metadata = json.loads(str(shard['metadata']))
+        values = shard['values']
+    result_tensor = ResultTensor(design_options=metadata['design_options'], layers=metadata['layers'], values=values, paired=metadata['paired'])
+    return metadata, result_tensor
+
+
+def merge_shards(paths: List[str], run_path: Optional[str] = None) -> ResultTensor:
+    """
+    Merge shard files into the ResultTensor of the complete run.
+
+    The shards must come from the same inputs and settings and cover the blocks 0..B-1 exactly once
+    (in any order of the paths), otherwise a ValueError names the problem.
+    With run_path the merged run is also saved as one file (e.g. to extend it later with `extend_run`).
+    """
+    if not paths:
+        raise ValueError("No shard files to merge.")
+    shards = sorted((load_shard(path) + (path,) for path in paths), key=lambda shard: shard[0]['blocks'][0])
+    fingerprints = {metadata['fingerprint'] for metadata, _, _ in shards}
+    if len(fingerprints) > 1:
+        raise ValueError("The shards belong to runs with different inputs or settings.")
+
+    next_block = 0
+    for metadata, _, path in shards:
+        start, stop = metadata['blocks']
+        if start != next_block:
+            problem = "missing" if start > next_block else "overlapping"
+            raise ValueError(f"Blocks {min(start, next_block)} to {max(start, next_block) - 1} are {problem} before {path}.")
+        next_block = stop
+
+    result_tensor = ResultTensor(
+        design_options=shards[0][1].design_options,
+        layers=shards[0][1].layers,
+        values=np.concatenate([result_tensor.values for _, result_tensor, _ in shards], axis=-1),
+        paired=shards[0][1].paired
+    )
+    if run_path:
+        _write_shard(run_path, result_tensor, dict(shards[0][0], blocks=[0, next_block]))
+    return result_tensor
+
+
+def shard_path(output_dir: str, database: str, shard_index: int) -> str:
+    return os.path.join(output_dir, f"{database}_shard_{shard_index}.npz")
+
+
+def find_shards(input_dir: str, database: str) -> List[str]:
+    pattern = re.compile(rf"{re.escape(database)}_shard_(\d+)\.npz$")
+    return sorted((path for path in glob.glob(os.path.join(input_dir, f"{database}_shard_*.npz")) if pattern.search(path)), key=lambda path: int(pattern.search(path).group(1)))
+
+
+def export_statistics(result_tensor: ResultTensor, json_path: Optional[str] = None, csv_path: Optional[str] = None):
+    """Statistical table of a (merged) run, saved like the results of app.py."""
+    statistical_table = calculate_statistical_table_life_cycle_stages(result_tensor)
+    if json_path:
+        save_statistical_table_to_json(statistical_table, json_path)
+    if csv_path:
+        statistical_table.to_csv(csv_path, index=False)
+        print(f"CSV saved to {csv_path}")
+    return statistical_table
+
+
+def _create_calculator(database_path: str) -> DesignOptionProbabilisticLCACalculator:
+    layers_data, emission_factors_data, design_options_data = load_data(LAYERS_PATH, [database_path], DESIGN_OPTIONS_PATH)
+    layers = create_layers(layers_data)
+    return DesignOptionProbabilisticLCACalculator(
+        layers=layers,
+        emission_factors=create_emission_factors(emission_factors_data[0]),
+        design_options=create_design_options(layers, design_options_data),
+        length_road=LENGTH_ROAD
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded probabilistic LCA runs.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run one shard.")
+    run_parser.add_argument('--database', choices=list(DATABASES), required=True)
+    run_parser.add_argument('--shard', type=int, required=True, help="Shard index (0, 1, ...).")
+    run_parser.add_argument('--samples-per-shard', type=int, required=True)
+    run_parser.add_argument('--block-size', type=int, default=1000)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--sampling-method', choices=SAMPLING_METHODS, default='monte_carlo')
+    run_parser.add_argument('--common-random-numbers', action='store_true')
+    run_parser.add_argument('--output-dir', required=True, help="Shared directory of the shard files.")
+
+    merge_parser = subparsers.add_parser('merge', help="Merge all shards of a database.")
+    merge_parser.add_argument('--database', choices=list(DATABASES), required=True)
+    merge_parser.add_argument('--input-dir', required=True)
+    merge_parser.add_argument('--json', help="Write the statistical table to this JSON file.")
+    merge_parser.add_argument('--csv', help="Write the statistical table to this CSV file.")
+    merge_parser.add_argument('--run-file', help="Also save the merged run as one file (for `extend`).")
+
+    extend_parser = subparsers.add_parser('extend', help="Extend a complete run file with more samples.")
+    extend_parser.add_argument('--database', choices=list(DATABASES), required=True)
+    extend_parser.add_argument('--run-file', required=True)
+    extend_parser.add_argument('--samples', type=int, required=True, help="Total number of samples after the extension.")
+    extend_parser.add_argument('--json', help="Write the statistical table to this JSON file.")
+    extend_parser.add_argument('--csv', help="Write the statistical table to this CSV file.")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        calculator = _create_calculator(DATABASES[args.database])
+        run_shard(
+            calculator, shard_path(args.output_dir, args.database, args.shard), args.shard, args.samples_per_shard,
+            args.block_size, args.seed, args.sampling_method, args.common_random_numbers
+        )
+    elif args.command == 'extend':
+        result_tensor = extend_run(_create_calculator(DATABASES[args.database]), args.run_file, args.samples)
+        export_statistics(result_tensor, args.json, args.csv)
+    else:
+        paths = find_shards(args.input_dir, args.database)
+        result_tensor = merge_shards(paths, args.run_file)
+        print(f"Merged {len(paths)} shards ({result_tensor.n_samples} samples)")
+        statistical_table = export_statistics(result_tensor, args.json, args.csv)
+        if not args.json and not args.csv:
+            print(statistical_table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 from matplotlib.cm import tab20
+from models.results import STAGES, IMPACT_CATEGORIES, TOTAL_STAGE
 
 ## contribution analysis for A1 and GWP total
 def calculate_normalized_a1_contributions_multiple_emission_factors(design_options, layers, emission_factors_sets, stat_results_tables):
@@ -235,4 +238,123 @@ def plot_comparison_uncertainty_contributions(contributions_multiple):
 
     plt.suptitle("Uncertainty Contributions Comparison (A1)", fontsize=16)
     plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+
+## vectorized contribution analysis for all stages, impact categories and databases
+def _stage_and_total(array, stage_axis):
+    """Append the total over all stages to the stage axis of an array."""
+    return np.concatenate([array, array.sum(axis=stage_axis, keepdims=True)], axis=stage_axis)
+
+
+def calculate_contributions(calculators):
+    """
+    Calculate the mean and variance contributions per material and per layer for every database, design option,
+    life cycle stage (and the total over all stages) and impact category at once, from the linear model coefficients.
+
+    Materials are the emission factors of the background database, including the energy carriers (e.g. diesel).
+    Mean contributions are the expected impacts of a contributor, variance contributions are Cov(contributor, output):
+    for materials this is the exact share of the variance, for layers it splits the covariance of the shared
+    emission factors between the layers. Both shares sum to 1 per output.
+
+    Args:
+        calculators (dict): Dictionary of DesignOptionProbabilisticLCACalculator instances keyed by database name.
+
+    Returns:
+        pd.DataFrame: One row per database, design option, life cycle stage, impact category and contributor, with
+        the columns 'Level' ('Material' or 'Layer'), 'Contributor', 'Mean Contribution', 'Mean Share',
+        'Variance Contribution' and 'Variance Share'.
+    """
+    stages = STAGES + [TOTAL_STAGE]
+    frames = []
+    for db_name, calculator in calculators.items():
+        model = calculator.get_linear_model()
+        means, variances = calculator.get_emission_factor_moments()           # (emission factor, category)
+        coefficients = _stage_and_total(model.coefficients, stage_axis=2)     # (design option, layer, stage, emission factor)
+        output_coefficients = coefficients.sum(axis=1)                        # (design option, stage, emission factor)
+
+        ## material level: a_k * mean_k and a_k^2 * var_k
+        material_mean = output_coefficients[..., np.newaxis] * means
+        material_variance = output_coefficients[..., np.newaxis] ** 2 * variances
+        ## layer level: a_l . mean and Cov(Y_l, Y) = sum_k a_lk * a_k * var_k
+        layer_mean = np.einsum('dlsk,kc->dslc', coefficients, means)
+        layer_variance = np.einsum('dlsk,dsk,kc->dslc', coefficients, output_coefficients, variances)
+
+        output_mean = material_mean.sum(axis=2, keepdims=True)
+        output_variance = material_variance.sum(axis=2, keepdims=True)
+        for level, names, mean, variance in (
+            ('Material', lambda d: model.emission_factors, material_mean, material_variance),
+            ('Layer', lambda d: model.layers[d], layer_mean, layer_variance),
+        ):
+            mean_share = np.divide(mean, output_mean, out=np.zeros_like(mean), where=output_mean != 0)
+            variance_share = np.divide(variance, output_variance, out=np.zeros_like(variance), where=output_variance > 0)
+            for d, design_option in enumerate(model.design_options):
+                contributors = names(d)
+                ## rows in (stage, contributor, category) order
+                stage_idx, contributor_idx, category_idx = np.indices((len(stages), len(contributors), len(IMPACT_CATEGORIES))).reshape(3, -1)
+                frames.append(pd.DataFrame({
+                    'Database': db_name,
+                    'Design Option': design_option,
+                    'Life Cycle Stage': np.asarray(stages, dtype=object)[stage_idx],
+                    'Impact Category': np.asarray(IMPACT_CATEGORIES, dtype=object)[category_idx],
+                    'Level': level,
+                    'Contributor': np.asarray(contributors, dtype=object)[contributor_idx],
+                    'Mean Contribution': mean[d, :, :len(contributors)].ravel(),
+                    'Mean Share': mean_share[d, :, :len(contributors)].ravel(),
+                    'Variance Contribution': variance[d, :, :len(contributors)].ravel(),
+                    'Variance Share': variance_share[d, :, :len(contributors)].ravel(),
+                }))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def calculate_squared_src(calculators, n_samples=1000, sampling_method="monte_carlo"):
+    """
+    Calculate squared standardized regression coefficients (SRC^2) of the materials from sampled results.
+
+    The stage totals of every design option are regressed on its own emission factor samples (one least squares
+    solve per design option and impact category for all stages at once). R^2 close to 1 confirms that SRC^2 are
+    valid variance shares; for the linear stage models they converge to the 'Variance Share' of calculate_contributions.
+
+    Args:
+        calculators (dict): Dictionary of DesignOptionProbabilisticLCACalculator instances keyed by database name.
+        n_samples (int): Number of samples per design option.
+        sampling_method (str): Sampling method of calculator.sampling.
+
+    Returns:
+        pd.DataFrame: One row per database, design option, life cycle stage, impact category and material, with the
+        columns 'Squared SRC' and 'R2'.
+    """
+    stages = STAGES + [TOTAL_STAGE]
+    records = []
+    for db_name, calculator in calculators.items():
+        result_tensor, samples = calculator.calculate_vectorized_impact(n_samples, sampling_method, return_samples=True)
+        outputs = result_tensor.stage_and_overall_totals()     # (design option, stage, category, sample)
+        materials = [ef.material for ef in calculator.emission_factors]
+
+        for d, design_option in enumerate(result_tensor.design_options):
+            for c, category in enumerate(IMPACT_CATEGORIES):
+                X = samples[d, :, :, c]                 # (sample, emission factor)
+                Y = outputs[d, :, c, :].T               # (sample, stage)
+                x_std, y_std = X.std(axis=0), Y.std(axis=0)
+                uncertain = x_std > 0
+                X_standardized = (X[:, uncertain] - X[:, uncertain].mean(axis=0)) / x_std[uncertain]
+                Y_standardized = np.divide(Y - Y.mean(axis=0), y_std, out=np.zeros_like(Y), where=y_std > 0)
+                src = np.zeros((len(materials), len(stages)))
+                src[uncertain], *_ = np.linalg.lstsq(X_standardized, Y_standardized, rcond=None)
+                residuals = Y_standardized - X_standardized @ src[uncertain]
+                r2 = np.where(y_std > 0, 1 - residuals.var(axis=0), np.nan)
+
+                for s, stage in enumerate(stages):
+                    for k, material in enumerate(materials):
+                        records.append({
+                            'Database': db_name,
+                            'Design Option': design_option,
+                            'Life Cycle Stage': stage,
+                            'Impact Category': category,
+                            'Material': material,
+                            'Squared SRC': src[k, s] ** 2,
+                            'R2': r2[s],
+                        })
+
+    return pd.DataFrame(records)
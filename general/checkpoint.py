@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+from typing import Dict, List
+import numpy as np
+import openturns as ot
+from models.results import A1Result, A2Result, A3Result, A4Result, A5Result, STAGES, IMPACT_CATEGORIES
+
+## Checkpoints of long probabilistic runs (DesignOptionProbabilisticLCACalculator.calculate_do_probabilistic_impact).
+## Completed sample chunks of every design option and layer are written as small .npy files, and checkpoint.json records
+## the chunks together with the OpenTURNS RNG state before the sampling of every design option. A resumed run restores
+## that state, draws the samples of the interrupted design option again (identical draws) and only evaluates the samples
+## that are not on disk yet, so the result is bit-identical to an uninterrupted run.
+
+CHECKPOINT_NAME = "checkpoint.json"
+RESULT_CLASSES = [A1Result, A2Result, A3Result, A4Result, A5Result]
+
+
+def settings_fingerprint(settings: Dict) -> str:
+    """Hash of the settings of a run (see DesignOptionProbabilisticLCACalculator._run_settings)."""
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def results_to_array(iterations: List[Dict]) -> np.ndarray:
+    """Stage results of consecutive samples of one layer as array (stage, category, sample)."""
+    return np.array([[[getattr(iteration[f'{stage}_result'], category) for iteration in iterations] for category in IMPACT_CATEGORIES] for stage in STAGES], dtype=float)
+
+
+def array_to_results(values: np.ndarray, start: int = 0) -> List[Dict]:
+    """Inverse of `results_to_array`: one result dictionary per sample, numbered from `start`."""
+    iterations = []
+    for i in range(values.shape[-1]):
+        iteration = {'iteration': start + i}
+        for s, (stage, result_class) in enumerate(zip(STAGES, RESULT_CLASSES)):
+            iteration[f'{stage}_result'] = result_class(*(float(value) for value in values[s, :, i]))
+        iterations.append(iteration)
+    return iterations
+
+
+class RunCheckpoint:
+    """
+    Checkpoint directory of one probabilistic run.
+
+    - checkpoint.json: fingerprint of the run settings, RNG states and the list of completed chunks
+    - chunk_<design option>_<layer>_<start>_<stop>.npy: results (stage, category, sample) of the samples start..stop-1
+
+    Parameters:
+    - directory: Checkpoint directory (created if needed).
+    - settings: Run settings; resuming a checkpoint of a run with other settings raises a ValueError.
+    - resume: Continue from the checkpoint in the directory. Otherwise an existing checkpoint is discarded.
+    - every: Number of samples per chunk.
+    """
+
+    def __init__(self, directory: str, settings: Dict, resume: bool = False, every: int = 1000):
+        self.directory = directory
+        self.every = every
+        self.fingerprint = settings_fingerprint(settings)
+        self.rng_states: Dict[str, Dict] = {}
+        self.chunks: List[Dict] = []
+        os.makedirs(directory, exist_ok=True)
+
+        path = os.path.join(directory, CHECKPOINT_NAME)
+        if resume and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state['fingerprint'] != self.fingerprint:
+                raise ValueError(f"The checkpoint in {directory} belongs to a run with different settings.")
+            self.rng_states = state['rng_states']
+            self.chunks = state['chunks']
+            print(f"Resuming from checkpoint {directory} ({sum(chunk['stop'] - chunk['start'] for chunk in self.chunks)} completed layer samples)")
+        else:
+            for chunk in self._chunk_files():
+                os.remove(os.path.join(directory, chunk))
+            self._write()
+
+    def _chunk_files(self):
+        return [name for name in os.listdir(self.directory) if name.startswith("chunk_") and name.endswith(".npy")]
+
+    def _write(self):
+        """Write checkpoint.json atomically (a killed process leaves the previous version)."""
+        path = os.path.join(self.directory, CHECKPOINT_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({'fingerprint': self.fingerprint, 'rng_states': self.rng_states, 'chunks': self.chunks}, f)
+        os.replace(path + ".tmp", path)
+
+    def sync_rng_state(self, design_option_idx: int):
+        """
+        Restore the recorded RNG state before the sampling of a design option, or record the current one. Called before
+        and after the sampling of every design option, so that completed design options can be skipped on resume.
+        """
+        key = str(design_option_idx)
+        if key in self.rng_states:
+            state = self.rng_states[key]
+            ot.RandomGenerator.SetState(ot.RandomGeneratorState(ot.Indices(state['buffer']), state['index']))
+        else:
+            state = ot.RandomGenerator.GetState()
+            self.rng_states[key] = {'buffer': list(state.getBuffer()), 'index': int(state.getIndex())}
+            self._write()
+
+    def is_complete(self, design_option_idx: int, n_layers: int, n_samples: int) -> bool:
+        """All samples of all layers of the design option are on disk (its sampling can be skipped)."""
+        return all(self.completed_samples(design_option_idx, layer_idx) == n_samples for layer_idx in range(n_layers))
+
+    def completed_samples(self, design_option_idx: int, layer_idx: int) -> int:
+        """Number of leading samples of a layer that are on disk."""
+        return max((chunk['stop'] for chunk in self._layer_chunks(design_option_idx, layer_idx)), default=0)
+
+    def _layer_chunks(self, design_option_idx, layer_idx):
+        return sorted((chunk for chunk in self.chunks if chunk['design_option'] == design_option_idx and chunk['layer'] == layer_idx), key=lambda chunk: chunk['start'])
+
+    def load_results(self, design_option_idx: int, layer_idx: int) -> List[Dict]:
+        """Result dictionaries of the completed samples of a layer."""
+        iterations = []
+        for chunk in self._layer_chunks(design_option_idx, layer_idx):
+            iterations.extend(array_to_results(np.load(os.path.join(self.directory, chunk['file'])), chunk['start']))
+        return iterations
+
+    def save_chunk(self, design_option_idx: int, layer_idx: int, iterations: List[Dict], start: int):
+        """Write the results of the samples start..start+len(iterations)-1 of a layer."""
+        if not iterations:
+            return
+        stop = start + len(iterations)
+        file_name = f"chunk_{design_option_idx}_{layer_idx}_{start}_{stop}.npy"
+        np.save(os.path.join(self.directory, file_name), results_to_array(iterations))
+        self.chunks.append({'design_option': design_option_idx, 'layer': layer_idx, 'start': start, 'stop': stop, 'file': file_name})
+        self._write()
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from models.results import TOTAL_STAGE
+
+## Decision metrics for comparing design options from paired samples, i.e. design options evaluated on the same
+## emission factor samples (DesignOptionProbabilisticLCACalculator.calculate_vectorized_impact(..., common_random_numbers=True)).
+## All metrics are vectorized over design options, life cycle stages (and the total), impact categories and samples;
+## the only Python loops are over databases and over the design options (or ranks) of one side of the comparison.
+
+DIFFERENCE_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def _outputs(result_tensor, db_name):
+    if not result_tensor.paired:
+        print(f"Warning: the results of '{db_name}' are not paired; the decision metrics assume independent design options.")
+    return result_tensor.stage_and_overall_totals()     # (design option, stage + total, category, sample)
+
+
+def _index_columns(result_tensor, shape):
+    """Index arrays of the flattened (design option, stage, category) grid of a comparison."""
+    stages = np.asarray(result_tensor.stages + [TOTAL_STAGE], dtype=object)
+    categories = np.asarray(result_tensor.categories, dtype=object)
+    design_option_idx, stage_idx, category_idx = np.indices(shape).reshape(3, -1)
+    return design_option_idx, stages[stage_idx], categories[category_idx]
+
+
+def calculate_pairwise_comparison(result_tensors) -> pd.DataFrame:
+    """
+    Compare every ordered pair of design options (A, B) from paired samples.
+
+    Parameters:
+    - result_tensors: Dictionary of ResultTensors keyed by database name.
+
+    Returns:
+    - df: Pandas DataFrame with one row per database, life cycle stage (and total), impact category and ordered pair of
+      design options, with 'P(A < B)' (probability that A has the lower impact), the 'Mean Difference' of A - B and
+      the percentiles of the difference A - B ('Difference P5', ..., 'Difference P95').
+    """
+    frames = []
+    for db_name, result_tensor in result_tensors.items():
+        outputs = _outputs(result_tensor, db_name)
+        design_options = np.asarray(result_tensor.design_options, dtype=object)
+        for a, design_option_a in enumerate(result_tensor.design_options):
+            ## A against all design options at once: (design option B, stage, category, sample)
+            differences = outputs[a][np.newaxis] - outputs
+            probability = (differences < 0).mean(axis=-1)
+            percentiles = np.percentile(differences, DIFFERENCE_PERCENTILES, axis=-1)
+
+            b_idx, stages, categories = _index_columns(result_tensor, probability.shape)
+            frame = pd.DataFrame({
+                'Database': db_name,
+                'Life Cycle Stage': stages,
+                'Impact Category': categories,
+                'Design Option A': design_option_a,
+                'Design Option B': design_options[b_idx],
+                'P(A < B)': probability.ravel(),
+                'Mean Difference': differences.mean(axis=-1).ravel(),
+            })
+            for q, percentile in zip(DIFFERENCE_PERCENTILES, percentiles):
+                frame[f'Difference P{q}'] = percentile.ravel()
+            frames.append(frame[b_idx != a])
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def calculate_rank_probabilities(result_tensors) -> pd.DataFrame:
+    """
+    Probability of every design option to take every rank (1 = lowest impact) among all design options.
+
+    Parameters:
+    - result_tensors: Dictionary of ResultTensors keyed by database name.
+
+    Returns:
+    - df: Pandas DataFrame with one row per database, life cycle stage (and total), impact category, design option
+      and rank, with the 'Probability' of the rank and the 'Expected Rank' of the design option.
+    """
+    frames = []
+    for db_name, result_tensor in result_tensors.items():
+        outputs = _outputs(result_tensor, db_name)
+        n_design_options = len(result_tensor.design_options)
+        ## rank of every design option per sample (ties are broken by the design option order)
+        ranks = np.argsort(np.argsort(outputs, axis=0, kind='stable'), axis=0)
+        ## (design option, stage, category, rank)
+        probabilities = np.stack([(ranks == rank).mean(axis=-1) for rank in range(n_design_options)], axis=-1)
+        expected_rank = np.broadcast_to((ranks.mean(axis=-1) + 1)[..., np.newaxis], probabilities.shape)
+
+        stages = np.asarray(result_tensor.stages + [TOTAL_STAGE], dtype=object)
+        categories = np.asarray(result_tensor.categories, dtype=object)
+        d_idx, stage_idx, category_idx, rank_idx = np.indices(probabilities.shape).reshape(4, -1)
+        frames.append(pd.DataFrame({
+            'Database': db_name,
+            'Life Cycle Stage': stages[stage_idx],
+            'Impact Category': categories[category_idx],
+            'Design Option': np.asarray(result_tensor.design_options, dtype=object)[d_idx],
+            'Rank': rank_idx + 1,
+            'Probability': probabilities.ravel(),
+            'Expected Rank': expected_rank.ravel(),
+        }))
+
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from models.results import TOTAL_STAGE
+
+## Two-sample comparison of the result distributions of the background databases. All database pairs, design options,
+## life cycle stages (and the total) and impact categories are compared in one vectorized pass: the samples are merged
+## and sorted once per series, and the Kolmogorov-Smirnov statistic and the Wasserstein distance follow from the
+## difference of the empirical CDFs along the merged sample axis.
+
+def _stacked_outputs(result_tensors):
+    """Outputs of all databases as one array (database, design option, stage + total, category, sample)."""
+    tensors = list(result_tensors.values())
+    reference = tensors[0]
+    for result_tensor in tensors[1:]:
+        if result_tensor.design_options != reference.design_options or result_tensor.n_samples != reference.n_samples:
+            raise ValueError("All databases need the same design options and number of samples for the comparison.")
+    return np.stack([result_tensor.stage_and_overall_totals() for result_tensor in tensors])
+
+
+def _ecdf_differences(x, y):
+    """
+    Difference of the empirical CDFs of x and y at the merged, sorted samples (samples on the last axis).
+
+    Returns:
+    - merged: The sorted merged samples.
+    - cdf_difference: F_x - F_y right of every merged sample.
+    - step_end: True where the next merged sample is larger (the CDFs are only compared after all ties).
+    """
+    n, m = x.shape[-1], y.shape[-1]
+    merged = np.concatenate([x, y], axis=-1)
+    order = np.argsort(merged, axis=-1, kind='stable')
+    merged = np.take_along_axis(merged, order, axis=-1)
+    cdf_difference = np.cumsum(np.where(order < n, 1 / n, -1 / m), axis=-1)
+    step_end = np.concatenate([merged[..., 1:] != merged[..., :-1], np.ones(merged.shape[:-1] + (1,), dtype=bool)], axis=-1)
+    return merged, cdf_difference, step_end
+
+
+def ks_p_value(statistic, n, m, terms=100):
+    """Asymptotic p-value of the two-sample Kolmogorov-Smirnov statistic (Kolmogorov distribution with Stephens' correction)."""
+    effective_n = n * m / (n + m)
+    lam = (np.sqrt(effective_n) + 0.12 + 0.11 / np.sqrt(effective_n)) * np.asarray(statistic)
+    k = np.arange(1, terms + 1)
+    series = 2 * np.sum((-1.0) ** (k - 1) * np.exp(-2 * k**2 * lam[..., np.newaxis] ** 2), axis=-1)
+    return np.clip(np.where(lam < 1e-3, 1.0, series), 0.0, 1.0)
+
+
+def overlapping_coefficient(x, y, n_bins=100):
+    """
+    Overlapping coefficient of the densities of x and y (samples on the last axis), from histograms on common bins
+    spanning both samples of a series. 1 means identical distributions, 0 disjoint ones.
+    """
+    low = np.minimum(x.min(axis=-1), y.min(axis=-1))[..., np.newaxis]
+    width = np.maximum(x.max(axis=-1), y.max(axis=-1))[..., np.newaxis] - low
+    n_series = int(np.prod(x.shape[:-1]))
+    offsets = np.arange(n_series).reshape(x.shape[:-1] + (1,)) * n_bins
+
+    def histogram(values):
+        ## bin index of every sample, offset per series so that one bincount fills all histograms
+        bins = np.floor(np.divide(values - low, width, out=np.zeros_like(values), where=width > 0) * n_bins)
+        bins = np.clip(bins, 0, n_bins - 1).astype(np.int64) + offsets
+        counts = np.bincount(bins.ravel(), minlength=n_series * n_bins)
+        return counts.reshape(x.shape[:-1] + (n_bins,)) / values.shape[-1]
+
+    return np.minimum(histogram(x), histogram(y)).sum(axis=-1)
+
+
+def compare_databases(result_tensors, n_bins=100) -> pd.DataFrame:
+    """
+    Compare the result distributions of every pair of databases for every design option, life cycle stage (and total)
+    and impact category.
+
+    Parameters:
+    - result_tensors: Dictionary of ResultTensors keyed by database name (same design options and number of samples).
+    - n_bins: Number of histogram bins for the overlapping coefficient.
+
+    Returns:
+    - df: Pandas DataFrame with one row per database pair, design option, life cycle stage and impact category, with the
+      'KS Statistic' and its asymptotic 'KS p-value', the 'Overlapping Coefficient' and the 'Wasserstein Distance'
+      (in the unit of the results), also relative to the mean absolute result of both databases.
+    """
+    databases = list(result_tensors)
+    reference = result_tensors[databases[0]]
+    outputs = _stacked_outputs(result_tensors)
+    first, second = np.triu_indices(len(databases), k=1)
+    x, y = outputs[first], outputs[second]      # (database pair, design option, stage, category, sample)
+    n = x.shape[-1]
+
+    merged, cdf_difference, step_end = _ecdf_differences(x, y)
+    ks_statistic = np.max(np.abs(cdf_difference) * step_end, axis=-1)
+    ## W1 = integral of |F_x - F_y| between the merged samples
+    wasserstein = np.sum(np.abs(cdf_difference[..., :-1]) * np.diff(merged, axis=-1), axis=-1)
+    scale = 0.5 * (np.abs(x.mean(axis=-1)) + np.abs(y.mean(axis=-1)))
+    overlap = overlapping_coefficient(x, y, n_bins)
+
+    stages = np.asarray(reference.stages + [TOTAL_STAGE], dtype=object)
+    pair_idx, design_option_idx, stage_idx, category_idx = np.indices(ks_statistic.shape).reshape(4, -1)
+    return pd.DataFrame({
+        'Database A': np.asarray(databases, dtype=object)[first[pair_idx]],
+        'Database B': np.asarray(databases, dtype=object)[second[pair_idx]],
+        'Design Option': np.asarray(reference.design_options, dtype=object)[design_option_idx],
+        'Life Cycle Stage': stages[stage_idx],
+        'Impact Category': np.asarray(reference.categories, dtype=object)[category_idx],
+        'KS Statistic': ks_statistic.ravel(),
+        'KS p-value': ks_p_value(ks_statistic, n, n).ravel(),
+        'Overlapping Coefficient': overlap.ravel(),
+        'Wasserstein Distance': wasserstein.ravel(),
+        'Relative Wasserstein Distance': np.divide(wasserstein, scale, out=np.zeros_like(wasserstein), where=scale > 0).ravel(),
+    })
@@ -0,0 +1,126 @@
+import sys
+from dataclasses import is_dataclass
+import numpy as np
+import pandas as pd
+from models.results import A1Result
+
+## Memory accounting for the result containers of the probabilistic calculators.
+## Peak and retained memory per phase are traced by RunMetrics(track_memory=True) (general.metrics).
+
+def deep_sizeof(obj, _seen=None) -> int:
+    """
+    Estimate the memory footprint of an object in bytes, following containers, dataclasses,
+    NumPy arrays and pandas objects. Objects referenced more than once are counted once. A NumPy view counts its
+    header and, once, the base array it keeps alive.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, np.ndarray):
+        ## sys.getsizeof of a view already leaves out the buffer it does not own
+        return sys.getsizeof(obj) if obj.base is None else sys.getsizeof(obj) + deep_sizeof(obj.base, _seen)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, _seen) + deep_sizeof(value, _seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    elif is_dataclass(obj) or hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), _seen)
+    return size
+
+
+def result_memory_report(n_samples: int, **containers) -> pd.DataFrame:
+    """
+    Report the size and the bytes per sample of result containers.
+
+    Parameters:
+    - n_samples: Number of samples the containers hold.
+    - containers: Result containers by name, e.g. probabilistic_results=..., aggregated_data=..., plot_frame=df.
+
+    Returns:
+    - df: Pandas DataFrame with the bytes and bytes per sample of every container.
+    """
+    records = []
+    for name, container in containers.items():
+        size = deep_sizeof(container)
+        records.append({
+            'Container': name,
+            'Bytes': size,
+            'MB': size / 1024**2,
+            'Bytes per Sample': size / n_samples if n_samples else None
+        })
+    return pd.DataFrame(records)
+
+
+def _dict_bytes(n_keys: int) -> int:
+    """Size of a plain dictionary with n_keys entries (keys and values are counted separately)."""
+    return sys.getsizeof(dict.fromkeys(range(n_keys)))
+
+
+def _bytes_per_layer_sample(n_stages: int = 5, n_categories: int = 4) -> int:
+    """
+    Footprint of one sample of one layer in the list-of-dicts layout of the probabilistic calculators,
+    {'iteration': i, 'A1_result': A1Result(...), ...}, counted analytically: the list slot, the record dictionary,
+    the iteration int and per stage a result dataclass with its attribute dictionary and one float object per
+    impact category. Floats are never assumed to be shared, so the count is an upper bound of `deep_sizeof`.
+    """
+    result_bytes = sys.getsizeof(A1Result(0.0, 0.0, 0.0, 0.0)) + _dict_bytes(n_categories) + n_categories * sys.getsizeof(1.0)
+    return 8 + _dict_bytes(1 + n_stages) + sys.getsizeof(2 ** 62) + n_stages * result_bytes
+
+
+## a float appended to a list: float object + list slot
+BYTES_PER_LIST_FLOAT = sys.getsizeof(1.0) + 8
+
+
+def estimate_run_memory(n_samples: int, n_layer_results: int, n_design_options: int = 1, n_stages: int = 5, n_categories: int = 4, include_plot_frames: bool = True) -> dict:
+    """
+    Pre-flight estimate of the memory of a probabilistic run, before any sample is drawn.
+    The estimate is an upper bound: it assumes every stored value is a distinct float object.
+
+    Parameters:
+    - n_samples: Requested number of samples.
+    - n_layer_results: Number of layer result lists (sum of the layers over all design options).
+    - n_design_options: Number of design options (aggregated data is kept per design option).
+    - n_stages, n_categories: Number of life cycle stages and impact categories.
+    - include_plot_frames: Include the long-format pandas frames built by the plotting functions.
+
+    Returns:
+    - estimate: Dictionary with the estimated bytes per container and the 'total'.
+    """
+    estimate = {
+        'probabilistic_results': n_samples * n_layer_results * _bytes_per_layer_sample(n_stages, n_categories),
+        'aggregated_data': n_samples * n_design_options * n_stages * n_categories * BYTES_PER_LIST_FLOAT,
+        'overall_aggregated_data': n_samples * n_design_options * n_categories * BYTES_PER_LIST_FLOAT,
+    }
+    if include_plot_frames:
+        ## one row per sample, design option, stage and category; 4 object columns (8 byte pointers) and 1 float column,
+        ## plus the list of record dictionaries the frame is built from
+        n_rows = n_samples * n_design_options * n_stages * n_categories
+        record_bytes = sys.getsizeof({'design_option': 0, 'stage': 0, 'gwp_type': 0, 'value': 0}) + sys.getsizeof(1.0) + 8
+        estimate['plot_frames'] = n_rows * (5 * 8 + record_bytes)
+    estimate['total'] = sum(estimate.values())
+    return estimate
+
+
+def check_memory_limit(estimate: dict, memory_limit_bytes) -> bool:
+    """
+    Warn if an estimated run exceeds the memory limit.
+
+    Returns:
+    - within_limit: True if the estimated total is within the limit (or no limit is set).
+    """
+    if not memory_limit_bytes or estimate['total'] <= memory_limit_bytes:
+        return True
+    largest = max((key for key in estimate if key != 'total'), key=lambda key: estimate[key])
+    print(
+        f"Warning: the requested run needs an estimated {estimate['total'] / 1024**2:.0f} MB, "
+        f"which exceeds the memory limit of {memory_limit_bytes / 1024**2:.0f} MB "
+        f"(largest container: {largest} with {estimate[largest] / 1024**2:.0f} MB)."
+    )
+    return False
@@ -0,0 +1,123 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+@dataclass
+class PhaseMetrics:
+    name: str
+    calls: int = 0
+    wall_time_s: float = 0.0
+    samples: int = 0                # number of Monte Carlo samples processed in the phase
+    items: int = 0                  # phase specific count (layers, distributions, stage evaluations, series, ...)
+    peak_memory_bytes: Optional[int] = None       # highest traced allocation above the phase start (only with track_memory)
+    retained_memory_bytes: Optional[int] = None   # memory still allocated when the phase ends (only with track_memory)
+
+    @property
+    def samples_per_s(self) -> Optional[float]:
+        return self.samples / self.wall_time_s if self.samples and self.wall_time_s > 0 else None
+
+    @property
+    def items_per_s(self) -> Optional[float]:
+        return self.items / self.wall_time_s if self.items and self.wall_time_s > 0 else None
+
+
+class RunMetrics:
+    """ Lightweight phase timers and throughput counters for a run. Repeated phases are accumulated. """
+
+    def __init__(self, profiler=None, track_memory: bool = False):
+        self.phases: Dict[str, PhaseMetrics] = {}
+        self.profiler = profiler        # optional general.profiling.PhaseProfiler wrapping every phase
+        self.track_memory = track_memory  # trace peak and retained memory per phase with tracemalloc (slows the run down)
+        self._open_peaks = []             # running traced peak of every open phase, outermost first
+        self._depth = 0                   # number of open phases
+        self.total_wall_time_s = 0.0      # wall time of the top-level phases (nested phases are already inside them)
+
+    def record(self, name: str, wall_time_s: float, n_samples: Optional[int] = None, items: Optional[int] = None, peak_memory_bytes: Optional[int] = None, retained_memory_bytes: Optional[int] = None):
+        """Add one measurement to the phase `name`. Peak memory is the maximum over all calls, retained memory the sum."""
+        phase = self.phases.setdefault(name, PhaseMetrics(name))
+        if self._depth == 0:
+            self.total_wall_time_s += wall_time_s
+        phase.calls += 1
+        phase.wall_time_s += wall_time_s
+        phase.samples += n_samples or 0
+        phase.items += items or 0
+        if peak_memory_bytes is not None:
+            phase.peak_memory_bytes = max(phase.peak_memory_bytes or 0, peak_memory_bytes)
+        if retained_memory_bytes is not None:
+            phase.retained_memory_bytes = (phase.retained_memory_bytes or 0) + retained_memory_bytes
+
+    @contextmanager
+    def phase(self, name: str, n_samples: Optional[int] = None, items: Optional[int] = None):
+        """Time the enclosed block as the phase `name` (and profile it if a profiler is attached)."""
+        profile = self.profiler.phase(name) if self.profiler is not None else nullcontext()
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._fold_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+            self._open_peaks.append(memory_start)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            with profile:
+                yield
+        finally:
+            wall_time_s = time.perf_counter() - start
+            self._depth -= 1
+            peak_memory_bytes = retained_memory_bytes = None
+            if self.track_memory:
+                self._fold_peak()
+                memory_peak = self._open_peaks.pop()
+                memory_end = tracemalloc.get_traced_memory()[0]
+                peak_memory_bytes = memory_peak - memory_start
+                retained_memory_bytes = memory_end - memory_start
+            self.record(name, wall_time_s, n_samples, items, peak_memory_bytes, retained_memory_bytes)
+
+    def _fold_peak(self):
+        """
+        Fold the traced peak since the last reset into the running peaks of all open phases and reset it, so that
+        nested phases do not lose the peaks of the phases that enclose them.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        self._open_peaks = [max(open_peak, peak) for open_peak in self._open_peaks]
+        tracemalloc.reset_peak()
+
+    def reset(self):
+        self.phases = {}
+        self.total_wall_time_s = 0.0
+
+    def to_dict(self) -> Dict:
+        phases = {}
+        for name, phase in self.phases.items():
+            phases[name] = dict(asdict(phase), samples_per_s=phase.samples_per_s, items_per_s=phase.items_per_s)
+        return {
+            'total_wall_time_s': self.total_wall_time_s,
+            'phases': phases
+        }
+
+    def to_json(self, json_output_path=None):
+        """Return the metrics as a JSON string and optionally write them to `json_output_path`."""
+        metrics_json = json.dumps(self.to_dict(), indent=4)
+        if json_output_path:
+            with open(json_output_path, 'w', encoding='utf-8') as json_file:
+                json_file.write(metrics_json)
+            print(f"Metrics saved to {json_output_path}")
+        return metrics_json
+
+    def __repr__(self):
+        lines = [f"{'phase':<35}{'calls':>7}{'wall time [s]':>15}{'samples/s':>14}{'peak [MB]':>12}"]
+        for phase in self.phases.values():
+            samples_per_s = f"{phase.samples_per_s:.1f}" if phase.samples_per_s else "-"
+            peak_memory = f"{phase.peak_memory_bytes / 1024**2:.2f}" if phase.peak_memory_bytes is not None else "-"
+            lines.append(f"{phase.name:<35}{phase.calls:>7}{phase.wall_time_s:>15.4f}{samples_per_s:>14}{peak_memory:>12}")
+        return "\n".join(lines)
+
+
+def track_phase(metrics: Optional[RunMetrics], name: str, n_samples: Optional[int] = None, items: Optional[int] = None):
+    """Return a context manager timing the phase `name` in `metrics`, or a no-op context if no metrics object is given."""
+    if metrics is None:
+        return nullcontext()
+    return metrics.phase(name, n_samples=n_samples, items=items)
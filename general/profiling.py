@@ -0,0 +1,81 @@
+import cProfile
+import io
+import os
+import pstats
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+class PhaseProfiler:
+    """
+    Opt-in cProfile capture for named phases (sampling, stage_evaluation, collect_aggregated_data, statistics, ...).
+
+    Each phase gets its own profile, accumulated over all calls of the phase, so the output is not
+    dominated by imports or plotting. `write` stores one `<phase>.prof` file per phase (readable with
+    pstats or snakeviz) and a `summary.txt` with the top hot functions of every phase.
+    """
+
+    def __init__(self, output_dir: str, phases: Optional[List[str]] = None, top_n: int = 25, sort_by: str = "cumulative"):
+        """
+        Parameters:
+        - output_dir: Directory for the profile files.
+        - phases: Names of the phases to profile (default: None = all phases).
+        - top_n: Number of functions per phase in the summary.
+        - sort_by: pstats sort key for the summary ('cumulative', 'tottime', ...).
+        """
+        self.output_dir = output_dir
+        self.phases = set(phases) if phases else None
+        self.top_n = top_n
+        self.sort_by = sort_by
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self._active = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """Profile the enclosed block as the phase `name`. Nested phases are captured by the outer phase only."""
+        if self._active or (self.phases is not None and name not in self.phases):
+            yield
+            return
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        self._active = True
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = False
+
+    def top_functions(self, name: str, n: Optional[int] = None) -> List[Dict]:
+        """Return the hottest functions of a phase as a list of dictionaries sorted by `sort_by`."""
+        stats = pstats.Stats(self.profiles[name])
+        stats.sort_stats(self.sort_by)
+        functions = []
+        for func in stats.fcn_list[:n or self.top_n]:
+            primitive_calls, total_calls, tottime, cumtime, _ = stats.stats[func]
+            filename, line, function_name = func
+            functions.append({
+                'function': f"{os.path.basename(filename)}:{line}({function_name})",
+                'ncalls': total_calls,
+                'tottime_s': tottime,
+                'cumtime_s': cumtime,
+            })
+        return functions
+
+    def summary(self) -> str:
+        """Return the top functions of every profiled phase as text."""
+        stream = io.StringIO()
+        for name, profile in self.profiles.items():
+            stream.write(f"===== {name} =====\n")
+            stats = pstats.Stats(profile, stream=stream)
+            stats.strip_dirs().sort_stats(self.sort_by).print_stats(self.top_n)
+        return stream.getvalue()
+
+    def write(self) -> str:
+        """Write one profile file per phase and the summary. Returns the path of the summary file."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        for name, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(self.output_dir, f"{name}.prof"))
+        summary_path = os.path.join(self.output_dir, "summary.txt")
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(self.summary())
+        print(f"Profiles saved to {self.output_dir}")
+        return summary_path
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+class RunCancelled(Exception):
+    """ Raised inside a calculation when it was cancelled through `cancel()` on the calculator. """
+
+
+@dataclass
+class ProgressEvent:
+    kind: str                       # 'task_started', 'progress', 'task_completed', 'run_completed'
+    task: Optional[str]             # design option (or layer) name
+    task_fraction: float            # completed fraction of the current task
+    samples_completed: float        # samples completed in the whole run
+    samples_total: int              # samples requested for the whole run
+    elapsed_s: float
+    throughput: Optional[float]     # samples/s since the start of the run
+    eta_s: Optional[float]          # estimated seconds until the run is completed
+    result: Any = None              # the calculation result on the 'run_completed' event
+
+
+class ProgressReporter:
+    """
+    Batched progress reporting for the sampling loops of the probabilistic calculators.
+
+    The loops only call `update` every `every` samples, and events are emitted at most every
+    `min_interval_s` seconds, so the overhead in the hot loop is one integer comparison per sample.
+    Cancellation is checked at the same batch boundaries (also without a callback).
+    """
+
+    def __init__(self, callback: Optional[Callable[[ProgressEvent], None]], samples_total: int, cancel_event: Optional[threading.Event] = None, min_interval_s: float = 0.2):
+        self.callback = callback
+        self.samples_total = samples_total
+        self.cancel_event = cancel_event
+        self.min_interval_s = min_interval_s
+        self.start_time = time.perf_counter()
+        self._last_emit = 0.0
+        self._samples_before_task = 0
+        self._task = None
+        self._task_samples = 0
+        self._task_units = 1
+
+    @staticmethod
+    def batch_size(n_samples: int, every: Optional[int] = None) -> int:
+        """Number of samples between two `update` calls (default: 1 % of the samples)."""
+        return every or max(1, n_samples // 100)
+
+    def _emit(self, kind: str, task_fraction: float, result=None):
+        if self.callback is None:
+            return
+        elapsed = time.perf_counter() - self.start_time
+        samples_completed = self._samples_before_task + task_fraction * self._task_samples
+        throughput = samples_completed / elapsed if elapsed > 0 and samples_completed > 0 else None
+        eta = (self.samples_total - samples_completed) / throughput if throughput else None
+        self._last_emit = elapsed
+        self.callback(ProgressEvent(kind, self._task, task_fraction, samples_completed, self.samples_total, elapsed, throughput, eta, result))
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise RunCancelled(f"Calculation cancelled during task '{self._task}'.")
+
+    def start_task(self, task: str, n_samples: int, units: Optional[int] = None):
+        """Start a task of n_samples samples, made of `units` loop iterations (e.g. layers x samples)."""
+        self.check_cancelled()
+        self._task = task
+        self._task_samples = n_samples
+        self._task_units = units or n_samples
+        self._emit('task_started', 0.0)
+
+    def update(self, units_completed: int):
+        """Report the number of completed loop iterations of the current task."""
+        self.check_cancelled()
+        if time.perf_counter() - self.start_time - self._last_emit >= self.min_interval_s:
+            self._emit('progress', units_completed / self._task_units)
+
+    def complete_task(self):
+        self._emit('task_completed', 1.0)
+        self._samples_before_task += self._task_samples
+        self._task_samples = 0
+
+    def complete_run(self, result=None):
+        self._task = None
+        self._emit('run_completed', 0.0, result)
+
+
+async def iter_progress(calculate: Callable, *args, cancel: Optional[Callable] = None, **kwargs):
+    """
+    Run a calculation in a worker thread and yield its ProgressEvents as an async iterator.
+
+    The calculation must accept a `progress_callback` keyword argument, e.g.
+    `calculator.calculate_do_probabilistic_impact`. The last event ('run_completed') carries the result.
+    If the consumer stops iterating early, `cancel` (e.g. `calculator.cancel`) is called when the
+    iterator is closed (wrap it in contextlib.aclosing to close it immediately on `break`).
+
+    Usage in a notebook:
+        async for event in iter_progress(calculator.calculate_do_probabilistic_impact, n_samples=1000, cancel=calculator.cancel):
+            print(event.task, event.samples_completed, event.eta_s)
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def callback(event):
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    future = loop.run_in_executor(None, lambda: calculate(*args, progress_callback=callback, **kwargs))
+    completed = False
+    try:
+        while True:
+            get_event = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({get_event, future}, return_when=asyncio.FIRST_COMPLETED)
+            if get_event in done:
+                event = get_event.result()
+                yield event
+                if event.kind == 'run_completed':
+                    completed = True
+                    break
+            else:
+                get_event.cancel()
+                future.result()  # re-raise errors (including RunCancelled) of the calculation
+                while not queue.empty():
+                    yield queue.get_nowait()
+                completed = True
+                break
+    finally:
+        if not completed and cancel is not None:
+            cancel()
+        await asyncio.gather(future, return_exceptions=True)
@@ -1,6 +1,7 @@
 import numpy as np
 import json
 import pandas as pd
+from general.metrics import track_phase
 
 class NpEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -12,30 +13,50 @@ class NpEncoder(json.JSONEncoder):
             return obj.tolist()
         return super().default(obj)
 
-def convert_statistical_data_to_json(statistical_data, json_output_path=None):
-    records = []
-
-    for design_option, stages in statistical_data.items():
-        for stage, categories in stages.items():
-            for category, stats in categories.items():
-                records.append({
-                    'Design Option': design_option,
-                    'Life Cycle Stage': stage,
-                    'Impact Category': category,
-                    'Mean': stats['mean'],
-                    'STD': stats['std'],
-                    'COV': stats['cov'],
-                    'Min': stats['min'],
-                    'Max': stats['max'],
-                    '95th Percentile': stats['95th_percentile'],
-                    'Median': stats['median'],
-                    'Unit': 'kgCO2eq/FU',
-                    'Outliers': stats['outliers']
-                })
-
-    if json_output_path:
+def convert_statistical_data_to_json(statistical_data, json_output_path=None, metrics=None):
+    with track_phase(metrics, "export"):
+        records = []
+
+        for design_option, stages in statistical_data.items():
+            for stage, categories in stages.items():
+                for category, stats in categories.items():
+                    records.append({
+                        'Design Option': design_option,
+                        'Life Cycle Stage': stage,
+                        'Impact Category': category,
+                        'Mean': stats['mean'],
+                        'STD': stats['std'],
+                        'COV': stats['cov'],
+                        'Min': stats['min'],
+                        'Max': stats['max'],
+                        '95th Percentile': stats['95th_percentile'],
+                        'Median': stats['median'],
+                        'Unit': 'kgCO2eq/FU',
+                        'Outliers': stats['outliers']
+                    })
+
+        if json_output_path:
+            with open(json_output_path, 'w', encoding='utf-8') as json_file:
+                json.dump(records, json_file, indent=4, cls=NpEncoder)
+            print(f"JSON saved to {json_output_path}")
+
+    return pd.DataFrame(records)
+
+
+## columns of the JSON result files (results/*_results.json)
+JSON_COLUMNS = ['Design Option', 'Life Cycle Stage', 'Impact Category', 'Mean', 'STD', 'COV', 'Min', 'Max', '95th Percentile', 'Median', 'Unit', 'Outliers']
+
+def save_statistical_table_to_json(statistical_table, json_output_path, metrics=None):
+    """
+    Save a statistical table (see calculate_statistical_table_life_cycle_stages) in the format of convert_statistical_data_to_json.
+
+    Parameters:
+    - statistical_table: Pandas DataFrame with one row per design option, life cycle stage and impact category.
+    - json_output_path: Path of the JSON file.
+    - metrics: Optional RunMetrics instance recording the 'export' phase.
+    """
+    with track_phase(metrics, "export", items=len(statistical_table)):
+        records = statistical_table[JSON_COLUMNS].to_dict(orient='records')
         with open(json_output_path, 'w', encoding='utf-8') as json_file:
             json.dump(records, json_file, indent=4, cls=NpEncoder)
         print(f"JSON saved to {json_output_path}")
-
-    return pd.DataFrame(records)
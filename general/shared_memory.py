@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+import numpy as np
+
+## NumPy arrays in named shared memory blocks. The parent creates the block, workers attach to it by name and read or
+## write their slices in place; only the small ArraySpec (name, shape, dtype) is pickled to the workers.
+
+@dataclass(frozen=True)
+class ArraySpec:
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class SharedArray:
+    """
+    NumPy array backed by a multiprocessing.shared_memory block.
+
+    The creating process owns the block and unlinks it in `close()` (or at the end of a with block);
+    attached processes only unmap it.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape, dtype, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        self.spec = ArraySpec(shm.name, tuple(shape), np.dtype(dtype).str)
+
+    @classmethod
+    def create(cls, shape, dtype=float, fill: Optional[float] = None) -> "SharedArray":
+        """Allocate a new shared array (uninitialized unless `fill` is given)."""
+        nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        shared = cls(shared_memory.SharedMemory(create=True, size=nbytes), shape, dtype, owner=True)
+        if fill is not None:
+            shared.array.fill(fill)
+        return shared
+
+    @classmethod
+    def attach(cls, spec: ArraySpec) -> "SharedArray":
+        """Attach to the shared array of another process."""
+        return cls(shared_memory.SharedMemory(name=spec.name), spec.shape, spec.dtype, owner=False)
+
+    def close(self):
+        """Release the array; the owner also frees the block. Views of `array` must not be used afterwards."""
+        if self._shm is None:
+            return
+        self.array = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
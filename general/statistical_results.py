@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from general.metrics import track_phase
 
 def count_outliers(data):
     """
@@ -32,12 +33,13 @@ def count_outliers(data):
 
 
 ## function for design options
-def calculate_statistical_parameters(aggregated_data):
+def calculate_statistical_parameters(aggregated_data, metrics=None):
     """
     Calculate statistical parameters for each design option and impact category.
 
     Parameters:
     - aggregated_data: Dictionary of aggregated GWP data for each design option.
+    - metrics: Optional RunMetrics instance recording the 'statistics' phase.
 
     Returns:
     - statistical_data: Dictionary of statistical parameters (mean, std, min, max, and 95th percentile) for each design option and impact category.
@@ -45,37 +47,38 @@ def calculate_statistical_parameters(aggregated_data):
     # Initialize a dictionary to store the statistical parameters
     statistical_data = {}
 
-    # Iterate over each design option in the aggregated data
-    for design_option, data in aggregated_data.items():
-        statistical_data[design_option] = {}
-
-        # Iterate over each impact category (GWP type)
-        for category, values in data.items():
-            # Convert the list of values to a numpy array for easier statistical operations
-            values_array = np.array(values)
-
-            # Calculate the desired statistics
-            mean_val = np.mean(values_array)
-            std_val = np.std(values_array)
-            min_val = np.min(values_array)
-            max_val = np.max(values_array)
-            median_val = np.median(values_array)
-            cov_val = abs(std_val) / abs(mean_val) if mean_val != 0 else 0
-            percentile_95 = np.percentile(values_array, 95)
-
-            outlier_count = count_outliers(values)
-
-            # Store the statistical parameters in the dictionary
-            statistical_data[design_option][category] = {
-                'mean': mean_val,
-                'std': std_val,
-                'min': min_val,
-                'max': max_val,
-                'median': median_val,
-                'cov': cov_val,
-                '95th_percentile': percentile_95,
-                'outliers': outlier_count
-            }
+    with track_phase(metrics, "statistics", items=sum(len(data) for data in aggregated_data.values())):
+        # Iterate over each design option in the aggregated data
+        for design_option, data in aggregated_data.items():
+            statistical_data[design_option] = {}
+
+            # Iterate over each impact category (GWP type)
+            for category, values in data.items():
+                # Convert the list of values to a numpy array for easier statistical operations
+                values_array = np.array(values)
+
+                # Calculate the desired statistics
+                mean_val = np.mean(values_array)
+                std_val = np.std(values_array)
+                min_val = np.min(values_array)
+                max_val = np.max(values_array)
+                median_val = np.median(values_array)
+                cov_val = abs(std_val) / abs(mean_val) if mean_val != 0 else 0
+                percentile_95 = np.percentile(values_array, 95)
+
+                outlier_count = count_outliers(values)
+
+                # Store the statistical parameters in the dictionary
+                statistical_data[design_option][category] = {
+                    'mean': mean_val,
+                    'std': std_val,
+                    'min': min_val,
+                    'max': max_val,
+                    'median': median_val,
+                    'cov': cov_val,
+                    '95th_percentile': percentile_95,
+                    'outliers': outlier_count
+                }
 
     return statistical_data
 
@@ -146,13 +149,14 @@ def convert_statistical_data_to_table(statistical_data, database_name):
     return pd.DataFrame(records)
 
 ## function for life cycle stages 
-def calculate_statistical_parameters_life_cycle_stages(aggregated_data):
+def calculate_statistical_parameters_life_cycle_stages(aggregated_data, metrics=None):
     """
     Calculate statistical parameters for each design option, life cycle stage, and impact category.
 
     Parameters:
     - aggregated_data: Dictionary of aggregated GWP data structured as:
       {'design_option': {'life_cycle_stage': {'impact_category': [values]}}}
+    - metrics: Optional RunMetrics instance recording the 'statistics' phase.
 
     Returns:
     - statistical_data: Dictionary of statistical parameters (mean, std, min, max, median, cov, and 95th percentile)
@@ -161,42 +165,44 @@ def calculate_statistical_parameters_life_cycle_stages(aggregated_data):
     # Initialize a dictionary to store the statistical parameters
     statistical_data = {}
 
-    # Iterate over each design option in the aggregated data
-    for design_option, stages in aggregated_data.items():
-        statistical_data[design_option] = {}
-
-        # Iterate over each life cycle stage
-        for stage, categories in stages.items():
-            statistical_data[design_option][stage] = {}
-
-            # Iterate over each impact category
-            for category, values in categories.items():
-                # Convert the list of values to a numpy array for easier statistical operations
-                values_array = np.array(values)
-
-                # Calculate the desired statistics
-                mean_val = np.mean(values_array)
-                std_val = np.std(values_array)
-                min_val = np.min(values_array)
-                max_val = np.max(values_array)
-                median_val = np.median(values_array)
-                cov_val = abs(std_val) / abs(mean_val) if mean_val != 0 else 0
-                percentile_95 = np.percentile(values_array, 95)
-
-                # Count the outliers
-                outlier_count = count_outliers(values)
-
-                # Store the statistical parameters in the dictionary
-                statistical_data[design_option][stage][category] = {
-                    'mean': mean_val,
-                    'std': std_val,
-                    'min': min_val,
-                    'max': max_val,
-                    'median': median_val,
-                    'cov': cov_val,
-                    '95th_percentile': percentile_95,
-                    'outliers': outlier_count
-                }
+    n_series = sum(len(categories) for stages in aggregated_data.values() for categories in stages.values())
+    with track_phase(metrics, "statistics", items=n_series):
+        # Iterate over each design option in the aggregated data
+        for design_option, stages in aggregated_data.items():
+            statistical_data[design_option] = {}
+
+            # Iterate over each life cycle stage
+            for stage, categories in stages.items():
+                statistical_data[design_option][stage] = {}
+
+                # Iterate over each impact category
+                for category, values in categories.items():
+                    # Convert the list of values to a numpy array for easier statistical operations
+                    values_array = np.array(values)
+
+                    # Calculate the desired statistics
+                    mean_val = np.mean(values_array)
+                    std_val = np.std(values_array)
+                    min_val = np.min(values_array)
+                    max_val = np.max(values_array)
+                    median_val = np.median(values_array)
+                    cov_val = abs(std_val) / abs(mean_val) if mean_val != 0 else 0
+                    percentile_95 = np.percentile(values_array, 95)
+
+                    # Count the outliers
+                    outlier_count = count_outliers(values)
+
+                    # Store the statistical parameters in the dictionary
+                    statistical_data[design_option][stage][category] = {
+                        'mean': mean_val,
+                        'std': std_val,
+                        'min': min_val,
+                        'max': max_val,
+                        'median': median_val,
+                        'cov': cov_val,
+                        '95th_percentile': percentile_95,
+                        'outliers': outlier_count
+                    }
 
     return statistical_data
 
@@ -235,3 +241,90 @@ def convert_statistical_data_to_table_life_cycle_stages(statistical_data):
 
     # Create a pandas DataFrame
     return pd.DataFrame(records)
+
+
+## batched statistics engine over all series at once
+PERCENTILES = {'Q1': 25, 'Median': 50, 'Q3': 75, '95th Percentile': 95}
+
+def calculate_batched_statistics(values):
+    """
+    Calculate the statistical parameters of many series at once.
+
+    All quantiles (25th, 50th, 75th and 95th percentile) and the extremes come from a single
+    np.partition per series, vectorized over all series. Quantiles use linear interpolation
+    like np.percentile and outliers are counted with the IQR method like count_outliers.
+
+    Parameters:
+    - values: NumPy array with the samples on the last axis, e.g. (design option, stage, category, sample).
+
+    Returns:
+    - statistics: Dictionary of arrays with the shape of values without the sample axis, with the keys
+      'Mean', 'STD', 'COV', 'Min', 'Max', 'Q1', 'Median', 'Q3', '95th Percentile' and 'Outliers'.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[-1]
+
+    # Positions of the order statistics needed for every quantile (lower and upper neighbour) and the extremes
+    positions = {name: q / 100 * (n - 1) for name, q in PERCENTILES.items()}
+    kth = sorted({0, n - 1} | {int(np.floor(p)) for p in positions.values()} | {int(np.ceil(p)) for p in positions.values()})
+    partitioned = np.partition(values, kth, axis=-1)
+
+    statistics = {}
+    for name, position in positions.items():
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        fraction = position - lower
+        statistics[name] = partitioned[..., lower] + fraction * (partitioned[..., upper] - partitioned[..., lower])
+
+    mean = values.mean(axis=-1)
+    std = values.std(axis=-1)
+    statistics['Mean'] = mean
+    statistics['STD'] = std
+    statistics['COV'] = np.divide(np.abs(std), np.abs(mean), out=np.zeros_like(std), where=mean != 0)
+    statistics['Min'] = partitioned[..., 0]
+    statistics['Max'] = partitioned[..., n - 1]
+
+    iqr = statistics['Q3'] - statistics['Q1']
+    lower_bound = (statistics['Q1'] - 1.5 * iqr)[..., np.newaxis]
+    upper_bound = (statistics['Q3'] + 1.5 * iqr)[..., np.newaxis]
+    statistics['Outliers'] = np.sum((values < lower_bound) | (values > upper_bound), axis=-1)
+    return statistics
+
+
+def calculate_statistical_table_life_cycle_stages(result_tensor, metrics=None):
+    """
+    Calculate the statistical table for each design option, life cycle stage and impact category
+    directly from a ResultTensor (see DesignOptionProbabilisticLCACalculator.collect_result_tensor).
+
+    Returns the same columns as convert_statistical_data_to_table_life_cycle_stages(calculate_statistical_parameters_life_cycle_stages(...)),
+    plus the 25th and 75th percentile, without building the nested dictionaries.
+
+    Parameters:
+    - result_tensor: ResultTensor with the axes (design option, layer, stage, impact category, sample).
+    - metrics: Optional RunMetrics instance recording the 'statistics' phase.
+
+    Returns:
+    - df: Pandas DataFrame with one row per design option, life cycle stage and impact category.
+    """
+    n_design_options, n_stages, n_categories = len(result_tensor.design_options), len(result_tensor.stages), len(result_tensor.categories)
+    with track_phase(metrics, "statistics", n_samples=result_tensor.n_samples * n_design_options, items=n_design_options * n_stages * n_categories):
+        statistics = calculate_batched_statistics(result_tensor.stage_totals())
+
+        ## index columns in the (design option, stage, category) order of the flattened statistics
+        design_option_idx, stage_idx, category_idx = np.indices((n_design_options, n_stages, n_categories)).reshape(3, -1)
+        df = pd.DataFrame({
+            'Design Option': np.asarray(result_tensor.design_options, dtype=object)[design_option_idx],
+            'Life Cycle Stage': np.asarray(result_tensor.stages, dtype=object)[stage_idx],
+            'Impact Category': np.asarray(result_tensor.categories, dtype=object)[category_idx],
+            'Mean': statistics['Mean'].ravel(),
+            'STD': statistics['STD'].ravel(),
+            'COV': statistics['COV'].ravel(),
+            'Min': statistics['Min'].ravel(),
+            'Max': statistics['Max'].ravel(),
+            '95th Percentile': statistics['95th Percentile'].ravel(),
+            'Median': statistics['Median'].ravel(),
+            'Unit': 'kgCO2eq/FU',
+            'Outliers': statistics['Outliers'].ravel(),
+            '25th Percentile': statistics['Q1'].ravel(),
+            '75th Percentile': statistics['Q3'].ravel(),
+        })
+    return df
@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
 
 @dataclass
 class Result:
@@ -44,4 +46,67 @@ class DesignOptionResult:
     a2_result: A2Result
     a3_result: A3Result
     a4_result: A4Result
-    a5_result: A5Result
\ No newline at end of file
+    a5_result: A5Result
+
+STAGES = ['A1', 'A2', 'A3', 'A4', 'A5']
+IMPACT_CATEGORIES = ['gwp_total', 'gwp_fossil', 'gwp_biogenic', 'gwp_luluc']
+TOTAL_STAGE = 'Total'   # label of the totals over all life cycle stages
+
+@dataclass
+class ResultTensor:
+    """
+    Probabilistic results of all design options in one array with the axes
+    (design option, layer, stage, impact category, sample). Design options with fewer layers are
+    padded with zeros. Stage totals, overall totals and per-layer breakdowns are reductions or views of `values`.
+    """
+    design_options: List[str]
+    layers: List[List[str]]         # layer names per design option
+    values: np.ndarray
+    stages: List[str] = field(default_factory=lambda: list(STAGES))
+    categories: List[str] = field(default_factory=lambda: list(IMPACT_CATEGORIES))
+    paired: bool = False            # all design options share the same emission factor samples (common random numbers)
+
+    @property
+    def n_samples(self) -> int:
+        return self.values.shape[-1]
+
+    def stage_totals(self) -> np.ndarray:
+        """Sum over the layer axis: (design option, stage, category, sample)."""
+        return self.values.sum(axis=1)
+
+    def overall_totals(self) -> np.ndarray:
+        """Sum over layers and stages: (design option, category, sample)."""
+        return self.values.sum(axis=(1, 2))
+
+    def stage_and_overall_totals(self) -> np.ndarray:
+        """Stage totals with the total over all stages appended as last stage (TOTAL_STAGE): (design option, stage + 1, category, sample)."""
+        stage_totals = self.stage_totals()
+        return np.concatenate([stage_totals, stage_totals.sum(axis=1, keepdims=True)], axis=1)
+
+    def layer_breakdown(self, design_option: str) -> np.ndarray:
+        """View of the per-layer results of one design option: (layer, stage, category, sample)."""
+        idx = self.design_options.index(design_option)
+        return self.values[idx, :len(self.layers[idx])]
+
+    def to_aggregated_data(self, stage_totals: Optional[np.ndarray] = None) -> Dict:
+        """Nested dictionary in the layout of `collect_aggregated_data`, with NumPy views instead of lists."""
+        stage_totals = self.stage_totals() if stage_totals is None else stage_totals
+        return {
+            design_option: {
+                stage: {category: stage_totals[d, s, c] for c, category in enumerate(self.categories)}
+                for s, stage in enumerate(self.stages)
+            } for d, design_option in enumerate(self.design_options)
+        }
+
+    def to_overall_aggregated_data(self, overall_totals: Optional[np.ndarray] = None) -> Dict:
+        """Nested dictionary in the layout of `collect_overall_aggregated_data`, with NumPy views instead of lists."""
+        overall_totals = self.overall_totals() if overall_totals is None else overall_totals
+        return {
+            design_option: {category: overall_totals[d, c] for c, category in enumerate(self.categories)}
+            for d, design_option in enumerate(self.design_options)
+        }
+
+    def aggregate(self):
+        """Stage-level and overall aggregated data from one reduction over the layer axis."""
+        stage_totals = self.stage_totals()
+        return self.to_aggregated_data(stage_totals), self.to_overall_aggregated_data(stage_totals.sum(axis=1))
@@ -2,6 +2,47 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 import numpy as np
+from models.results import TOTAL_STAGE
+from visualizations.plot_data import DistributionSummary
+
+
+## drawing helpers for precomputed plot data (visualizations.plot_data.summarize_distributions)
+def _draw_summary_boxplots(ax, groups, hues, get_stats, palette):
+    """
+    Draw grouped boxplots from precomputed statistics, laid out like seaborn's boxplot with hue and dodge.
+
+    Parameters:
+    - ax: Matplotlib axes.
+    - groups: Labels on the x axis.
+    - hues: Labels of the boxes within a group.
+    - get_stats: Function (group, hue) returning the Axes.bxp statistics of one box, or None to skip it.
+    - palette: Dictionary of colors per hue.
+
+    Returns:
+    - handles, labels: Legend entries of the hues.
+    """
+    width = 0.8 / len(hues)
+    handles = []
+    for j, hue in enumerate(hues):
+        color = palette.get(hue, f"C{j}")
+        stats, positions = [], []
+        for i, group in enumerate(groups):
+            box = get_stats(group, hue)
+            if box is not None:
+                stats.append(box)
+                positions.append(i - 0.4 + (j + 0.5) * width)
+        if stats:
+            line_props = {'color': color}
+            ax.bxp(
+                stats, positions=positions, widths=width * 0.8, showfliers=True, manage_ticks=False,
+                boxprops=line_props, whiskerprops=line_props, capprops=line_props, medianprops=line_props,
+                flierprops={'markeredgecolor': color, 'marker': 'o', 'markersize': 3}
+            )
+        handles.append(plt.Line2D([0], [0], color=color))
+    ax.set_xticks(range(len(groups)))
+    ax.set_xticklabels(groups)
+    ax.set_xlim(-0.5, len(groups) - 0.5)
+    return handles, list(hues)
 
 def plot_gwp_boxplots_aggregated(data, database_name, exclude_stages=None):
     """
@@ -9,7 +50,8 @@ def plot_gwp_boxplots_aggregated(data, database_name, exclude_stages=None):
     (gwp_total, gwp_fossil, gwp_biogenic, gwp_luluc) for each design option.
 
     Parameters:
-        data (dict): Dictionary of aggregated GWP data for each design option.
+        data (dict or DistributionSummary): Dictionary of aggregated GWP data for each design option,
+            or the precomputed plot data of visualizations.plot_data.summarize_distributions.
         database_name (str): Name of the database for labeling.
         exclude_stages (list): List of stages to exclude from the plot (default: None).
     """
@@ -20,6 +62,10 @@ def plot_gwp_boxplots_aggregated(data, database_name, exclude_stages=None):
     if exclude_stages:
         stages = [stage for stage in stages if stage not in exclude_stages]
 
+    if isinstance(data, DistributionSummary):
+        _plot_gwp_boxplots_from_summary(data, database_name, stages, impact_categories)
+        return
+
     # Initialize a list to store data for boxplots
     all_data = []
 
@@ -87,6 +133,37 @@ def plot_gwp_boxplots_aggregated(data, database_name, exclude_stages=None):
     plt.show()
 
 
+def _plot_gwp_boxplots_from_summary(summary, database_name, stages, impact_categories):
+    """plot_gwp_boxplots_aggregated drawn from precomputed boxplot statistics."""
+    custom_palette = {
+        'base_design': 'black',
+        'alternative_design1': 'lightcoral',  # Light red
+        'alternative_design2': 'blue'
+    }
+    fig, axes = plt.subplots(2, 2, figsize=(16, 10), sharey=False)
+    fig.suptitle(f'GWP results for {database_name}', fontsize=15)
+    axes = axes.flatten()
+
+    for i, gwp_type in enumerate(impact_categories):
+        ax = axes[i]
+        handles, labels = _draw_summary_boxplots(
+            ax, stages, summary.design_options,
+            lambda stage, design_option: summary.boxplot_stats(design_option, stage, gwp_type),
+            custom_palette
+        )
+        ax.set_title(f'{gwp_type.replace("gwp_", "GWP ")}')
+        ax.set_xlabel('Life Cycle Stage')
+        ax.set_ylabel('GWP (kgCO2eq/FU)')
+        for x in range(len(stages) - 1):
+            ax.axvline(x + 0.5, color='gray', linestyle='--', linewidth=0.5)
+
+    fig.legend(
+        handles, labels, loc='lower center', ncol=len(labels),
+        title=f'Design Option', fontsize='small', frameon=False
+    )
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    plt.subplots_adjust(bottom=0.15)
+    plt.show()
 
 
 ## boxplots for multiple databases 
@@ -125,12 +202,17 @@ def create_boxplots_from_raw_data(data):
     Create boxplots using raw data for the specified impact categories.
 
     Parameters:
-    - data: Pandas DataFrame containing the raw data.
+    - data: Pandas DataFrame containing the raw data, or a dictionary of DistributionSummary of the overall
+      results keyed by database name (visualizations.plot_data.summarize_distributions).
     - impact_categories: List of impact categories to visualize.
     """
     sns.set_theme(style="whitegrid")
     impact_categories = ['gwp_total', 'gwp_fossil', 'gwp_biogenic', 'gwp_luluc']
 
+    if isinstance(data, dict):
+        _create_boxplots_from_summaries(data, impact_categories)
+        return
+
     # Create subplots
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     axes = axes.flatten()
@@ -181,6 +263,34 @@ def create_boxplots_from_raw_data(data):
     plt.show()
 
 
+def _create_boxplots_from_summaries(summaries, impact_categories):
+    """create_boxplots_from_raw_data drawn from precomputed boxplot statistics of the totals over all stages."""
+    custom_palette = {
+        'ecoinvent': 'grey',
+        'ökobaudat': 'pink',
+        'EPD': 'green'
+    }
+    design_options = next(iter(summaries.values())).design_options
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    axes = axes.flatten()
+
+    for ax, category in zip(axes, impact_categories):
+        handles, labels = _draw_summary_boxplots(
+            ax, design_options, list(summaries),
+            lambda design_option, db_name: summaries[db_name].boxplot_stats(design_option, TOTAL_STAGE, category),
+            custom_palette
+        )
+        ax.set_title(f'{category.replace("gwp_", "GWP ")}')
+        ax.set_ylabel('GWP (kgCO2eq/FU)')
+        ax.set_xlabel('Design Option')
+        for x in range(len(design_options) - 1):
+            ax.axvline(x + 0.5, color='gray', linestyle='--', linewidth=0.5)
+
+    fig.legend(handles, labels, title="Database", loc='upper center', bbox_to_anchor=(0.5, -0.05), ncol=3)
+    plt.tight_layout()
+    plt.show()
+
+
 
 def plot_lca_distributions_by_design_option(full_results):
     """
@@ -190,6 +300,8 @@ def plot_lca_distributions_by_design_option(full_results):
     Parameters:
     - full_results: List of dictionaries, each containing the aggregated results for one database. 
       Each dictionary has impact categories as keys and lists of results as values, grouped by design option.
+      The entries can also be DistributionSummary plot data (visualizations.plot_data.summarize_distributions),
+      whose precomputed KDE curves of the totals over all stages are drawn instead of running a KDE on the samples.
     """
     sns.set_theme(style="whitegrid")
     impact_categories = ['gwp_total', 'gwp_fossil', 'gwp_biogenic', 'gwp_luluc']
@@ -200,7 +312,10 @@ def plot_lca_distributions_by_design_option(full_results):
     }
     
     # Extract all design options from the first database's results
-    design_options = list(full_results[0].keys())
+    if isinstance(full_results[0], DistributionSummary):
+        design_options = list(full_results[0].design_options)
+    else:
+        design_options = list(full_results[0].keys())
 
     # Create a separate figure for each design option
     for design_option in design_options:
@@ -220,6 +335,12 @@ def plot_lca_distributions_by_design_option(full_results):
                 # Map database index to a name
                 db_name = ['ecoinvent', 'ökobaudat', 'EPD'][db_idx]
 
+                if isinstance(db_results, DistributionSummary):
+                    # Precomputed KDE curve of the total over all stages
+                    x, density = db_results.kde(design_option, TOTAL_STAGE, category)
+                    ax.plot(x, density, label=db_name, alpha=1, color=custom_palette[db_name])
+                    continue
+
                 # Extract the data for the current design option and category
                 data_to_plot = db_results[design_option].get(category, [])
                 
@@ -307,7 +428,8 @@ def plot_kde_distributions_by_stage(aggregated_data, database_name, selected_sta
     for selected life cycle stages and design options, organized in a 2x2 subplot layout.
 
     Parameters:
-        aggregated_data (dict): Aggregated GWP data for each design option.
+        aggregated_data (dict or DistributionSummary): Aggregated GWP data for each design option, or the precomputed
+            plot data of visualizations.plot_data.summarize_distributions (one KDE curve per design option and stage).
         database_name (str): Name of the database (for labeling).
         selected_stages (list): List of specific life cycle stages to include (default: None = all stages).
     """
@@ -317,6 +439,10 @@ def plot_kde_distributions_by_stage(aggregated_data, database_name, selected_sta
     
     stages = selected_stages if selected_stages else all_stages
 
+    if isinstance(aggregated_data, DistributionSummary):
+        _plot_kde_distributions_from_summary(aggregated_data, database_name, stages, impact_categories)
+        return
+
     # Initialize a list to collect data for KDE plots
     all_data = []
 
@@ -372,6 +498,36 @@ def plot_kde_distributions_by_stage(aggregated_data, database_name, selected_sta
     plt.show()
 
 
+def _plot_kde_distributions_from_summary(summary, database_name, stages, impact_categories):
+    """plot_kde_distributions_by_stage drawn from precomputed KDE curves (line style per stage if several are selected)."""
+    custom_palette = {
+        'base_design': 'black',
+        'alternative_design1': 'lightcoral',
+        'alternative_design2': 'blue'
+    }
+    line_styles = ['-', '--', ':', '-.']
+    fig, axes = plt.subplots(2, 2, figsize=(16, 10), sharex=False, sharey=False)
+    fig.suptitle(f'GWP Distributions for Stage {", ".join(stages)} - {database_name}', fontsize=16)
+    axes = axes.flatten()
+
+    for i, category in enumerate(impact_categories):
+        ax = axes[i]
+        for d, design_option in enumerate(summary.design_options):
+            for stage_idx, stage in enumerate(stages):
+                x, density = summary.kde(design_option, stage, category)
+                label = design_option if len(stages) == 1 else f'{design_option} ({stage})'
+                ax.plot(x, density, label=label, color=custom_palette.get(design_option, f"C{d}"), linestyle=line_styles[stage_idx % len(line_styles)])
+        ax.set_title(f'{category.replace("gwp_", "GWP ")}', fontsize=14)
+        ax.set_xlabel('GWP (kgCO2eq/FU)', fontsize=12)
+        ax.set_ylabel('Density', fontsize=12)
+        ax.grid(True)
+        ax.legend(title='design_option', fontsize='small')
+
+    plt.tight_layout(rect=[0, 0.05, 1, 0.95])
+    plt.subplots_adjust(bottom=0.15)
+    plt.show()
+
+
 
 ## stage specific boxplots for design options
 def plot_stage_specific_boxplots(aggregated_results):
@@ -381,7 +537,8 @@ def plot_stage_specific_boxplots(aggregated_results):
 
     Parameters:
         aggregated_results (list): List of aggregated results for each database.
-                                   Each entry is a dictionary of design options and their results.
+                                   Each entry is a dictionary of design options and their results,
+                                   or a DistributionSummary (visualizations.plot_data.summarize_distributions).
     """
     impact_categories = ['gwp_total', 'gwp_fossil', 'gwp_biogenic', 'gwp_luluc']
     design_options = ['base_design', 'alternative_design1', 'alternative_design2']
@@ -395,6 +552,30 @@ def plot_stage_specific_boxplots(aggregated_results):
         'EPD': 'green'
     }
 
+    if all(isinstance(db_results, DistributionSummary) for db_results in aggregated_results):
+        summaries = dict(zip(database_names, aggregated_results))
+        for design_option in design_options:
+            fig, axes = plt.subplots(2, 2, figsize=(16, 10), sharey=False)
+            axes = axes.flatten()
+            fig.suptitle(f"Stage-Specific Boxplots for {design_option}", fontsize=16)
+            for i, category in enumerate(impact_categories):
+                ax = axes[i]
+                handles, labels = _draw_summary_boxplots(
+                    ax, stages, list(summaries),
+                    lambda stage, db_name: summaries[db_name].boxplot_stats(design_option, stage, category),
+                    custom_palette
+                )
+                ax.set_title(f"{category.replace('gwp_', 'GWP ')}")
+                ax.set_xlabel('Life Cycle Stage')
+                ax.set_ylabel('GWP (kgCO2eq/FU)')
+                for x in range(len(stages) - 1):
+                    ax.axvline(x + 0.5, color='gray', linestyle='--', linewidth=0.5)
+            fig.legend(handles, labels, loc='lower center', ncol=3, title="Database", fontsize='small', frameon=False)
+            plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+            plt.subplots_adjust(bottom=0.15)
+            plt.show()
+        return
+
     # Collect all data into a single DataFrame for plotting
     all_data = []
     for db_idx, db_results in enumerate(aggregated_results):
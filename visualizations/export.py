@@ -0,0 +1,171 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+import matplotlib.pyplot as plt
+import contribution_analysis
+from models.results import STAGES
+from visualizations import do_visualizations
+from visualizations.plot_data import summarize_distributions
+
+## Headless figure export: the plotting functions end in plt.show(), which blocks batch jobs and needs a display.
+## In headless mode plt.show() saves the current figure with the non-interactive Agg backend instead. Figures render
+## in worker processes and are skipped when the hash of their inputs, the file format and the resolution are unchanged
+## since the last export (recorded in <output_dir>/figures.json).
+
+MANIFEST_NAME = "figures.json"
+
+
+@dataclass
+class FigureJob:
+    """One plotting call; every plt.show() in it produces one file <name>.<fmt>, <name>_2.<fmt>, ..."""
+    name: str
+    function: Callable
+    args: Tuple = ()
+    kwargs: Dict = field(default_factory=dict)
+
+    def input_hash(self) -> str:
+        """Hash of the plotting function and its inputs."""
+        digest = hashlib.sha256(f"{self.function.__module__}.{self.function.__qualname__}".encode())
+        digest.update(pickle.dumps((self.args, sorted(self.kwargs.items())), protocol=4))
+        return digest.hexdigest()
+
+
+@contextmanager
+def headless(output_dir: str, name: str, fmt: str = "png", dpi: int = 150, files: Optional[List[str]] = None):
+    """
+    Switch to the Agg backend and save every figure passed to plt.show() as <name>[_i].<fmt> in output_dir.
+    Figures left open by the plotting function are saved when the block ends. The file paths are appended to `files`.
+    The previous backend is restored afterwards.
+    """
+    files = files if files is not None else []
+    previous_backend = plt.get_backend()
+    plt.switch_backend("agg")
+    original_show = plt.show
+
+    def save_current_figure(*args, **kwargs):
+        if not plt.get_fignums():
+            return
+        suffix = f"_{len(files) + 1}" if files else ""
+        path = os.path.join(output_dir, f"{name}{suffix}.{fmt}")
+        plt.gcf().savefig(path, dpi=dpi, bbox_inches="tight")
+        plt.close(plt.gcf())
+        files.append(path)
+
+    plt.show = save_current_figure
+    try:
+        yield files
+        while plt.get_fignums():
+            save_current_figure()
+    finally:
+        plt.show = original_show
+        plt.close("all")
+        plt.switch_backend(previous_backend)
+
+
+def _render(job: FigureJob, output_dir: str, fmt: str, dpi: int) -> List[str]:
+    """Worker: render one figure job to files."""
+    files = []
+    with headless(output_dir, job.name, fmt, dpi, files):
+        job.function(*job.args, **job.kwargs)
+    return files
+
+
+def _load_manifest(output_dir: str) -> Dict:
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _is_current(entry: Optional[Dict], input_hash: str, fmt: str, dpi: int) -> bool:
+    """True if the manifest entry was rendered from the same inputs, in the same format and resolution, and its files exist."""
+    if not entry or entry["hash"] != input_hash or entry.get("fmt") != fmt or entry.get("dpi") != dpi:
+        return False
+    return all(path.endswith(f".{fmt}") and os.path.exists(path) for path in entry["files"])
+
+
+def export_figures(jobs: List[FigureJob], output_dir: str, max_workers: Optional[int] = None, fmt: str = "png", dpi: int = 150, force: bool = False) -> Dict[str, str]:
+    """
+    Render figure jobs to files in parallel worker processes.
+
+    Workers use the platform's default start method. Where that is spawn (macOS, Windows), the workers import the
+    calling script again, so scripts that call export_figures must guard their top-level code with
+    `if __name__ == "__main__":` (see app.py).
+
+    Parameters:
+    - jobs: List of FigureJob.
+    - output_dir: Directory for the figures and the manifest.
+    - max_workers: Number of worker processes (default: number of CPUs).
+    - fmt, dpi: File format and resolution of the figures.
+    - force: Render all figures, even if their inputs are unchanged.
+
+    Returns:
+    - status: Dictionary mapping the job name to 'rendered', 'skipped' or the error message.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+    status = {}
+    pending = {}
+    for job in jobs:
+        input_hash = job.input_hash()
+        entry = manifest.get(job.name)
+        if not force and _is_current(entry, input_hash, fmt, dpi):
+            status[job.name] = "skipped"
+        else:
+            pending[job.name] = (job, input_hash)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context()) as executor:
+            futures = {name: executor.submit(_render, job, output_dir, fmt, dpi) for name, (job, _) in pending.items()}
+            for name, future in futures.items():
+                try:
+                    manifest[name] = {"hash": pending[name][1], "fmt": fmt, "dpi": dpi, "files": future.result()}
+                    status[name] = "rendered"
+                except Exception as error:
+                    manifest.pop(name, None)
+                    status[name] = f"error: {error}"
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    rendered = sum(value == "rendered" for value in status.values())
+    skipped = sum(value == "skipped" for value in status.values())
+    print(f"Figures saved to {output_dir} ({rendered} rendered, {skipped} unchanged, {len(status) - rendered - skipped} failed)")
+    return status
+
+
+def build_run_figure_jobs(result_tensors: Dict, contributions: Optional[Dict] = None, uncertainty_contributions: Optional[Dict] = None) -> List[FigureJob]:
+    """
+    The figure set of a run: boxplots and KDE plots per database and stage, database comparisons per design option,
+    and optionally the A1 contribution plots.
+
+    Parameters:
+    - result_tensors: Dictionary of ResultTensors keyed by database name ('ecoinvent', 'ökobaudat', 'EPD').
+    - contributions: Output of contribution_analysis.calculate_normalized_a1_contributions_multiple_emission_factors.
+    - uncertainty_contributions: Uncertainty contributions per database (contribution_analysis.calculate_uncertainty_contributions).
+
+    Returns:
+    - jobs: List of FigureJob for export_figures. The jobs carry the compact plot data of
+      visualizations.plot_data.summarize_distributions instead of the raw samples.
+    """
+    summaries = {db_name: summarize_distributions(result_tensor) for db_name, result_tensor in result_tensors.items()}
+    jobs = []
+    for db_name, summary in summaries.items():
+        jobs.append(FigureJob(f"gwp_boxplots_{db_name}", do_visualizations.plot_gwp_boxplots_aggregated, (summary, db_name)))
+        for stage in STAGES:
+            jobs.append(FigureJob(f"kde_{db_name}_{stage}", do_visualizations.plot_kde_distributions_by_stage, (summary, db_name, [stage])))
+    jobs.append(FigureJob("overall_boxplots", do_visualizations.create_boxplots_from_raw_data, (summaries,)))
+    jobs.append(FigureJob("distributions_by_design_option", do_visualizations.plot_lca_distributions_by_design_option, (list(summaries.values()),)))
+    jobs.append(FigureJob("stage_specific_boxplots", do_visualizations.plot_stage_specific_boxplots, (list(summaries.values()),)))
+
+    if contributions is not None:
+        jobs.append(FigureJob("a1_contributions", contribution_analysis.plot_comparison_a1_contributions, (contributions,)))
+    if uncertainty_contributions is not None:
+        jobs.append(FigureJob("uncertainty_contributions", contribution_analysis.plot_comparison_uncertainty_contributions, (uncertainty_contributions,)))
+    return jobs
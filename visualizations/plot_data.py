@@ -0,0 +1,199 @@
+from dataclasses import dataclass
+from typing import Dict, List
+import numpy as np
+from models.results import ResultTensor, STAGES, IMPACT_CATEGORIES, TOTAL_STAGE
+from general.statistical_results import calculate_batched_statistics
+
+## Compact plot data for large sample sets: KDE curves (linear binning + FFT convolution), histograms and boxplot
+## statistics of every design option, stage and impact category, computed once in NumPy. The plots then draw a few
+## hundred points per series instead of handing 10^5+ raw samples per series to seaborn.
+
+@dataclass
+class DistributionSummary:
+    """
+    Plot summaries with the axes (design option, stage, impact category, ...).
+    Overall results (without stages) use the single stage TOTAL_STAGE.
+    """
+    design_options: List[str]
+    stages: List[str]
+    categories: List[str]
+    n_samples: int
+    kde_grid: np.ndarray            # (design option, stage, category, grid point)
+    kde_density: np.ndarray         # (design option, stage, category, grid point)
+    histogram_edges: np.ndarray     # (design option, stage, category, bin + 1)
+    histogram_density: np.ndarray   # (design option, stage, category, bin)
+    boxplot: Dict[str, np.ndarray]  # 'mean', 'q1', 'median', 'q3', 'whislo', 'whishi': (design option, stage, category)
+    fliers: np.ndarray              # object array (design option, stage, category) of outlier arrays (at most max_fliers each)
+
+    def _index(self, design_option, stage, category):
+        return self.design_options.index(design_option), self.stages.index(stage), self.categories.index(category)
+
+    def kde(self, design_option: str, stage: str, category: str):
+        """KDE curve (x, density) of one series."""
+        idx = self._index(design_option, stage, category)
+        return self.kde_grid[idx], self.kde_density[idx]
+
+    def histogram(self, design_option: str, stage: str, category: str):
+        """Histogram (edges, density) of one series."""
+        idx = self._index(design_option, stage, category)
+        return self.histogram_edges[idx], self.histogram_density[idx]
+
+    def boxplot_stats(self, design_option: str, stage: str, category: str, label=None) -> Dict:
+        """Boxplot statistics of one series in the format of matplotlib's Axes.bxp."""
+        idx = self._index(design_option, stage, category)
+        return {
+            'label': label if label is not None else design_option,
+            'mean': self.boxplot['mean'][idx],
+            'q1': self.boxplot['q1'][idx],
+            'med': self.boxplot['median'][idx],
+            'q3': self.boxplot['q3'][idx],
+            'whislo': self.boxplot['whislo'][idx],
+            'whishi': self.boxplot['whishi'][idx],
+            'fliers': self.fliers[idx],
+        }
+
+
+def _safe_bandwidth(std, values):
+    """Bandwidth fallback for constant series (KDE of a point mass)."""
+    fallback = np.maximum(np.abs(values.mean(axis=-1)) * 1e-3, 1e-12)
+    return np.where(std > 0, std, fallback)
+
+
+def binned_kde(values, n_grid: int = 512, cut: float = 3.0):
+    """
+    Gaussian KDE of many series at once with Scott's bandwidth (as seaborn's kdeplot), via linear binning on a regular
+    grid and an FFT convolution with the analytical Fourier transform of the kernel.
+
+    Parameters:
+    - values: Array with the samples on the last axis, e.g. (design option, stage, category, sample).
+    - n_grid: Number of grid points per series.
+    - cut: The grid extends `cut` bandwidths beyond the extreme samples (seaborn's default is 3).
+
+    Returns:
+    - grid, density: Arrays (..., n_grid).
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[-1]
+    bandwidth = _safe_bandwidth(values.std(axis=-1, ddof=1) if n > 1 else np.zeros(values.shape[:-1]), values) * n ** (-1 / 5)
+    low = values.min(axis=-1) - cut * bandwidth
+    high = values.max(axis=-1) + cut * bandwidth
+    step = (high - low) / (n_grid - 1)
+    grid = low[..., np.newaxis] + step[..., np.newaxis] * np.arange(n_grid)
+
+    ## linear binning: every sample is split between its two neighbouring grid points; one bincount for all series
+    n_series = int(np.prod(values.shape[:-1]))
+    position = (values - low[..., np.newaxis]) / step[..., np.newaxis]
+    lower = np.clip(np.floor(position), 0, n_grid - 2).astype(np.int64)
+    weight = position - lower
+    offsets = np.arange(n_series).reshape(values.shape[:-1] + (1,)) * n_grid
+    counts = (np.bincount((lower + offsets).ravel(), weights=(1 - weight).ravel(), minlength=n_series * n_grid)
+              + np.bincount((lower + 1 + offsets).ravel(), weights=weight.ravel(), minlength=n_series * n_grid))
+    counts = counts.reshape(values.shape[:-1] + (n_grid,))
+
+    ## convolution with the Gaussian kernel (bandwidth in grid units), zero padded against wrap-around
+    kernel_sigma = (bandwidth / step)[..., np.newaxis]
+    frequencies = np.fft.rfftfreq(2 * n_grid)
+    kernel_transform = np.exp(-0.5 * (2 * np.pi * frequencies * kernel_sigma) ** 2)
+    smoothed = np.fft.irfft(np.fft.rfft(counts, n=2 * n_grid, axis=-1) * kernel_transform, n=2 * n_grid, axis=-1)[..., :n_grid]
+    density = np.maximum(smoothed, 0) / (n * step[..., np.newaxis])
+    return grid, density
+
+
+def binned_histogram(values, n_bins: int = 50):
+    """
+    Density histograms of many series at once (regular bins between the extremes of every series).
+
+    Returns:
+    - edges: Array (..., n_bins + 1).
+    - density: Array (..., n_bins).
+    """
+    values = np.asarray(values, dtype=float)
+    low, high = values.min(axis=-1), values.max(axis=-1)
+    width = np.where(high > low, high - low, _safe_bandwidth(np.zeros_like(low), values))
+    edges = low[..., np.newaxis] + width[..., np.newaxis] * np.linspace(0, 1, n_bins + 1)
+    n_series = int(np.prod(values.shape[:-1]))
+    bins = np.clip(np.floor((values - low[..., np.newaxis]) / width[..., np.newaxis] * n_bins), 0, n_bins - 1).astype(np.int64)
+    offsets = np.arange(n_series).reshape(values.shape[:-1] + (1,)) * n_bins
+    counts = np.bincount((bins + offsets).ravel(), minlength=n_series * n_bins).reshape(values.shape[:-1] + (n_bins,))
+    density = counts / (values.shape[-1] * (width / n_bins)[..., np.newaxis])
+    return edges, density
+
+
+def boxplot_statistics(values, whis: float = 1.5, max_fliers: int = 200):
+    """
+    Boxplot statistics of many series at once, with matplotlib's whisker convention (most extreme samples within
+    `whis` times the IQR from the quartiles).
+
+    Returns:
+    - statistics: Dictionary of arrays 'mean', 'q1', 'median', 'q3', 'whislo', 'whishi' with the shape of values without the sample axis.
+    - fliers: Object array of the outliers of every series, evenly thinned to at most max_fliers (the extremes are kept).
+    """
+    values = np.asarray(values, dtype=float)
+    batched = calculate_batched_statistics(values)
+    q1, q3 = batched['Q1'], batched['Q3']
+    lower_limit = (q1 - whis * (q3 - q1))[..., np.newaxis]
+    upper_limit = (q3 + whis * (q3 - q1))[..., np.newaxis]
+    statistics = {
+        'mean': batched['Mean'],
+        'q1': q1,
+        'median': batched['Median'],
+        'q3': q3,
+        'whislo': np.where(values >= lower_limit, values, np.inf).min(axis=-1),
+        'whishi': np.where(values <= upper_limit, values, -np.inf).max(axis=-1),
+    }
+
+    outside = (values < lower_limit) | (values > upper_limit)
+    fliers = np.empty(values.shape[:-1], dtype=object)
+    for idx in np.ndindex(values.shape[:-1]):
+        series_fliers = np.sort(values[idx][outside[idx]])
+        if len(series_fliers) > max_fliers:
+            series_fliers = series_fliers[np.linspace(0, len(series_fliers) - 1, max_fliers).round().astype(int)]
+        fliers[idx] = series_fliers
+    return statistics, fliers
+
+
+def _as_array(data):
+    """Samples of a ResultTensor, aggregated data or overall aggregated data as (design option, stage, category, sample)."""
+    if isinstance(data, ResultTensor):
+        return list(data.design_options), data.stages + [TOTAL_STAGE], list(data.categories), data.stage_and_overall_totals()
+    design_options = list(data)
+    first = data[design_options[0]]
+    if all(stage in first for stage in STAGES):
+        ## aggregated data: design option -> stage -> category -> samples
+        values = np.array([[[first_level[stage][category] for category in IMPACT_CATEGORIES] for stage in STAGES] for first_level in data.values()], dtype=float)
+        return design_options, list(STAGES), list(IMPACT_CATEGORIES), values
+    ## overall aggregated data: design option -> category -> samples
+    values = np.array([[[option[category] for category in IMPACT_CATEGORIES]] for option in data.values()], dtype=float)
+    return design_options, [TOTAL_STAGE], list(IMPACT_CATEGORIES), values
+
+
+def summarize_distributions(data, n_grid: int = 512, n_bins: int = 50, max_fliers: int = 200) -> DistributionSummary:
+    """
+    Compute the plot data (KDE curves, histograms and boxplot statistics) of all series at once.
+
+    Parameters:
+    - data: ResultTensor (stages and the total over all stages), aggregated data (`collect_aggregated_data` layout)
+      or overall aggregated data (`collect_overall_aggregated_data` layout).
+    - n_grid: Number of KDE grid points per series.
+    - n_bins: Number of histogram bins per series.
+    - max_fliers: Maximum number of outliers kept per series for the boxplots.
+
+    Returns:
+    - summary: DistributionSummary accepted by the plotting functions of visualizations.do_visualizations.
+    """
+    design_options, stages, categories, values = _as_array(data)
+    kde_grid, kde_density = binned_kde(values, n_grid)
+    histogram_edges, histogram_density = binned_histogram(values, n_bins)
+    boxplot, fliers = boxplot_statistics(values, max_fliers=max_fliers)
+    return DistributionSummary(
+        design_options=design_options,
+        stages=stages,
+        categories=categories,
+        n_samples=values.shape[-1],
+        kde_grid=kde_grid,
+        kde_density=kde_density,
+        histogram_edges=histogram_edges,
+        histogram_density=histogram_density,
+        boxplot=boxplot,
+        fliers=fliers,
+    )